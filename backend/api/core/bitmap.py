@@ -0,0 +1,73 @@
+WORD_BITS = 64
+FULL_WORD = (1 << WORD_BITS) - 1
+
+
+def _lowest_zero_bit(word):
+    # Index of the lowest clear bit of a word that is not full.
+    free = ~word & FULL_WORD
+    return (free & -free).bit_length() - 1
+
+
+class OccupancyBitmap:
+    """
+    Taken/free bit per spot of one level, in order of distance from the entry point,
+    packed into 64-bit words. A summary bitmap holds one bit per word, set when the
+    word is full, so finding the nearest free spot skips 64 taken spots per summary
+    bit and 4096 per summary word instead of visiting them one by one.
+    """
+
+    def __init__(self, entries):
+        # entries: (distance, spot_id, is_taken) for every reachable spot on the level
+        entries = sorted(entries)
+        self.spot_ids = [spot_id for _, spot_id, _ in entries]
+        self.distances = [distance for distance, _, _ in entries]
+        self.position = {spot_id: index for index, spot_id in enumerate(self.spot_ids)}
+        size = len(entries)
+        num_words = -(-size // WORD_BITS)
+        words = [0] * num_words
+        for index, (_, _, is_taken) in enumerate(entries):
+            if is_taken:
+                words[index // WORD_BITS] |= 1 << (index % WORD_BITS)
+        if size % WORD_BITS:
+            # Padding past the last spot is permanently taken
+            words[-1] |= FULL_WORD & ~((1 << (size % WORD_BITS)) - 1)
+        self.words = words
+        self.summary = [0] * -(-num_words // WORD_BITS)
+        for word_index, word in enumerate(words):
+            if word == FULL_WORD:
+                self.summary[word_index // WORD_BITS] |= 1 << (word_index % WORD_BITS)
+        if num_words % WORD_BITS:
+            self.summary[-1] |= FULL_WORD & ~((1 << (num_words % WORD_BITS)) - 1)
+
+    def __len__(self):
+        return len(self.spot_ids)
+
+    def set_taken(self, spot_id, is_taken):
+        index = self.position.get(spot_id)
+        if index is None:
+            return
+        word_index, bit = divmod(index, WORD_BITS)
+        summary_index, summary_bit = divmod(word_index, WORD_BITS)
+        if is_taken:
+            word = self.words[word_index] | (1 << bit)
+            if word == FULL_WORD:
+                self.summary[summary_index] |= 1 << summary_bit
+        else:
+            word = self.words[word_index] & ~(1 << bit)
+            self.summary[summary_index] &= ~(1 << summary_bit)
+        self.words[word_index] = word
+
+    def first_free(self):
+        """(distance, spot_id) of the nearest free spot, or None when every spot is taken."""
+        return self.scan_first_free()[0]
+
+    def scan_first_free(self):
+        # first_free() and the number of summary and leaf words read to find it.
+        words = self.words
+        for summary_index, summary_word in enumerate(self.summary):
+            if summary_word == FULL_WORD:
+                continue
+            word_index = summary_index * WORD_BITS + _lowest_zero_bit(summary_word)
+            index = word_index * WORD_BITS + _lowest_zero_bit(words[word_index])
+            return (self.distances[index], self.spot_ids[index]), summary_index + 2
+        return None, len(self.summary)
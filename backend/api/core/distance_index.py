@@ -0,0 +1,77 @@
+import bisect
+
+
+class DistanceIndex:
+    """
+    Free spots on one level ordered by distance_from_entrance, in a Fenwick tree
+    over the spots sorted by (distance, spot_id). Marking a spot free or taken,
+    counting free spots in a distance range and finding the first free spot at
+    or after a distance are all O(log n).
+    """
+
+    def __init__(self, entries):
+        # entries: (distance, spot_id, is_free) for every reachable spot on the level
+        entries = sorted(entries)
+        self.distances = [distance for distance, _, _ in entries]
+        self.spot_ids = [spot_id for _, spot_id, _ in entries]
+        self.position = {spot_id: index for index, spot_id in enumerate(self.spot_ids)}
+        self.free = [bool(is_free) for _, _, is_free in entries]
+        size = len(entries)
+        # Build the tree in O(n): each node passes its sum on to its parent
+        tree = [0] * (size + 1)
+        for index, is_free in enumerate(self.free, 1):
+            tree[index] += is_free
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.tree = tree
+        self.top_bit = 1 << (size.bit_length() - 1) if size else 0
+
+    def __len__(self):
+        return len(self.spot_ids)
+
+    def set_free(self, spot_id, is_free):
+        index = self.position.get(spot_id)
+        if index is None or self.free[index] == is_free:
+            return
+        self.free[index] = is_free
+        delta = 1 if is_free else -1
+        tree = self.tree
+        index += 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, count):
+        # Free spots among the first `count` positions.
+        total = 0
+        tree = self.tree
+        while count > 0:
+            total += tree[count]
+            count -= count & -count
+        return total
+
+    def count_free(self, min_distance=None, max_distance=None):
+        """Free spots with min_distance <= distance <= max_distance; either bound may be open."""
+        start = 0 if min_distance is None else bisect.bisect_left(self.distances, min_distance)
+        end = len(self.distances) if max_distance is None else bisect.bisect_right(self.distances, max_distance)
+        if end <= start:
+            return 0
+        return self._prefix(end) - self._prefix(start)
+
+    def first_free(self, min_distance=0):
+        """(distance, spot_id) of the nearest free spot at or after min_distance, or None."""
+        rank = self._prefix(bisect.bisect_left(self.distances, min_distance)) + 1
+        if rank > self._prefix(len(self.distances)):
+            return None
+        # Walk down the tree to the position holding the rank-th free spot
+        tree = self.tree
+        index = 0
+        step = self.top_bit
+        while step:
+            child = index + step
+            if child < len(tree) and tree[child] < rank:
+                index = child
+                rank -= tree[child]
+            step >>= 1
+        return self.distances[index], self.spot_ids[index]
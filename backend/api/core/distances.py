@@ -0,0 +1,23 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to plain Python loops.
+    np = None
+
+
+def coordinate_arrays(coordinates):
+    # Split (x, y) pairs into x and y columns; NumPy arrays when available.
+    coordinates = list(coordinates)
+    if np is not None:
+        points = np.array(coordinates, dtype=np.int64).reshape(-1, 2)
+        return points[:, 0], points[:, 1]
+    return [x for x, _ in coordinates], [y for _, y in coordinates]
+
+
+def manhattan_distances(xs, ys, entry_point):
+    # Manhattan distance from entry_point to every spot, given parallel x and y coordinate columns.
+    entry_x, entry_y = entry_point
+    if np is not None:
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        return (np.abs(xs - entry_x) + np.abs(ys - entry_y)).tolist()
+    return [abs(x - entry_x) + abs(y - entry_y) for x, y in zip(xs, ys)]
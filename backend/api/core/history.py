@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+
+# (resolution in seconds, points kept): an hour of seconds, a day of minutes, 30 days of hours
+DEFAULT_TIERS = ((1, 3600), (60, 1440), (3600, 720))
+
+
+class _Tier:
+    """
+    Fixed-size ring of (bucket_start, mean occupied per level) points at one
+    resolution. Means are time-weighted over the bucket.
+    """
+
+    def __init__(self, resolution, capacity, num_levels):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.points = deque(maxlen=capacity)
+        self.num_levels = num_levels
+        self.bucket_start = None
+        self.weighted = [0.0] * num_levels  # Sum of occupied * seconds in the open bucket
+        self.covered = 0.0  # Seconds of the open bucket accounted for so far
+
+    def hold(self, values, start, end):
+        # Account for `values` being the occupancy from start until end.
+        resolution = self.resolution
+        if self.bucket_start is None:
+            self.bucket_start = start - start % resolution
+        while start < end:
+            bucket_end = self.bucket_start + resolution
+            if end < bucket_end:
+                self._accumulate(values, end - start)
+                return
+            self._accumulate(values, bucket_end - start)
+            self._close_bucket()
+            start = bucket_end
+            # Whole buckets at a constant value; at most a ring's worth is worth writing
+            full_buckets = int((end - start) // resolution)
+            if full_buckets:
+                skipped = max(full_buckets - self.capacity, 0)
+                for index in range(skipped, full_buckets):
+                    self.points.append((start + index * resolution, list(values)))
+                start += full_buckets * resolution
+            self.bucket_start = start
+
+    def _accumulate(self, values, seconds):
+        weighted = self.weighted
+        for level, value in enumerate(values):
+            weighted[level] += value * seconds
+        self.covered += seconds
+
+    def _close_bucket(self):
+        if self.covered:
+            self.points.append((self.bucket_start, [total / self.covered for total in self.weighted]))
+        self.weighted = [0.0] * self.num_levels
+        self.covered = 0.0
+
+    def open_point(self):
+        # Mean of the bucket still being filled, if it has any data yet.
+        if not self.covered:
+            return None
+        return (self.bucket_start, [total / self.covered for total in self.weighted])
+
+
+class OccupancyHistory:
+    """
+    Occupied spots per level over time, in rings at 1 s, 1 min and 1 h
+    resolution. record() is called on every occupancy change; the previous value
+    is treated as held until then, so idle periods are filled in. Memory is
+    bounded by the tier capacities no matter how long the lot runs. record() and
+    query() may be called from different threads.
+    """
+
+    def __init__(self, num_levels, tiers=DEFAULT_TIERS, clock=time.time):
+        self.num_levels = num_levels
+        self.clock = clock
+        self.tiers = [_Tier(resolution, capacity, num_levels) for resolution, capacity in tiers]
+        self.current = [0] * num_levels
+        self.last_time = None
+        self._lock = threading.Lock()  # Two records must not both hold() the same span
+
+    def __getstate__(self):
+        # Pickled with paged-out lots; the lock is made again on load
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def resolutions(self):
+        return [tier.resolution for tier in self.tiers]
+
+    def record(self, occupied_by_level):
+        with self._lock:
+            self._record(occupied_by_level)
+
+    def _record(self, occupied_by_level):
+        now = self.clock()
+        if self.last_time is not None and now > self.last_time:
+            for tier in self.tiers:
+                tier.hold(self.current, self.last_time, now)
+        if self.last_time is None or now > self.last_time:
+            self.last_time = now
+        self.current = list(occupied_by_level)
+
+    def query(self, start=None, end=None, resolution=None):
+        """
+        Points between start and end (epoch seconds; default the last hour) from
+        the finest tier that retains start, or from the tier with the given resolution.
+        """
+        with self._lock:
+            self._record(self.current)  # Carry the current value up to now
+            end = self.last_time if end is None else end
+            start = end - 3600 if start is None else start
+            if start > end:
+                raise ValueError("start must not be after end.")
+
+            if resolution is not None:
+                tier = next((tier for tier in self.tiers if tier.resolution == resolution), None)
+                if tier is None:
+                    raise ValueError(f"resolution must be one of {self.resolutions}.")
+            else:
+                # Finest tier whose retention still reaches back to start
+                tier = next(
+                    (tier for tier in self.tiers if self.last_time - start <= tier.resolution * tier.capacity),
+                    self.tiers[-1],
+                )
+
+            points = list(tier.points)
+            open_point = tier.open_point()
+        if open_point is not None:
+            points.append(open_point)
+        return {
+            "resolution": tier.resolution,
+            "points": [
+                {"timestamp": timestamp, "occupied_by_level": values}
+                for timestamp, values in points
+                if start <= timestamp + tier.resolution and timestamp <= end
+            ],
+        }
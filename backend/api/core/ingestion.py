@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from . import metrics
+from .lot_pins import LotPins
+import logging
+
+logger = logging.getLogger(__name__)
+
+GATE_COMMANDS = ("arrival", "departure")
+WORKER_IDLE_SECONDS = 30  # A worker with nothing to drain for this long exits; the next submit starts one
+
+
+class QueueFull(Exception):
+    """A gate queue has no room for the submitted commands; the caller should retry later."""
+
+
+class GateQueue:
+    """
+    Bounded queue of gate commands for one lot, drained by a worker thread in batches.
+    Submitting only validates and appends, so gate controllers are acknowledged
+    with tickets right away; a submit that would exceed max_depth is rejected whole
+    with QueueFull. Each batch is applied to the lot's SpotOnSystem in one write
+    transaction and its results are kept by ticket, up to max_results of them.
+    """
+
+    def __init__(self, lot_name, get_simulation, max_depth=10000, batch_size=256, max_results=None):
+        self.lot_name = lot_name
+        self.get_simulation = get_simulation  # Resolved per batch, so a paged-out lot is paged back in
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+        self.max_results = max_results if max_results is not None else 4 * max_depth
+        self._pending = deque()  # (ticket, command, vehicle_id, preferred_level, enqueued_at)
+        self._results = OrderedDict()  # Ticket to result, oldest first
+        self._last_ticket = 0
+        self._applied_through = 0  # Tickets are applied in order; all up to this one have results
+        lock = threading.Lock()
+        self._work_ready = threading.Condition(lock)  # The worker waits for commands
+        self._results_ready = threading.Condition(lock)  # results() callers wait for a batch to finish
+        self._worker = None
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    @property
+    def is_draining(self):
+        # The worker is applying or waiting for commands; the lot must stay resident meanwhile.
+        return self._worker is not None
+
+    def submit(self, commands):
+        # Validate and enqueue (command, vehicle_id, preferred_level) tuples; returns their tickets.
+        entries = []
+        for command, vehicle_id, preferred_level in commands:
+            if command not in GATE_COMMANDS:
+                raise ValueError(f"Gate command must be one of {GATE_COMMANDS}.")
+            if not isinstance(vehicle_id, str) or not vehicle_id:
+                raise ValueError("vehicle_id must be a non-empty string.")
+            if not isinstance(preferred_level, int) or preferred_level < 0:
+                raise ValueError("preferred_level must be a non-negative integer.")
+            entries.append((command, vehicle_id, preferred_level))
+        now = time.monotonic()
+        with self._work_ready:
+            if len(self._pending) + len(entries) > self.max_depth:
+                metrics.GATE_REJECTED.inc(self.lot_name, amount=len(entries))
+                raise QueueFull(
+                    f"Gate queue for '{self.lot_name}' is full: {len(entries)} commands submitted, "
+                    f"{len(self._pending)} of at most {self.max_depth} already waiting."
+                )
+            tickets = []
+            for command, vehicle_id, preferred_level in entries:
+                self._last_ticket += 1
+                self._pending.append((self._last_ticket, command, vehicle_id, preferred_level, now))
+                tickets.append(self._last_ticket)
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=f"spoton-gate-{self.lot_name}", daemon=True
+                )
+                self._worker.start()
+            self._work_ready.notify()
+        return tickets
+
+    def results(self, tickets, timeout=0):
+        # Result per ticket, waiting up to timeout seconds for pending ones to be applied.
+        deadline = time.monotonic() + timeout
+        last_wanted = min(max(tickets, default=0), self._last_ticket)  # Never-issued tickets are not waited for
+        with self._results_ready:
+            while self._applied_through < last_wanted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._results_ready.wait(remaining)
+            found = [self._results.get(ticket) for ticket in tickets]
+            applied_through, last_ticket = self._applied_through, self._last_ticket
+        # An applied ticket missing from the results had its result trimmed
+        return [
+            result if result is not None
+            else {"ticket": ticket, "status": "pending" if applied_through < ticket <= last_ticket else "unknown"}
+            for ticket, result in zip(tickets, found)
+        ]
+
+    def _run(self):
+        while True:
+            with self._work_ready:
+                if not self._pending:
+                    self._work_ready.wait(WORKER_IDLE_SECONDS)
+                    if not self._pending:
+                        self._worker = None
+                        return
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._apply(batch)
+
+    def _apply(self, batch):
+        started = time.monotonic()
+        # Commands from one submit share enqueued_at, so delays are recorded per submit
+        submits = {}
+        for _, _, _, _, enqueued_at in batch:
+            submits[enqueued_at] = submits.get(enqueued_at, 0) + 1
+        for enqueued_at, count in submits.items():
+            metrics.GATE_QUEUE_DELAY.observe(started - enqueued_at, self.lot_name, count=count)
+        metrics.GATE_BATCH_SIZE.observe(len(batch), self.lot_name)
+        try:
+            with LotPins():  # The lot stays resident until the batch is applied
+                simulation = self.get_simulation()
+                outcomes = simulation.system.apply_gate_commands(
+                    [(command, vehicle_id, preferred_level) for _, command, vehicle_id, preferred_level, _ in batch]
+                )
+        except Exception as e:
+            logger.exception(f"Gate batch of {len(batch)} commands for '{self.lot_name}' failed.")
+            outcomes = [e] * len(batch)
+        finished = time.monotonic()
+
+        published = []
+        tallies = {}  # (command, status) to count
+        for (ticket, command, vehicle_id, _, enqueued_at), outcome in zip(batch, outcomes):
+            result = {"ticket": ticket, "command": command, "vehicle_id": vehicle_id}
+            if isinstance(outcome, Exception):
+                result["status"] = "error"
+                result["error"] = str(outcome)
+            elif command == "arrival":
+                result["status"] = "parked" if outcome else "no_spot"
+                result["spot_id"] = outcome
+            else:
+                result["status"] = "departed" if outcome else "not_found"
+            result["queued_seconds"] = round(started - enqueued_at, 6)
+            result["completed_seconds"] = round(finished - enqueued_at, 6)
+            key = (command, result["status"])
+            tallies[key] = tallies.get(key, 0) + 1
+            published.append(result)
+        for (command, result_status), count in tallies.items():
+            metrics.GATE_COMMANDS.inc(self.lot_name, command, result_status, amount=count)
+
+        with self._results_ready:
+            for result in published:
+                self._results[result["ticket"]] = result
+            self._applied_through = batch[-1][0]
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+            self._results_ready.notify_all()
@@ -0,0 +1,219 @@
+import csv
+import gc
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@contextmanager
+def paused_gc():
+    # Bulk loads allocate millions of objects that all stay alive; pausing the cyclic
+    # collector avoids repeated full scans over them while they are created.
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@dataclass
+class LotLayout:
+    """
+    A real parking lot map held as parallel columns, one entry per spot, sorted by level.
+
+    Attributes:
+        spot_ids: Unique identifier of each spot
+        levels: Zero-based level of each spot
+        xs: Column (x) coordinate of each spot
+        ys: Row (y) coordinate of each spot
+        obstacles: Blocked (x, y) cells per level
+        entry_points: Fixed entry point per level; levels without one get a random perimeter point
+    """
+    spot_ids: list = field(default_factory=list)
+    levels: list = field(default_factory=list)
+    xs: list = field(default_factory=list)
+    ys: list = field(default_factory=list)
+    obstacles: dict = field(default_factory=dict)
+    entry_points: dict = field(default_factory=dict)
+
+    @property
+    def num_levels(self):
+        return self.levels[-1] + 1 if self.levels else 0
+
+    def level_ranges(self):
+        # (level, start, end) slices of the columns; each level's spots are contiguous.
+        ranges = []
+        start = 0
+        for index in range(1, len(self.levels) + 1):
+            if index == len(self.levels) or self.levels[index] != self.levels[start]:
+                ranges.append((self.levels[start], start, index))
+                start = index
+        return ranges
+
+    def sort_by_level(self):
+        if all(a <= b for a, b in zip(self.levels, self.levels[1:])):
+            return
+        order = sorted(range(len(self.levels)), key=self.levels.__getitem__)
+        self.spot_ids = [self.spot_ids[i] for i in order]
+        self.levels = [self.levels[i] for i in order]
+        self.xs = [self.xs[i] for i in order]
+        self.ys = [self.ys[i] for i in order]
+
+
+def load_layout(path):
+    """
+    Load a parking lot layout from a CSV or JSON file.
+
+    CSV files need ``spot_id``, ``level``, ``x`` and ``y`` columns and may add a
+    ``type`` column whose value is ``spot`` (default), ``obstacle`` or ``entry``.
+    JSON files hold ``spots`` (a list of ``{"id", "level", "x", "y"}`` objects, or
+    an object of equal-length ``id``/``level``/``x``/``y`` lists) plus optional
+    ``obstacles`` and ``entry_points`` lists of ``{"level", "x", "y"}``.
+    Levels in files are 1-based, matching the API. A malformed row, or a spot that
+    repeats an earlier spot's ID or cell, raises ValueError naming its line (CSV) or
+    its position in ``spots`` (JSON).
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in (".csv", ".json"):
+        raise ValueError(f"Unsupported layout file type '{suffix}'. Expected .csv or .json.")
+    with paused_gc():
+        layout = _load_csv(path) if suffix == ".csv" else _load_json(path)
+        duplicate = _first_duplicate(layout)
+    if not layout.spot_ids:
+        raise ValueError(f"Layout file '{path}' contains no spots.")
+    if min(layout.levels) < 0:
+        raise ValueError(f"Layout file '{path}' has levels below 1.")
+    if duplicate is not None:
+        index, earlier, what = duplicate
+        if suffix == ".csv":
+            line, earlier_line = _csv_spot_lines(path, (index, earlier))
+            raise ValueError(f"Layout file '{path}' line {line}: {what} repeats line {earlier_line}.")
+        raise ValueError(f"Layout file '{path}' spot {index + 1}: {what} repeats spot {earlier + 1}.")
+    layout.sort_by_level()
+    return layout
+
+
+def _first_duplicate(layout):
+    # (index, earlier index, what repeats) for the first spot that repeats an earlier spot's ID
+    # or cell, or None. The set sizes settle the common case without a Python-level loop.
+    num_spots = len(layout.spot_ids)
+    cells = list(zip(layout.levels, layout.xs, layout.ys))
+    if len(set(layout.spot_ids)) == num_spots and len(set(cells)) == num_spots:
+        return None
+    seen_ids, seen_cells = {}, {}
+    for index, (spot_id, cell) in enumerate(zip(layout.spot_ids, cells)):
+        if spot_id in seen_ids:
+            return index, seen_ids[spot_id], f"spot ID '{spot_id}'"
+        if cell in seen_cells:
+            level, x, y = cell
+            return index, seen_cells[cell], f"level {level + 1} cell ({x}, {y})"
+        seen_ids[spot_id] = index
+        seen_cells[cell] = index
+    return None
+
+
+def _csv_spot_lines(path, indexes):
+    # File line numbers of the spot rows at the given indexes, read again only to report an error.
+    wanted = set(indexes)
+    lines = {}
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [column.strip() for column in next(reader, [])]
+        type_col = header.index("type") if "type" in header else None
+        index = 0
+        for row in reader:
+            if not row:
+                continue
+            if type_col is None or not row[type_col] or row[type_col].strip().lower() == "spot":
+                if index in wanted:
+                    lines[index] = reader.line_num
+                index += 1
+    return [lines[index] for index in indexes]
+
+
+def _load_csv(path):
+    layout = LotLayout()
+    spot_ids, levels, xs, ys = layout.spot_ids, layout.levels, layout.xs, layout.ys
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [column.strip() for column in next(reader, [])]
+        missing = {"spot_id", "level", "x", "y"} - set(header)
+        if missing:
+            raise ValueError(f"Layout file '{path}' is missing columns: {', '.join(sorted(missing))}.")
+        id_col, level_col, x_col, y_col = (header.index(name) for name in ("spot_id", "level", "x", "y"))
+        type_col = header.index("type") if "type" in header else None
+        for row in reader:
+            if not row:
+                continue
+            try:
+                kind = row[type_col].strip().lower() if type_col is not None and row[type_col] else "spot"
+                level = int(row[level_col]) - 1
+                point = (int(row[x_col]), int(row[y_col]))
+                if kind == "spot":
+                    spot_id = row[id_col]
+                    if not spot_id:
+                        raise ValueError("spot_id is empty")
+            except IndexError:
+                raise ValueError(
+                    f"Layout file '{path}' line {reader.line_num}: expected {len(header)} columns, found {len(row)}."
+                ) from None
+            except ValueError as e:
+                raise ValueError(f"Layout file '{path}' line {reader.line_num}: {e}.") from None
+            if kind == "spot":
+                spot_ids.append(spot_id)
+                levels.append(level)
+                xs.append(point[0])
+                ys.append(point[1])
+            elif kind == "obstacle":
+                layout.obstacles.setdefault(level, set()).add(point)
+            elif kind == "entry":
+                layout.entry_points[level] = point
+            else:
+                raise ValueError(f"Layout file '{path}' line {reader.line_num}: unknown row type '{kind}'.")
+    return layout
+
+
+def _load_json(path):
+    with open(path) as f:
+        data = json.load(f)
+    layout = LotLayout()
+    spots = data.get("spots", [])
+    if isinstance(spots, dict):
+        try:
+            layout.spot_ids = [str(spot_id) for spot_id in spots["id"]]
+            layout.levels = [int(level) - 1 for level in spots["level"]]
+            layout.xs = [int(x) for x in spots["x"]]
+            layout.ys = [int(y) for y in spots["y"]]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Layout file '{path}' spot columns: {_describe(e)}.") from None
+        if not len(layout.spot_ids) == len(layout.levels) == len(layout.xs) == len(layout.ys):
+            raise ValueError(f"Spot columns in layout file '{path}' have different lengths.")
+    else:
+        for number, spot in enumerate(spots, start=1):
+            try:
+                spot_id, level, x, y = str(spot["id"]), int(spot["level"]) - 1, int(spot["x"]), int(spot["y"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Layout file '{path}' spot {number}: {_describe(e)}.") from None
+            layout.spot_ids.append(spot_id)
+            layout.levels.append(level)
+            layout.xs.append(x)
+            layout.ys.append(y)
+    for key in ("obstacles", "entry_points"):
+        for number, point in enumerate(data.get(key, []), start=1):
+            try:
+                level, cell = int(point["level"]) - 1, (int(point["x"]), int(point["y"]))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Layout file '{path}' {key} item {number}: {_describe(e)}.") from None
+            if key == "obstacles":
+                layout.obstacles.setdefault(level, set()).add(cell)
+            else:
+                layout.entry_points[level] = cell
+    return layout
+
+
+def _describe(error):
+    return f"missing field {error}" if isinstance(error, KeyError) else str(error)
@@ -0,0 +1,46 @@
+import contextvars
+from contextlib import contextmanager
+
+_active = contextvars.ContextVar("spoton_lot_pins", default=None)
+
+
+def active_pins():
+    # The LotPins collecting lookups in this context, or None.
+    return _active.get()
+
+
+class LotPins:
+    """
+    Lots looked up through ParkingLotManager.get_parking_lot while these pins are
+    active stay resident until release(), so an idle lot is never paged out while a
+    caller still reads or writes it. As a context manager the pins are released on
+    exit; collecting() only scopes the lookups, for pins that outlive the block.
+    """
+
+    def __init__(self):
+        self._releases = []  # One unpin callback per pinned lookup
+
+    def add(self, release):
+        self._releases.append(release)
+
+    def release(self):
+        # Unpin every lot pinned so far; safe to call more than once.
+        releases, self._releases = self._releases, []
+        for release in releases:
+            release()
+
+    @contextmanager
+    def collecting(self):
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+        self.release()
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from .layout_loader import paused_gc
+
+
+class LotStore:
+    """
+    Directory of paged-out lots, one zlib-compressed pickle of ParkingSimulation.snapshot()
+    per lot. Files are only read back by the process that wrote them, so they carry the
+    process ID and the format is not versioned.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="spoton-lots-")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def path(self, lot_name):
+        digest = hashlib.blake2b(lot_name.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{os.getpid()}-{digest}.lot")
+
+    def save(self, lot_name, snapshot):
+        # Write through a temporary file so a crash never leaves half a lot behind; returns bytes written.
+        data = zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        path = self.path(lot_name)
+        with open(path + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(path + ".tmp", path)
+        return len(data)
+
+    def load(self, lot_name):
+        # Read a lot back and delete its file; the lot is resident again.
+        path = self.path(lot_name)
+        with open(path, "rb") as file, paused_gc():
+            snapshot = pickle.loads(zlib.decompress(file.read()))
+        os.remove(path)
+        return snapshot
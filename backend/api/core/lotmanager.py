@@ -1,18 +1,313 @@
 from .system import SpotOnSystem
+from .models import LotDescriptor
 from ..simulation.engine import ParkingSimulation
+from . import metrics
+from . import memory
+from .lot_store import LotStore
+from .lot_pins import LotPins, active_pins
+from .ingestion import GateQueue
+from ..renderers import render_cache
+from collections import OrderedDict
+import threading
+import time
+import tracemalloc
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resident size estimate compared against memory_limit_bytes: a fixed cost per lot (mostly the
+# reservation timer wheel) plus a cost per spot, as measured by `manage.py memory_report`
+RESIDENT_BYTES_PER_LOT = 64 * 1024
+RESIDENT_BYTES_PER_SPOT = 720
 
 class ParkingLotManager:
-    def __init__(self):
-        self.parking_lots = {}
+    def __init__(self, shared_state_dir=None, allocation_backend="heap", memory_limit_bytes=None,
+                 idle_seconds=300, spill_dir=None, gate_queue_depth=10000, gate_batch_size=256):
+        self.lot_descriptors = {}  # Every registered lot, in registration order
+        self.parking_lots = {}  # Lots that have been built, by name
+        self._build_lock = threading.Lock()
+        # When set, lot occupancy lives in memory-mapped files here so all worker processes share it
+        self.shared_state_dir = shared_state_dir
+        self.allocation_backend = allocation_backend  # Nearest-spot search used by single-level lots
+        self.build_bytes = {}  # Traced bytes allocated while building each lot, when tracemalloc is on
+        # Over memory_limit_bytes, lots idle for idle_seconds are paged out to spill_dir, least
+        # recently used first, and paged back in on their next access. None keeps every lot resident.
+        self.memory_limit_bytes = memory_limit_bytes
+        self.idle_seconds = idle_seconds
+        self.lot_store = LotStore(spill_dir) if memory_limit_bytes is not None else None
+        self.last_access = OrderedDict()  # Resident lot name to time of last access, least recent first
+        self.resident_bytes = {}  # Resident lot name to its estimated size
+        self.paged_out = {}  # Paged-out lot name to the counters lot listings need
+        self.paging_out = {}  # Lot name to an Event set once its file is written (or the write failed)
+        self.lot_users = {}  # Resident lot name to the number of LotPins holding it
+        self._access_lock = threading.Lock()  # Guards the residency maps against lots being paged out
+        self.gate_queue_depth = gate_queue_depth
+        self.gate_batch_size = gate_batch_size
+        self.gate_queues = {}  # Lot name to its GateQueue, created on the first gate submit
+        self._gate_lock = threading.Lock()
 
-    def add_parking_lot(self, lot_name, num_levels, is_multi_level, address):
-        if lot_name in self.parking_lots:
+    def add_parking_lot(self, lot_name, num_levels, is_multi_level, address, layout_path=None):
+        # Register the lot; it is only built the first time it is accessed.
+        if lot_name in self.lot_descriptors:
             raise ValueError(f"Parking lot '{lot_name}' already exists.")
-        simulation = ParkingSimulation(lot_name, num_levels, is_multi_level, address)
-        self.parking_lots[lot_name] = simulation
+        self.lot_descriptors[lot_name] = LotDescriptor(lot_name, num_levels, is_multi_level, address, layout_path)
+
+    def has_parking_lot(self, lot_name):
+        # Whether the lot is registered, without building or paging it in.
+        return lot_name in self.lot_descriptors
+
+    def _build_parking_lot(self, descriptor, snapshot=None):
+        return ParkingSimulation(
+            descriptor.lot_name,
+            descriptor.num_levels,
+            descriptor.is_multi_level,
+            descriptor.address,
+            # Workers must build identical layouts to agree on spot positions in the shared region
+            seed=descriptor.lot_name if self.shared_state_dir else None,
+            shared_state_dir=self.shared_state_dir,
+            layout_path=descriptor.layout_path,
+            allocation_backend=self.allocation_backend,
+            snapshot=snapshot,
+        )
 
     def get_parking_lot(self, lot_name):
-        return self.parking_lots.get(lot_name)
+        # With paging on, a lot looked up while LotPins are active stays resident until they are released.
+        if self.lot_store is None:
+            simulation = self.parking_lots.get(lot_name)
+            if simulation is not None:
+                return simulation
+        else:
+            simulation = self._resident_lot(lot_name)
+            if simulation is not None:
+                metrics.LOT_LOOKUPS.inc("hit")
+                return simulation
+        descriptor = self.lot_descriptors.get(lot_name)
+        if descriptor is None:
+            return None
+        with self._build_lock:
+            if self.lot_store is None:
+                simulation = self.parking_lots.get(lot_name)
+                if simulation is None:
+                    simulation = self.parking_lots[lot_name] = self._build(descriptor)
+                return simulation
+            simulation = self._resident_lot(lot_name)
+            if simulation is None:
+                if lot_name in self.paged_out:
+                    simulation = self._page_in(descriptor)
+                else:
+                    simulation = self._build(descriptor)
+                with self._access_lock:
+                    self.parking_lots[lot_name] = simulation
+                    self._touch(lot_name)
+                    self._pin(lot_name)
+                    self.resident_bytes[lot_name] = RESIDENT_BYTES_PER_LOT + RESIDENT_BYTES_PER_SPOT * simulation.total_spots
+        self._page_out_idle_lots(keep=lot_name)  # Files are written outside _build_lock
+        return simulation
+
+    def _resident_lot(self, lot_name):
+        # The lot if resident, touched and pinned; None otherwise. A lot still being written out
+        # is waited for, so it is paged back in from the complete file.
+        while True:
+            with self._access_lock:
+                simulation = self.parking_lots.get(lot_name)
+                if simulation is not None:
+                    self._touch(lot_name)
+                    self._pin(lot_name)
+                    return simulation
+                written = self.paging_out.get(lot_name)
+            if written is None:
+                return None
+            written.wait()
+
+    def _build(self, descriptor):
+        # Under tracemalloc, other threads' allocations during the build are counted too
+        traced_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        simulation = self._build_parking_lot(descriptor)
+        if traced_before is not None:
+            self.build_bytes[descriptor.lot_name] = tracemalloc.get_traced_memory()[0] - traced_before
+        if self.lot_store is not None:
+            metrics.LOT_LOOKUPS.inc("build")
+        logger.info(f"Built parking lot '{descriptor.lot_name}' on first access.")
+        return simulation
+
+    def _touch(self, lot_name):
+        # Mark a resident lot as just used; call with _access_lock held.
+        self.last_access[lot_name] = time.monotonic()
+        self.last_access.move_to_end(lot_name)
+
+    def _pin(self, lot_name):
+        # Count a user of a resident lot if LotPins are active; call with _access_lock held.
+        pins = active_pins()
+        if pins is not None:
+            self.lot_users[lot_name] = self.lot_users.get(lot_name, 0) + 1
+            pins.add(lambda: self._unpin(lot_name))
+
+    def _unpin(self, lot_name):
+        with self._access_lock:
+            users = self.lot_users[lot_name] - 1
+            if users:
+                self.lot_users[lot_name] = users
+            else:
+                del self.lot_users[lot_name]
+
+    def _page_in(self, descriptor):
+        # Rebuild a paged-out lot from its file; call with _build_lock held.
+        started = time.perf_counter()
+        simulation = self._build_parking_lot(descriptor, self.lot_store.load(descriptor.lot_name))
+        del self.paged_out[descriptor.lot_name]
+        elapsed = time.perf_counter() - started
+        metrics.LOT_LOOKUPS.inc("miss")
+        metrics.LOT_PAGE_IN_SECONDS.observe(elapsed)
+        logger.info(f"Paged in parking lot '{descriptor.lot_name}' in {elapsed * 1000:.1f} ms.")
+        return simulation
+
+    def _page_out_idle_lots(self, keep):
+        # Page out least recently used lots until the resident estimate is under the limit.
+        # Lots used within idle_seconds, pinned by a caller, running a simulation or draining
+        # gate commands stay, so the limit is soft.
+        with self._access_lock:
+            resident = sum(self.resident_bytes.values())
+            if resident <= self.memory_limit_bytes:
+                return
+            cutoff = time.monotonic() - self.idle_seconds
+            evicted = []
+            for lot_name, last_access in list(self.last_access.items()):
+                if resident <= self.memory_limit_bytes or last_access > cutoff:
+                    break  # Every later lot was used more recently
+                simulation = self.parking_lots[lot_name]
+                gate_queue = self.gate_queues.get(lot_name)
+                if (lot_name == keep or lot_name in self.lot_users or simulation.is_simulation_running
+                        or (gate_queue and gate_queue.is_draining)):
+                    continue
+                # Unreachable from here on: lookups wait on paging_out until the file is written
+                del self.parking_lots[lot_name]
+                del self.last_access[lot_name]
+                resident -= self.resident_bytes.pop(lot_name)
+                self.paged_out[lot_name] = {
+                    "total_spots": simulation.total_spots,
+                    "occupied_spots": simulation.system.get_total_occupied_spots(),
+                    "num_levels": simulation.num_levels,
+                }
+                self.paging_out[lot_name] = threading.Event()
+                evicted.append((lot_name, simulation))
+            others_resident = len(self.last_access) > 1
+        for lot_name, simulation in evicted:
+            self._page_out(lot_name, simulation)
+        if resident > self.memory_limit_bytes and others_resident:
+            logger.warning(
+                f"Resident lots take about {resident / 2**20:.0f} MiB, over the {self.memory_limit_bytes / 2**20:.0f} MiB "
+                f"limit, but the others were used in the last {self.idle_seconds:g}s, are in use, are running "
+                f"simulations or are draining gate commands."
+            )
+
+    def _page_out(self, lot_name, simulation):
+        # Write a lot taken out of parking_lots to disk and close it; if the write fails it is made resident again.
+        try:
+            size = self.lot_store.save(lot_name, simulation.snapshot())
+        except Exception:
+            logger.exception(f"Could not page out parking lot '{lot_name}'; keeping it resident.")
+            with self._access_lock:
+                del self.paged_out[lot_name]
+                self.parking_lots[lot_name] = simulation
+                self._touch(lot_name)
+                self.resident_bytes[lot_name] = RESIDENT_BYTES_PER_LOT + RESIDENT_BYTES_PER_SPOT * simulation.total_spots
+                self.paging_out.pop(lot_name).set()
+            return
+        simulation.close()
+        with self._access_lock:
+            self.paging_out.pop(lot_name).set()
+        render_cache.discard_lot(lot_name)
+        metrics.LOT_PAGE_OUTS.inc()
+        logger.info(f"Paged out idle parking lot '{lot_name}' ({size} bytes on disk).")
+
+    def get_lot_summaries(self):
+        # Occupancy counters and details for every lot, in registration order.
+        summaries = []
+        for lot_name, descriptor in self.lot_descriptors.items():
+            counters = self.paged_out.get(lot_name)
+            if counters is not None:
+                # Listed from the counters kept in memory; the lot stays on disk
+                summaries.append({
+                    "lot_name": lot_name,
+                    "total_spots": counters["total_spots"],
+                    "available_spots": counters["total_spots"] - counters["occupied_spots"],
+                    "is_multi_level": descriptor.is_multi_level,
+                    "num_levels": counters["num_levels"],
+                    "address": descriptor.address,
+                })
+                continue
+            with LotPins():  # Held for this lot only, so listing never keeps every lot resident
+                simulation = self.get_parking_lot(lot_name)
+                occupied_spots = simulation.system.get_total_occupied_spots()
+            summaries.append({
+                "lot_name": lot_name,
+                "total_spots": simulation.total_spots,
+                "available_spots": simulation.total_spots - occupied_spots,
+                "is_multi_level": simulation.is_multi_level,
+                "num_levels": simulation.num_levels,
+                "address": simulation.address,
+            })
+        return summaries
+
+    def gate_queue(self, lot_name):
+        # The lot's gate command queue, created on first use; None for an unknown lot.
+        if lot_name not in self.lot_descriptors:
+            return None
+        with self._gate_lock:
+            gate_queue = self.gate_queues.get(lot_name)
+            if gate_queue is None:
+                gate_queue = self.gate_queues[lot_name] = GateQueue(
+                    lot_name,
+                    lambda: self.get_parking_lot(lot_name),
+                    max_depth=self.gate_queue_depth,
+                    batch_size=self.gate_batch_size,
+                )
+        return gate_queue
+
+    def submit_gate_commands(self, lot_name, commands):
+        # Queue (command, vehicle_id, preferred_level) tuples for a lot; returns (tickets, queue depth).
+        gate_queue = self.gate_queue(lot_name)
+        if gate_queue is None:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        tickets = gate_queue.submit(commands)
+        return tickets, gate_queue.depth
+
+    def get_gate_results(self, lot_name, tickets, timeout=0):
+        gate_queue = self.gate_queue(lot_name)
+        if gate_queue is None:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        return gate_queue.results(tickets, timeout)
+
+    def collect_metrics(self):
+        # Refresh the occupancy gauges for built lots (never builds or pages in one) and snapshot every metric.
+        with self._access_lock:  # A lot is closed only after it leaves parking_lots
+            for lot_name, simulation in list(self.parking_lots.items()):
+                metrics.OCCUPIED_SPOTS.set(simulation.system.get_total_occupied_spots(), lot_name)
+                metrics.TOTAL_SPOTS.set(simulation.total_spots, lot_name)
+        for lot_name, counters in list(self.paged_out.items()):
+            metrics.OCCUPIED_SPOTS.set(counters["occupied_spots"], lot_name)
+            metrics.TOTAL_SPOTS.set(counters["total_spots"], lot_name)
+        if self.lot_store is not None:
+            resident, paged_out = len(self.parking_lots), len(self.paged_out)
+            metrics.RESIDENT_LOTS.set(resident, "resident")
+            metrics.RESIDENT_LOTS.set(paged_out, "paged_out")
+            metrics.RESIDENT_LOTS.set(len(self.lot_descriptors) - resident - paged_out, "unbuilt")
+            metrics.RESIDENT_LOT_BYTES.set(sum(self.resident_bytes.values()))
+        for lot_name, gate_queue in list(self.gate_queues.items()):
+            metrics.GATE_QUEUE_DEPTH.set(gate_queue.depth, lot_name)
+        return metrics.REGISTRY.collect()
+
+    def memory_report(self, lot_names=None, top=0):
+        # Bytes per data structure for built lots (never builds one) plus process-wide tracemalloc numbers.
+        payload_bytes = render_cache.bytes_by_lot()
+        lots = []
+        for lot_name, simulation in list(self.parking_lots.items()):
+            if lot_names and lot_name not in lot_names:
+                continue
+            lot = memory.lot_memory(simulation, payload_bytes.get(lot_name, 0))
+            lot["traced_build_bytes"] = self.build_bytes.get(lot_name)
+            lots.append(lot)
+        return {"processes": [memory.process_memory(top)], "lots": lots}
 
     def start_simulation(self, lot_name, duration_seconds, update_interval):
         simulation = self.get_parking_lot(lot_name)
@@ -29,7 +324,7 @@ class ParkingLotManager:
             raise ValueError(f"Parking lot '{lot_name}' not found.")
 
     def is_simulation_running(self, lot_name):
-        simulation = self.get_parking_lot(lot_name)
+        simulation = self.parking_lots.get(lot_name)  # A lot that was never built is not running
         if simulation:
             return simulation.is_simulation_running
         else:
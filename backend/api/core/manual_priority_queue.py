@@ -1,7 +1,23 @@
+import heapq
+
 class ManualPriorityQueue:
     def __init__(self):
         self.heap = []
 
+    @classmethod
+    def from_items(cls, items):
+        # Build a priority queue from many items at once in O(n).
+        queue = cls()
+        queue.heap = list(items)
+        queue.heapify()
+        return queue
+
+    def heapify(self):
+        # Restore the heap property over the whole list bottom-up, which is O(n) instead of n pushes.
+        # heapq's C implementation yields the same array layout; ordering full (distance, spot_id)
+        # tuples also satisfies the distance-only ordering used by push and pop.
+        heapq.heapify(self.heap)
+
     def push(self, item):
         # Insert a new item into the priority queue.
         if item[0] is None:
@@ -50,19 +66,23 @@ class ManualPriorityQueue:
 
     def _heapify_down(self, index):
         # Maintain the heap property by moving the item at index down.
-        smallest = index
-        left = 2 * index + 1
-        right = 2 * index + 2
+        heap = self.heap
+        size = len(heap)
+        while True:
+            smallest = index
+            left = 2 * index + 1
+            right = 2 * index + 2
 
-        if left < len(self.heap) and self.heap[left][0] < self.heap[smallest][0]:
-            smallest = left
+            if left < size and heap[left][0] < heap[smallest][0]:
+                smallest = left
 
-        if right < len(self.heap) and self.heap[right][0] < self.heap[smallest][0]:
-            smallest = right
+            if right < size and heap[right][0] < heap[smallest][0]:
+                smallest = right
 
-        if smallest != index:
-            self._swap(index, smallest)
-            self._heapify_down(smallest)
+            if smallest == index:
+                return
+            heap[index], heap[smallest] = heap[smallest], heap[index]
+            index = smallest
 
     def _swap(self, i, j):
         # Swap two items in the heap.
@@ -0,0 +1,110 @@
+import os
+import sys
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is then left out of the report.
+    resource = None
+
+_PACKAGE = __name__.split(".")[0]  # Instances of classes from this package are walked into
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def deep_sizeof(root, seen):
+    """
+    Bytes held by root and everything it references: containers, dataclass and
+    package objects, and NumPy buffers. Objects whose id is already in seen are
+    skipped and everything visited is added to it, so measuring several
+    structures with one seen set counts shared objects once, for the first one.
+    """
+    size = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif type(obj).__module__.startswith(_PACKAGE + ".") and hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+        elif getattr(obj, "base", None) is not None and hasattr(obj, "nbytes"):
+            stack.append(obj.base)  # A NumPy view; its data lives in the base array
+    return size
+
+
+def lot_memory(simulation, payload_bytes=0):
+    """
+    Bytes per data structure of one built lot. Structures are measured in the order
+    listed and an object shared by several is counted under the first, so handles
+    and IDs land in spot_ids and vehicle ID strings in spot_objects.
+    """
+    system = simulation.system
+    parking_lot = system.parking_lot
+    seen = set()
+    structures = {}
+
+    def measure(name, *roots):
+        structures[name] = sum(deep_sizeof(root, seen) for root in roots)
+
+    measure("spot_ids", parking_lot.spot_ids, parking_lot.spot_handles)
+    structures["spot_objects"] = sum(deep_sizeof(spot, seen) for spot in parking_lot.spots.values())
+    measure("spots_dict", parking_lot.spots)
+    measure("spot_coordinates", parking_lot.spot_coordinates)
+    measure("spot_at", parking_lot.spot_at)
+    measure("levels", parking_lot.levels)
+    measure("availability_heap", parking_lot.available_spots)
+    measure(
+        "level_indexes",
+        parking_lot.tile_pyramids, parking_lot.distance_indexes, parking_lot.occupancy_bitmaps,
+        parking_lot._level_arrays, parking_lot.occupied_by_level,
+    )
+    measure("vehicle_to_spot", system.vehicle_to_spot)
+    measure("reservations", system.reservations, system.reservation_wheel)
+    measure("history", simulation.history)
+    measure(
+        "layout",
+        simulation.layout, parking_lot.level_layouts, parking_lot.perimeter_points,
+        parking_lot.obstacles, parking_lot.level_bounds, parking_lot.entry_points,
+    )
+    structures["cached_payloads"] = payload_bytes
+
+    total = sum(structures.values())
+    num_spots = len(parking_lot.spots)
+    return {
+        "lot_name": simulation.lot_name,
+        "spots": num_spots,
+        "total_bytes": total,
+        "bytes_per_spot": round(total / num_spots, 1) if num_spots else 0,
+        "structures": structures,
+    }
+
+
+def process_memory(top=0):
+    """Interpreter-wide numbers: tracemalloc totals and top allocation sites in this package."""
+    report = {"pid": os.getpid(), "tracing": tracemalloc.is_tracing()}
+    if resource is not None:
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        report["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    if report["tracing"]:
+        report["traced_bytes"], report["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+        if top:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(True, os.path.join(_PACKAGE_DIR, "*"))]
+            )
+            report["top_allocations"] = [
+                {
+                    "site": f"{os.path.relpath(stat.traceback[0].filename, _PACKAGE_DIR)}:{stat.traceback[0].lineno}",
+                    "bytes": stat.size,
+                    "blocks": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:top]
+            ]
+    return report
@@ -0,0 +1,330 @@
+import bisect
+import math
+import threading
+import weakref
+
+
+class _ShardOwner:
+    # Held only by a thread's threading.local, so it is dropped when the thread exits
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class _Metric:
+    """
+    Base for metrics whose samples are sharded per thread. A thread only ever
+    writes its own shard, so recording takes no lock; collection sums the shards.
+    When a thread exits, its shard is folded into a retired total, so servers that
+    start a thread per request keep one shard per live thread.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = {}  # id(shard) to shard, for live threads
+        self._retired = {}  # Samples of threads that have exited, in shard form
+        self._shards_lock = threading.Lock()  # Taken when a thread's shard is created or retired, and by collection
+
+    def _shard(self):
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            shard = {}
+            owner = _ShardOwner(shard)
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            self._local.owner = owner
+            weakref.finalize(owner, self._retire, shard)
+            return shard
+
+    def _retire(self, shard):
+        # The thread that wrote shard has exited; nothing writes it any more.
+        with self._shards_lock:
+            del self._shards[id(shard)]
+            for labelvalues, value in shard.items():
+                current = self._retired.get(labelvalues)
+                self._retired[labelvalues] = value if current is None else self._merge(current, value)
+
+    def _merge(self, current, value):
+        return current + value
+
+    def _snapshots(self):
+        # Copied under the lock, so a shard retired meanwhile is counted exactly once
+        with self._shards_lock:
+            return [shard.copy() for shard in self._shards.values()] + [self._retired.copy()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def collect(self):
+        samples = {}
+        for shard in self._snapshots():
+            for labelvalues, value in shard.items():
+                samples[labelvalues] = samples.get(labelvalues, 0) + value
+        return samples
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or computed by a callback at collection."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = None
+
+    def set(self, value, *labelvalues):
+        self._values[labelvalues] = value
+
+    def remove(self, *labelvalues):
+        self._values.pop(labelvalues, None)
+
+    def set_function(self, function):
+        # function() returns {labelvalues tuple: value}
+        self._function = function
+
+    def collect(self):
+        samples = self._values.copy()
+        if self._function is not None:
+            samples.update(self._function())
+        return samples
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues, count=1):
+        # count records the same value that many times at once
+        shard = self._shard()
+        series = shard.get(labelvalues)
+        if series is None:
+            series = shard[labelvalues] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += count
+        series[1] += value * count
+
+    def _merge(self, current, value):
+        # New lists, so snapshots already handed out never change
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]]
+
+    def collect(self):
+        # labelvalues to (per-bucket counts, last one for +Inf, sum)
+        samples = {}
+        for shard in self._snapshots():
+            for labelvalues, (counts, total) in shard.items():
+                merged = samples.get(labelvalues)
+                if merged is None:
+                    samples[labelvalues] = (list(counts), total)
+                else:
+                    samples[labelvalues] = ([a + b for a, b in zip(merged[0], counts)], merged[1] + total)
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """Plain-data snapshot of every metric; picklable so shard processes can send it."""
+        return [
+            {
+                "name": metric.name,
+                "kind": metric.kind,
+                "documentation": metric.documentation,
+                "labelnames": metric.labelnames,
+                "buckets": getattr(metric, "buckets", ()),
+                "samples": metric.collect(),
+            }
+            for metric in self.metrics
+        ]
+
+
+def merge_collections(collections):
+    """Sum snapshots from several processes, metric by metric and series by series."""
+    merged = {}
+    for collection in collections:
+        for family in collection:
+            target = merged.get(family["name"])
+            if target is None:
+                merged[family["name"]] = dict(family, samples=dict(family["samples"]))
+                continue
+            for labelvalues, value in family["samples"].items():
+                current = target["samples"].get(labelvalues)
+                if current is None:
+                    target["samples"][labelvalues] = value
+                elif family["kind"] == "histogram":
+                    target["samples"][labelvalues] = (
+                        [a + b for a, b in zip(current[0], value[0])],
+                        current[1] + value[1],
+                    )
+                else:
+                    target["samples"][labelvalues] = current + value
+    return list(merged.values())
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collection):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for family in collection:
+        name, labelnames = family["name"], family["labelnames"]
+        lines.append(f"# HELP {name} {family['documentation']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labelvalues, value in sorted(family["samples"].items()):
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(family["buckets"] + (math.inf,), counts):
+                cumulative += count
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labelvalues, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labelvalues)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labelvalues)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+VIEW_LATENCY = REGISTRY.register(Histogram(
+    "spoton_view_latency_seconds",
+    "Time spent handling API requests, by view.",
+    ["view", "method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+ALLOCATIONS = REGISTRY.register(Counter(
+    "spoton_allocations_total",
+    "Spots allocated to vehicles.",
+    ["lot"],
+))
+ALLOCATION_FAILURES = REGISTRY.register(Counter(
+    "spoton_allocation_failures_total",
+    "Vehicles that could not be given a spot.",
+    ["lot", "reason"],
+))
+RELEASES = REGISTRY.register(Counter(
+    "spoton_releases_total",
+    "Spots released by departing vehicles.",
+    ["lot"],
+))
+SEARCH_COST = REGISTRY.register(Histogram(
+    "spoton_search_cost",
+    "Work per nearest-spot search: BFS nodes expanded, priority queue pops or bitmap words read.",
+    ["lot", "algorithm"],
+    buckets=tuple(4 ** exponent for exponent in range(11)),
+))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    "spoton_coalesced_requests_total",
+    "Read requests answered from another request's in-flight computation.",
+    ["view"],
+))
+RENDER_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "spoton_render_cache_lookups_total",
+    "Pre-rendered status/grid body lookups, by result.",
+    ["result"],
+))
+OCCUPIED_SPOTS = REGISTRY.register(Gauge(
+    "spoton_occupied_spots",
+    "Occupied spots per built lot.",
+    ["lot"],
+))
+TOTAL_SPOTS = REGISTRY.register(Gauge(
+    "spoton_total_spots",
+    "Spots per built lot.",
+    ["lot"],
+))
+LOT_LOOKUPS = REGISTRY.register(Counter(
+    "spoton_lot_lookups_total",
+    "Lot accesses, by result: resident (hit), paged back in from disk (miss) or built for the first time (build).",
+    ["result"],
+))
+LOT_PAGE_IN_SECONDS = REGISTRY.register(Histogram(
+    "spoton_lot_page_in_seconds",
+    "Time to read a paged-out lot from disk and rebuild it.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+))
+LOT_PAGE_OUTS = REGISTRY.register(Counter(
+    "spoton_lot_page_outs_total",
+    "Idle lots written to disk to stay under the lot memory limit.",
+))
+RESIDENT_LOTS = REGISTRY.register(Gauge(
+    "spoton_lots",
+    "Registered lots, by state: resident, paged_out or unbuilt.",
+    ["state"],
+))
+RESIDENT_LOT_BYTES = REGISTRY.register(Gauge(
+    "spoton_resident_lot_bytes",
+    "Estimated bytes held by resident lots, the figure compared against the lot memory limit.",
+))
+GATE_COMMANDS = REGISTRY.register(Counter(
+    "spoton_gate_commands_total",
+    "Queued gate commands applied, by command and result.",
+    ["lot", "command", "result"],
+))
+GATE_REJECTED = REGISTRY.register(Counter(
+    "spoton_gate_rejected_total",
+    "Gate commands refused because the lot's gate queue was full.",
+    ["lot"],
+))
+GATE_QUEUE_DELAY = REGISTRY.register(Histogram(
+    "spoton_gate_queue_delay_seconds",
+    "Time gate commands waited in the queue before their batch was applied.",
+    ["lot"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+))
+GATE_BATCH_SIZE = REGISTRY.register(Histogram(
+    "spoton_gate_batch_size",
+    "Gate commands applied per write transaction.",
+    ["lot"],
+    buckets=tuple(2 ** exponent for exponent in range(11)),
+))
+GATE_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "spoton_gate_queue_depth",
+    "Gate commands waiting to be applied, per lot.",
+    ["lot"],
+))
+SIMULATION_THREADS = REGISTRY.register(Gauge(
+    "spoton_simulation_threads",
+    "Running simulation threads.",
+))
+
+SIMULATION_THREAD_PREFIX = "spoton-simulation-"
+SIMULATION_THREADS.set_function(lambda: {
+    (): sum(1 for thread in threading.enumerate() if thread.name.startswith(SIMULATION_THREAD_PREFIX))
+})
@@ -7,14 +7,37 @@ class ParkingSpot:
     Represents a single parking spot in the parking lot.
     
     Attributes:
-        id: Unique identifier for the spot
+        id: Integer handle of the spot inside its ParkingLot; the external ID is ParkingLot.spot_ids[id]
         level: Floor/level number where the spot is located
         distance_from_entrance: Distance from the entrance in arbitrary units
         is_occupied: Whether the spot is currently occupied
         vehicle_id: ID of the vehicle occupying the spot, if any
+        is_reserved: Whether the spot is held for a vehicle that has not arrived yet
+        reserved_for: ID of the vehicle holding the reservation, if any
     """
-    id: str
+    id: int
     level: int
     distance_from_entrance: float
     is_occupied: bool = False
     vehicle_id: Optional[str] = None
+    is_reserved: bool = False
+    reserved_for: Optional[str] = None
+
+
+@dataclass
+class LotDescriptor:
+    """
+    Lightweight registration of a parking lot that has not been built yet.
+
+    Attributes:
+        lot_name: Unique name of the lot
+        num_levels: Number of floors/levels in the lot
+        is_multi_level: Whether the lot uses the multi-level (BFS) search
+        address: Street address shown to drivers
+        layout_path: CSV/JSON file with the real lot map, or None for a random grid
+    """
+    lot_name: str
+    num_levels: int
+    is_multi_level: bool
+    address: str
+    layout_path: Optional[str] = None
@@ -1,61 +1,419 @@
 from .models import ParkingSpot
 from .manual_priority_queue import ManualPriorityQueue
 from .manual_bfs_queue import ManualBFSQueue  # Importing ManualBFSQueue
+from .layout_loader import paused_gc
+from .distances import coordinate_arrays, manhattan_distances
+from .tiles import TilePyramid
+from .distance_index import DistanceIndex
+from .bitmap import OccupancyBitmap
 import math
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 class ParkingLot:
-    def __init__(self, is_multi_level=False):
+    def __init__(self, is_multi_level=False, keeps_heap=True):
         self.is_multi_level = is_multi_level
-        self.spots = {}
+        # Whether available_spots is maintained; without it the heap stays empty and
+        # push_available/remove_available cost nothing
+        self.keeps_heap = keeps_heap
+        # Spots are keyed by dense integer handles everywhere inside the lot; each external string
+        # ID is stored once and only looked up when a request names a spot or a response lists one.
+        # Handle 0 is never assigned, so a handle is truthy like the string IDs it stands for.
+        self.spot_ids = [None]  # Handle to external spot ID
+        self.spot_handles = {}  # External spot ID to handle
+        self.spots = {}  # Handle to ParkingSpot
         self.available_spots = ManualPriorityQueue()
         self.levels = {}
         self.entry_points = {}  # Entry point per level
-        self.vehicle_to_spot = {}  # vehicle_id to spot_id
-        self.spot_coordinates = {}  # Map of spot_id to (x, y)
+        self.vehicle_to_spot = {}  # vehicle_id to spot handle; SpotOnSystem.vehicle_to_spot reads this dict
+        self.spot_coordinates = [None]  # (x, y) by spot handle; a list since handles are dense
+        self.spot_at = {}  # Map of (level, (x, y)) to spot handle
+        self.obstacles = {}  # Blocked (x, y) cells per level
+        self.level_bounds = {}  # [min_x, min_y, max_x, max_y] of spots and entry point per level
+        self._level_arrays = {}  # Cached (spots, xs, ys) per level for bulk distance updates
+        self.occupied_by_level = {}  # Occupied spot count per level, kept current by SpotOnSystem
+        self.tile_pyramids = {}  # TilePyramid per level, built on first tile query
+        self.distance_indexes = {}  # DistanceIndex of free spots per level, built on first distance query
+        self.occupancy_bitmaps = {}  # OccupancyBitmap per level for the bitmap allocation backend
+        # Layout details the simulation serves with the spots; kept here so a rebuilt lot
+        # replaces them together with the spots in one swap
+        self.level_layouts = {}  # (rows, columns) per level
+        self.perimeter_points = {}  # Candidate entry points per level
+        self.nearest_spot_ids = {}  # External ID of the nearest free spot per level, or "N/A"
+        # Taken by every spot change and while a per-level index is built, so no change is missed
+        # by an index under construction; SpotOnSystem replaces it with its write lock
+        self.write_lock = threading.RLock()
+
+    def clear(self):
+        # Remove every spot, level, entry point and obstacle; handles are assigned from 1 again.
+        del self.spot_ids[1:]
+        self.spot_handles.clear()
+        self.spots.clear()
+        self.levels.clear()
+        self.entry_points.clear()
+        del self.spot_coordinates[1:]
+        self.spot_at.clear()
+        self.obstacles.clear()
+        self.level_bounds.clear()
+        self._level_arrays.clear()
+        self.occupied_by_level.clear()
+        self.tile_pyramids.clear()
+        self.distance_indexes.clear()
+        self.occupancy_bitmaps.clear()
+        self.available_spots = ManualPriorityQueue()
+        self.vehicle_to_spot.clear()
+        self.level_layouts.clear()
+        self.perimeter_points.clear()
+        self.nearest_spot_ids.clear()
+
+    def external_id(self, handle):
+        # External ID of a spot handle; None stays None so search results convert directly.
+        return None if handle is None else self.spot_ids[handle]
+
+    def handle_of(self, spot_id):
+        # Handle of an external spot ID, or None if the lot has no such spot.
+        return self.spot_handles.get(spot_id)
 
     def add_parking_spot(self, spot_id, level, distance, coordinate):
-        if spot_id in self.spots:
+        # Add a spot by external ID and return its handle.
+        if spot_id in self.spot_handles:
             raise ValueError(f"Spot ID '{spot_id}' already exists.")
 
         if distance is None:
             distance = float('inf')  # Assign a default large distance if none is provided
 
-        spot = ParkingSpot(id=spot_id, level=level, distance_from_entrance=distance)
-        self.spots[spot_id] = spot
-        self.spot_coordinates[spot_id] = coordinate
+        handle = len(self.spot_ids)
+        self.spot_ids.append(spot_id)
+        self.spot_handles[spot_id] = handle
+        spot = ParkingSpot(id=handle, level=level, distance_from_entrance=distance)
+        self.spots[handle] = spot
+        self.spot_coordinates.append(coordinate)
+        self.spot_at[(level, coordinate)] = handle
+        self._extend_bounds(level, coordinate)
+        self._level_arrays.pop(level, None)
+        self.tile_pyramids.pop(level, None)
+        self.distance_indexes.pop(level, None)
+        self.occupancy_bitmaps.pop(level, None)
 
         if level not in self.levels:
             self.levels[level] = []
-        self.levels[level].append(spot_id)
+        self.levels[level].append(handle)
 
         # Only add to available_spots if the spot is not occupied and distance is valid
         if not spot.is_occupied and distance != float('inf'):
-            self.available_spots.push((distance, spot_id))
+            self.push_available(spot)
+        return handle
+
+    def add_parking_spots_bulk(self, spot_ids, levels, distances, coordinates):
+        # Add many spots at once. Dictionaries are filled in C-level bulk updates and the
+        # availability heap is rebuilt once in O(n) instead of pushing every spot.
+        # Returns the handles given to the new spots, in input order.
+        with paused_gc():
+            spot_ids = list(spot_ids)
+            levels = list(levels)
+            coordinates = list(coordinates)
+            distances = [float('inf') if distance is None else distance for distance in distances]
+
+            # One int object per handle, shared by every structure below
+            handles = list(range(len(self.spot_ids), len(self.spot_ids) + len(spot_ids)))
+            new_handles = dict(zip(spot_ids, handles))
+            new_cells = dict(zip(zip(levels, coordinates), handles))
+            if (len(new_handles) != len(handles) or not self.spot_handles.keys().isdisjoint(new_handles)
+                    or len(new_cells) != len(handles) or not self.spot_at.keys().isdisjoint(new_cells)):
+                self._raise_duplicate(spot_ids, levels, coordinates)
+            self.spot_ids.extend(spot_ids)
+            self.spot_handles.update(new_handles)
+            self.spots.update(zip(handles, map(ParkingSpot, handles, levels, distances)))
+            self.spot_coordinates.extend(coordinates)
+            self.spot_at.update(new_cells)
+
+            new_spots_by_level = {}  # level to ([handle, ...], [coordinate, ...])
+            for handle, level, coordinate in zip(handles, levels, coordinates):
+                level_spots = new_spots_by_level.get(level)
+                if level_spots is None:
+                    level_spots = new_spots_by_level[level] = ([], [])
+                level_spots[0].append(handle)
+                level_spots[1].append(coordinate)
+            for level, (level_handles, level_coordinates) in new_spots_by_level.items():
+                self.levels.setdefault(level, []).extend(level_handles)
+                self._level_arrays.pop(level, None)
+                self.tile_pyramids.pop(level, None)
+                xs, ys = zip(*level_coordinates)
+                self._extend_bounds(level, (min(xs), min(ys)))
+                self._extend_bounds(level, (max(xs), max(ys)))
+            self.rebuild_available_spots()
+        return handles
+
+    def _raise_duplicate(self, spot_ids, levels, coordinates):
+        # Name the first of the rows given to add_parking_spots_bulk (1-based) that repeats a spot ID
+        # or a cell, either of an earlier row or of a spot already in the lot.
+        seen_ids, seen_cells = {}, {}
+        for row, (spot_id, level, coordinate) in enumerate(zip(spot_ids, levels, coordinates), start=1):
+            if spot_id in self.spot_handles:
+                raise ValueError(f"Row {row}: spot ID '{spot_id}' already exists.")
+            if spot_id in seen_ids:
+                raise ValueError(f"Row {row}: spot ID '{spot_id}' repeats row {seen_ids[spot_id]}.")
+            cell = (level, coordinate)
+            if cell in self.spot_at:
+                raise ValueError(
+                    f"Row {row}: level {level + 1} cell {coordinate} already holds spot "
+                    f"'{self.external_id(self.spot_at[cell])}'."
+                )
+            if cell in seen_cells:
+                raise ValueError(f"Row {row}: level {level + 1} cell {coordinate} repeats row {seen_cells[cell]}.")
+            seen_ids[spot_id] = row
+            seen_cells[cell] = row
+
+    def snapshot(self):
+        # Spot columns in handle order with occupancy, entry points and obstacles; everything
+        # else (heap, per-level indexes, bounds) is derived again by restore.
+        spots = self.spots
+        columns = [spots[handle] for handle in range(1, len(self.spot_ids))]
+        return {
+            "spot_ids": self.spot_ids[1:],
+            "levels": [spot.level for spot in columns],
+            "distances": [spot.distance_from_entrance for spot in columns],
+            "coordinates": self.spot_coordinates[1:],
+            "vehicle_ids": [spot.vehicle_id for spot in columns],
+            # Copies, since restore clears these dicts before reading the snapshot back
+            "entry_points": dict(self.entry_points),
+            "obstacles": {level: set(cells) for level, cells in self.obstacles.items()},
+            "level_layouts": dict(self.level_layouts),
+            "perimeter_points": dict(self.perimeter_points),
+            "nearest_spot_ids": dict(self.nearest_spot_ids),
+        }
+
+    def restore(self, snapshot):
+        # Rebuild the lot from snapshot(); every spot gets back the handle it had.
+        self.clear()
+        with paused_gc():
+            self.add_parking_spots_bulk(
+                snapshot["spot_ids"], snapshot["levels"], snapshot["distances"], snapshot["coordinates"]
+            )
+            for level, entry_point in snapshot["entry_points"].items():
+                self.set_entry_point(level, entry_point)
+            for level, cells in snapshot["obstacles"].items():
+                self.obstacles[level] = set(cells)
+            self.level_layouts.update(snapshot["level_layouts"])
+            self.perimeter_points.update(snapshot["perimeter_points"])
+            self.nearest_spot_ids.update(snapshot["nearest_spot_ids"])
+            spots = self.spots
+            for handle, vehicle_id in enumerate(snapshot["vehicle_ids"], 1):
+                if vehicle_id is not None:
+                    spot = spots[handle]
+                    spot.is_occupied = True
+                    spot.vehicle_id = vehicle_id
+            self.rebuild_available_spots()
+            self.recount_occupancy()
+
+    def rebuild_available_spots(self):
+        # Rebuild the availability heap from every free spot with a known distance.
+        # Distances or occupancy changed in bulk, so the per-level indexes are rebuilt on next use.
+        infinity = float('inf')
+        self.distance_indexes.clear()
+        self.occupancy_bitmaps.clear()
+        if not self.keeps_heap:
+            self.available_spots = ManualPriorityQueue()
+            return
+        with paused_gc():
+            self.available_spots = ManualPriorityQueue.from_items(
+                [
+                    (spot.distance_from_entrance, spot_id)
+                    for spot_id, spot in self.spots.items()
+                    if not spot.is_occupied and not spot.is_reserved and spot.distance_from_entrance != infinity
+                ]
+            )
+
+    def push_available(self, spot):
+        # Put a free spot back on the availability heap.
+        if self.keeps_heap:
+            self.available_spots.push((spot.distance_from_entrance, spot.id))
+
+    def remove_available(self, spot):
+        # Take a spot off the availability heap (O(n)); True if it was there or no heap is kept.
+        if not self.keeps_heap:
+            return True
+        return self.available_spots.remove((spot.distance_from_entrance, spot.id))
+
+    def set_keeps_heap(self, keeps_heap):
+        # Start or stop maintaining the availability heap; it is rebuilt when turned back on.
+        if keeps_heap != self.keeps_heap:
+            self.keeps_heap = keeps_heap
+            self.rebuild_available_spots()
+
+    def recount_occupancy(self):
+        # Recount occupied spots per level after bulk changes; tile pyramids and
+        # per-level indexes are rebuilt on next use.
+        counts = dict.fromkeys(self.levels, 0)
+        for spot in self.spots.values():
+            if spot.is_occupied:
+                counts[spot.level] += 1
+        self.occupied_by_level = counts
+        self.tile_pyramids.clear()
+        self.distance_indexes.clear()
+        self.occupancy_bitmaps.clear()
+
+    def tile_pyramid(self, level):
+        # Occupancy counts per tile for a level, built once and then updated per spot.
+        pyramid = self.tile_pyramids.get(level)
+        if pyramid is None:
+            with self.write_lock:
+                pyramid = self.tile_pyramids.get(level)
+                if pyramid is None:
+                    spots = self.spots
+                    coordinates = self.spot_coordinates
+                    pyramid = TilePyramid.build(
+                        (*coordinates[spot_id], spots[spot_id].is_occupied)
+                        for spot_id in self.levels.get(level, [])
+                    )
+                    self.tile_pyramids[level] = pyramid
+        return pyramid
+
+    def update_tile_counts(self, spot, delta):
+        pyramid = self.tile_pyramids.get(spot.level)
+        if pyramid is not None:
+            x, y = self.spot_coordinates[spot.id]
+            pyramid.update(x, y, delta)
+
+    def distance_index(self, level):
+        # Free spots on a level by distance from its entry point, built once and then updated per spot.
+        index = self.distance_indexes.get(level)
+        if index is None:
+            with self.write_lock:
+                index = self.distance_indexes.get(level)
+                if index is None:
+                    infinity = float('inf')
+                    level_spots = [self.spots[spot_id] for spot_id in self.levels.get(level, [])]
+                    index = DistanceIndex(
+                        (spot.distance_from_entrance, spot.id, not spot.is_occupied and not spot.is_reserved)
+                        for spot in level_spots
+                        if spot.distance_from_entrance != infinity
+                    )
+                    self.distance_indexes[level] = index
+        return index
+
+    def occupancy_bitmap(self, level):
+        # Taken bits for a level's spots in distance order, built once and then updated per spot.
+        bitmap = self.occupancy_bitmaps.get(level)
+        if bitmap is None:
+            with self.write_lock:
+                bitmap = self.occupancy_bitmaps.get(level)
+                if bitmap is None:
+                    infinity = float('inf')
+                    level_spots = [self.spots[spot_id] for spot_id in self.levels.get(level, [])]
+                    bitmap = OccupancyBitmap(
+                        (spot.distance_from_entrance, spot.id, spot.is_occupied or spot.is_reserved)
+                        for spot in level_spots
+                        if spot.distance_from_entrance != infinity
+                    )
+                    self.occupancy_bitmaps[level] = bitmap
+        return bitmap
+
+    def build_indexes_like(self, parking_lot):
+        # Build the per-level indexes another lot has built, so queries on this lot find them
+        # ready once it replaces that one.
+        for level in list(parking_lot.tile_pyramids):
+            self.tile_pyramid(level)
+        for level in list(parking_lot.distance_indexes):
+            self.distance_index(level)
+        for level in list(parking_lot.occupancy_bitmaps):
+            self.occupancy_bitmap(level)
+
+    def update_spot_indexes(self, spot):
+        # A spot was allocated, released, reserved or let go; free means neither occupied nor reserved.
+        is_free = not spot.is_occupied and not spot.is_reserved
+        index = self.distance_indexes.get(spot.level)
+        if index is not None:
+            index.set_free(spot.id, is_free)
+        bitmap = self.occupancy_bitmaps.get(spot.level)
+        if bitmap is not None:
+            bitmap.set_taken(spot.id, not is_free)
+
+    def spots_in_area(self, level, x0, y0, x1, y1):
+        # Spot ids on a level inside the inclusive box, by cell lookup: O(box area), not O(spots).
+        spot_at = self.spot_at
+        return [
+            spot_at[(level, (x, y))]
+            for y in range(y0, y1 + 1)
+            for x in range(x0, x1 + 1)
+            if (level, (x, y)) in spot_at
+        ]
+
+    def level_coordinate_arrays(self, level):
+        # Spots on a level with their x and y coordinate columns, built once and cached.
+        arrays = self._level_arrays.get(level)
+        if arrays is None:
+            spot_ids = self.levels.get(level, [])
+            xs, ys = coordinate_arrays(self.spot_coordinates[spot_id] for spot_id in spot_ids)
+            arrays = ([self.spots[spot_id] for spot_id in spot_ids], xs, ys)
+            self._level_arrays[level] = arrays
+        return arrays
+
+    def assign_distances(self, level, entry_point):
+        # Recompute distance_from_entrance for every spot on a level in one vectorized pass.
+        # The availability heap is not touched; call rebuild_available_spots afterwards.
+        spots, xs, ys = self.level_coordinate_arrays(level)
+        for spot, distance in zip(spots, manhattan_distances(xs, ys, entry_point)):
+            spot.distance_from_entrance = distance
+
+    def move_entry_point(self, level, entry_point):
+        # Set a new entry point, recompute the level's distances and rebuild the heap in O(n).
+        self.set_entry_point(level, entry_point)
+        self.assign_distances(level, entry_point)
+        self.rebuild_available_spots()
+
+    def add_obstacle(self, level, coordinate):
+        # Mark a cell as impassable for BFS (pillars, walls, ramps).
+        self.obstacles.setdefault(level, set()).add(coordinate)
+
+    def _extend_bounds(self, level, coordinate):
+        x, y = coordinate
+        bounds = self.level_bounds.get(level)
+        if bounds is None:
+            self.level_bounds[level] = [x, y, x, y]
+            return
+        bounds[0] = min(bounds[0], x)
+        bounds[1] = min(bounds[1], y)
+        bounds[2] = max(bounds[2], x)
+        bounds[3] = max(bounds[3], y)
+
+    def is_walkable(self, level, point):
+        # Whether BFS may step onto point: not an obstacle and at most one cell outside the level.
+        if point in self.obstacles.get(level, ()):
+            return False
+        bounds = self.level_bounds.get(level)
+        if bounds is None:
+            return True
+        x, y = point
+        return bounds[0] - 1 <= x <= bounds[2] + 1 and bounds[1] - 1 <= y <= bounds[3] + 1
 
     def set_entry_point(self, level, entry_point):
         self.entry_points[level] = entry_point
+        self._extend_bounds(level, entry_point)
 
     def find_nearest_spot_priority_queue(self, level):
         # Find the nearest available spot using the manual priority queue for a specific level.
         if level not in self.entry_points:
-            print(f"No entry point set for level {level}.")
+            logger.debug(f"No entry point set for level {level}.")
             return None
 
         while not self.available_spots.is_empty():
             distance, spot_id = self.available_spots.pop()
             spot = self.spots.get(spot_id)
             if spot and not spot.is_occupied and spot.level == level:
-                print(f"Nearest spot (Priority Queue) for level {level}: {spot_id} at distance {distance:.2f}")
+                logger.debug(f"Nearest spot (Priority Queue) for level {level}: {spot_id} at distance {distance:.2f}")
                 return spot_id
             else:
-                print(f"Spot {spot_id} is occupied or not on level {level}. Continuing search.")
-        print(f"No available spots found using Priority Queue for level {level}.")
+                logger.debug(f"Spot {spot_id} is occupied or not on level {level}. Continuing search.")
+        logger.debug(f"No available spots found using Priority Queue for level {level}.")
         return None
 
     def find_nearest_spot_bfs(self, level):
         # Find the nearest available spot using BFS for a specific level
         if level not in self.entry_points:
-            print(f"No entry point set for level {level}.")
+            logger.debug(f"No entry point set for level {level}.")
             return None
 
         entry_point = self.entry_points[level]
@@ -66,31 +424,31 @@ class ParkingLot:
 
         while not queue.is_empty():
             current_point = queue.dequeue()
-            print(f"BFS visiting point: {current_point} on level {level}")
+            logger.debug(f"BFS visiting point: {current_point} on level {level}")
 
-            # Check if any spot exists at the current_point and is available
-            for spot_id, coord in self.spot_coordinates.items():
-                if coord == current_point:
-                    spot = self.spots.get(spot_id)
-                    if spot and not spot.is_occupied and spot.level == level:
-                        print(f"Nearest spot (BFS) for level {level}: {spot_id} at {coord}")
-                        return spot_id
+            # Check if a spot exists at the current_point and is available
+            spot_id = self.spot_at.get((level, current_point))
+            if spot_id is not None:
+                spot = self.spots.get(spot_id)
+                if spot and not spot.is_occupied and not spot.is_reserved:
+                    logger.debug(f"Nearest spot (BFS) for level {level}: {spot_id} at {current_point}")
+                    return spot_id
 
             # Explore neighboring points
             neighbors = self.get_neighbors(current_point)
             for neighbor in neighbors:
-                if neighbor not in visited:
+                if neighbor not in visited and self.is_walkable(level, neighbor):
                     visited.add(neighbor)
                     queue.enqueue(neighbor)
-                    print(f"Adding neighbor to queue: {neighbor} on level {level}")
+                    logger.debug(f"Adding neighbor to queue: {neighbor} on level {level}")
 
-        print(f"No available spots found using BFS for level {level}.")
+        logger.debug(f"No available spots found using BFS for level {level}.")
         return None
 
     def get_neighbors(self, point):
         # Get adjacent points (up, down, left, right).
         if not isinstance(point, tuple) or len(point) != 2:
-            print(f"Invalid point format: {point}. Expected a tuple of two integers.")
+            logger.debug(f"Invalid point format: {point}. Expected a tuple of two integers.")
             return []
         x, y = point
         neighbors = [
@@ -104,10 +462,10 @@ class ParkingLot:
     def calculate_distance(self, point1, point2):
         # Calculate Euclidean distance between two points.
         if not isinstance(point1, tuple) or not isinstance(point2, tuple):
-            print(f"Invalid points format: {point1}, {point2}. Expected tuples of two integers.")
+            logger.debug(f"Invalid points format: {point1}, {point2}. Expected tuples of two integers.")
             return float('inf')
         x1, y1 = point1
         x2, y2 = point2
         distance = math.hypot(x2 - x1, y2 - y1)
-        print(f"Calculated distance between {point1} and {point2}: {distance:.2f}")
+        logger.debug(f"Calculated distance between {point1} and {point2}: {distance:.2f}")
         return distance
@@ -0,0 +1,335 @@
+import bisect
+import hashlib
+import multiprocessing
+import threading
+import time
+from .lotmanager import ParkingLotManager
+from .lot_pins import LotPins
+from . import metrics
+from . import memory
+
+
+class ConsistentHashRing:
+    """
+    Maps lot names onto shard indices. Each shard owns many virtual points on the
+    ring so lots spread evenly and only ~1/N of them move when a shard is added.
+    """
+
+    def __init__(self, num_shards, replicas=64):
+        self.num_shards = num_shards
+        self._points = []
+        self._owners = []
+        ring = sorted(
+            (self._hash(f"shard-{shard}:{replica}"), shard)
+            for shard in range(num_shards)
+            for replica in range(replicas)
+        )
+        for point, shard in ring:
+            self._points.append(point)
+            self._owners.append(shard)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def get_shard(self, key):
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+GATE_RESULTS_POLL_SECONDS = 0.005  # Router-side poll interval while waiting for gate results
+
+
+def _shard_main(conn, manager_options):
+    # Shard worker loop: own a ParkingLotManager and answer requests from the router pipe.
+    manager = ParkingLotManager(**manager_options)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        op, lot_name, name, args, kwargs = message
+        try:
+            if op == "manager":
+                result = getattr(manager, name)(*args, **kwargs)
+            else:
+                with LotPins():
+                    simulation = manager.get_parking_lot(lot_name)
+                    if simulation is None:
+                        raise ValueError(f"Parking lot '{lot_name}' not found.")
+                    target = simulation.system if op == "system" else simulation
+                    result = getattr(target, name)
+                    if callable(result):
+                        result = result(*args, **kwargs)
+            conn.send((True, result))
+        except Exception as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                # The exception (or something it holds) does not pickle; send its text instead.
+                conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+
+class _Shard:
+    def __init__(self, context, index, manager_options):
+        self.index = index
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_shard_main,
+            args=(child_conn, manager_options),
+            name=f"spoton-shard-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()  # One request/response exchange on the pipe at a time
+
+    def send(self, message):
+        self.conn.send(message)
+
+    def receive(self):
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def call(self, message):
+        with self.lock:
+            self.send(message)
+            return self.receive()
+
+
+class ShardedParkingLotManager:
+    """
+    ParkingLotManager front end that partitions lots across worker processes by a
+    consistent hash of the lot name. Park, remove and status calls are forwarded
+    to the owning shard over a local pipe; aggregate queries fan out to all shards
+    in parallel. Everything runs on one machine. memory_limit_bytes is split evenly
+    between the shards.
+    """
+
+    def __init__(self, num_shards, shared_state_dir=None, allocation_backend="heap", memory_limit_bytes=None,
+                 idle_seconds=300, spill_dir=None, gate_queue_depth=10000, gate_batch_size=256):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1.")
+        context = multiprocessing.get_context("spawn")
+        self.ring = ConsistentHashRing(num_shards)
+        manager_options = {
+            "shared_state_dir": shared_state_dir,
+            "allocation_backend": allocation_backend,
+            "memory_limit_bytes": None if memory_limit_bytes is None else memory_limit_bytes // num_shards,
+            "idle_seconds": idle_seconds,
+            "spill_dir": spill_dir,
+            "gate_queue_depth": gate_queue_depth,
+            "gate_batch_size": gate_batch_size,
+        }
+        self.shards = [_Shard(context, index, manager_options) for index in range(num_shards)]
+        self.lot_shards = {}  # lot_name to shard index, in registration order
+
+    def _shard_for(self, lot_name):
+        return self.shards[self.ring.get_shard(lot_name)]
+
+    def _call(self, lot_name, op, name, *args, **kwargs):
+        return self._shard_for(lot_name).call((op, lot_name, name, args, kwargs))
+
+    def _fan_out(self, name, *args, **kwargs):
+        # Send the request to every shard before reading any reply so shards work in parallel.
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            for shard in self.shards:
+                shard.send(("manager", None, name, args, kwargs))
+            return [shard.receive() for shard in self.shards]
+        finally:
+            for shard in self.shards:
+                shard.lock.release()
+
+    def add_parking_lot(self, lot_name, num_levels, is_multi_level, address, layout_path=None):
+        if lot_name in self.lot_shards:
+            raise ValueError(f"Parking lot '{lot_name}' already exists.")
+        self._call(lot_name, "manager", "add_parking_lot", lot_name, num_levels, is_multi_level, address, layout_path)
+        self.lot_shards[lot_name] = self.ring.get_shard(lot_name)
+
+    def has_parking_lot(self, lot_name):
+        return lot_name in self.lot_shards
+
+    def get_parking_lot(self, lot_name):
+        if lot_name not in self.lot_shards:
+            return None
+        return RemoteParkingLot(self, lot_name)
+
+    def get_lot_summaries(self):
+        summaries = {}
+        for shard_summaries in self._fan_out("get_lot_summaries"):
+            for summary in shard_summaries:
+                summaries[summary["lot_name"]] = summary
+        return [summaries[lot_name] for lot_name in self.lot_shards if lot_name in summaries]
+
+    def collect_metrics(self):
+        # Shards count their own lots; this process only sees request latency.
+        return metrics.merge_collections([metrics.REGISTRY.collect()] + self._fan_out("collect_metrics"))
+
+    def memory_report(self, lot_names=None, top=0):
+        # This process only holds the router; every lot lives in a shard.
+        report = {"processes": [memory.process_memory(top)], "lots": []}
+        for shard_report in self._fan_out("memory_report", lot_names, top):
+            report["processes"].extend(shard_report["processes"])
+            report["lots"].extend(shard_report["lots"])
+        order = {lot_name: index for index, lot_name in enumerate(self.lot_shards)}
+        report["lots"].sort(key=lambda lot: order.get(lot["lot_name"], len(order)))
+        return report
+
+    def start_simulation(self, lot_name, duration_seconds, update_interval):
+        if lot_name not in self.lot_shards:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        self._call(lot_name, "manager", "start_simulation", lot_name, duration_seconds, update_interval)
+
+    def stop_simulation(self, lot_name):
+        if lot_name not in self.lot_shards:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        self._call(lot_name, "manager", "stop_simulation", lot_name)
+
+    def is_simulation_running(self, lot_name):
+        if lot_name not in self.lot_shards:
+            return False
+        return self._call(lot_name, "manager", "is_simulation_running", lot_name)
+
+    def submit_gate_commands(self, lot_name, commands):
+        if lot_name not in self.lot_shards:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        return self._call(lot_name, "manager", "submit_gate_commands", lot_name, list(commands))
+
+    def get_gate_results(self, lot_name, tickets, timeout=0):
+        # Waiting happens here, polling the shard, so a long wait never holds the shard's pipe.
+        if lot_name not in self.lot_shards:
+            raise ValueError(f"Parking lot '{lot_name}' not found.")
+        deadline = time.monotonic() + timeout
+        while True:
+            results = self._call(lot_name, "manager", "get_gate_results", lot_name, tickets)
+            if all(result["status"] != "pending" for result in results) or time.monotonic() >= deadline:
+                return results
+            time.sleep(GATE_RESULTS_POLL_SECONDS)
+
+    def close(self):
+        # Ask every shard to exit and wait for the processes.
+        for shard in self.shards:
+            with shard.lock:
+                try:
+                    shard.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for shard in self.shards:
+            shard.process.join(timeout=5)
+            shard.conn.close()
+
+
+class RemoteParkingLot:
+    """Stand-in for a ParkingSimulation that lives in a shard process."""
+
+    def __init__(self, manager, lot_name):
+        self.manager = manager
+        self.lot_name = lot_name
+        self.system = _RemoteSystem(manager, lot_name)
+
+    def _call(self, name, *args, **kwargs):
+        return self.manager._call(self.lot_name, "simulation", name, *args, **kwargs)
+
+    @property
+    def num_levels(self):
+        return self._call("num_levels")
+
+    @property
+    def is_multi_level(self):
+        return self._call("is_multi_level")
+
+    @property
+    def address(self):
+        return self._call("address")
+
+    @property
+    def total_spots(self):
+        return self._call("total_spots")
+
+    @property
+    def is_simulation_running(self):
+        return self._call("is_simulation_running")
+
+    def initialize_parking_lot(self):
+        return self._call("initialize_parking_lot")
+
+    def get_current_status(self):
+        return self._call("get_current_status")
+
+    def get_parking_grid(self, lot_name, level):
+        return self._call("get_parking_grid", lot_name, level)
+
+    def render_status(self):
+        return self._call("render_status")
+
+    def render_parking_grid(self, lot_name, level):
+        return self._call("render_parking_grid", lot_name, level)
+
+    # Generators cannot cross the shard pipe; the shard's cached body is sent as one chunk.
+    def iter_status_json(self):
+        yield self.render_status()
+
+    def iter_parking_grid_json(self, lot_name, level):
+        body = self.render_parking_grid(lot_name, level)
+        if body is not None:
+            yield body
+
+    def rotate_entry_point(self, level, entry_point=None):
+        return self._call("rotate_entry_point", level, entry_point)
+
+    def get_tiles(self, level, zoom, viewport=None):
+        return self._call("get_tiles", level, zoom, viewport)
+
+    def get_free_spots_by_distance(self, level, min_distance=None, max_distance=None):
+        return self._call("get_free_spots_by_distance", level, min_distance, max_distance)
+
+    def get_parking_grid_area(self, lot_name, level, x0, y0, x1, y1):
+        return self._call("get_parking_grid_area", lot_name, level, x0, y0, x1, y1)
+
+    def get_occupancy_history(self, start=None, end=None, resolution=None):
+        return self._call("get_occupancy_history", start, end, resolution)
+
+    def forecast(self, **kwargs):
+        return self._call("forecast", **kwargs)
+
+    def start_simulation(self, **kwargs):
+        return self._call("start_simulation", **kwargs)
+
+    def stop_simulation(self):
+        return self._call("stop_simulation")
+
+
+class _RemoteSystem:
+    """Stand-in for the SpotOnSystem of a lot that lives in a shard process."""
+
+    def __init__(self, manager, lot_name):
+        self.manager = manager
+        self.lot_name = lot_name
+
+    def _call(self, name, *args, **kwargs):
+        return self.manager._call(self.lot_name, "system", name, *args, **kwargs)
+
+    def park_vehicle(self, vehicle_id, preferred_level=0):
+        return self._call("park_vehicle", vehicle_id, preferred_level)
+
+    def remove_vehicle(self, vehicle_id):
+        return self._call("remove_vehicle", vehicle_id)
+
+    def reserve_spot(self, vehicle_id, preferred_level=0, ttl_seconds=300):
+        return self._call("reserve_spot", vehicle_id, preferred_level, ttl_seconds)
+
+    def cancel_reservation(self, vehicle_id):
+        return self._call("cancel_reservation", vehicle_id)
+
+    def get_vehicle_location(self, vehicle_id):
+        return self._call("get_vehicle_location", vehicle_id)
+
+    def get_total_occupied_spots(self):
+        return self._call("get_total_occupied_spots")
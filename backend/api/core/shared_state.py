@@ -0,0 +1,225 @@
+import mmap
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; shared lot state is only available on POSIX hosts.
+    fcntl = None
+
+_MAGIC = b"SPOTON02"
+# magic, layout generation, state version, total spots, occupied spots
+_HEADER = struct.Struct("<8sQQQQ")
+# Change log entry: the state version a spot write produced and the spot's index
+_CHANGE = struct.Struct("<QI")
+CHANGE_LOG_ENTRIES = 1024  # Writes a worker may fall behind by and still catch up spot by spot
+_CHANGE_LOG_BYTES = CHANGE_LOG_ENTRIES * _CHANGE.size
+VEHICLE_ID_BYTES = 32
+
+
+class SharedLotState:
+    """
+    Occupancy of a single parking lot kept in a memory-mapped file, so that every
+    server worker process sees the same spots as taken or free.
+
+    The file holds a fixed header, a ring of the most recent spot writes, one
+    occupancy bit per spot and a fixed-width vehicle id per spot. Spots are
+    addressed by their position in the lot's ``spots`` dictionary. Writers hold an
+    exclusive ``flock`` on the file; the header counters can be read by any process
+    without locking or copying, and a worker that fell behind reads back only the
+    spots written since, from the ring.
+    """
+
+    def __init__(self, path, spot_ids):
+        if fcntl is None:
+            raise RuntimeError("Shared lot state requires a POSIX platform with fcntl.")
+        self.path = path
+        self.spot_ids = []
+        self.spot_index = {}
+        self.created = False
+        self._mutex = threading.RLock()
+        self._lock_depth = 0
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._map = None
+        self._old_maps = []  # Replaced maps, kept open for readers that still hold them
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(self._fd).st_size
+            if size < _HEADER.size or os.pread(self._fd, len(_MAGIC), 0) != _MAGIC:
+                # First process to attach owns the region and writes an empty header.
+                self.created = True
+                os.ftruncate(self._fd, self._region_size(len(spot_ids)))
+                self._remap()
+                _HEADER.pack_into(self._map, 0, _MAGIC, 0, 0, len(spot_ids), 0)
+            else:
+                self._remap()
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.bind(spot_ids)
+
+    @classmethod
+    def for_lot(cls, directory, lot_name, spot_ids):
+        # Attach to (or create) the region backing the given lot inside directory.
+        os.makedirs(directory, exist_ok=True)
+        file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", lot_name) + ".lot"
+        return cls(os.path.join(directory, file_name), spot_ids)
+
+    @staticmethod
+    def _region_size(total_spots):
+        return _HEADER.size + _CHANGE_LOG_BYTES + (total_spots + 7) // 8 + total_spots * VEHICLE_ID_BYTES
+
+    def _remap(self):
+        # Map the whole file; called whenever another process has grown it. Unlocked header
+        # reads may still be using the old map, so it stays open until close(). Both map the
+        # same file, so its header is as current as the new one's; the file only grows when
+        # a lot is re-initialized with more spots, so few maps pile up.
+        if self._map is not None:
+            self._old_maps.append(self._map)
+        self._map = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+
+    def _header(self):
+        return _HEADER.unpack_from(self._map, 0)
+
+    @property
+    def generation(self):
+        return self._header()[1]
+
+    @property
+    def version(self):
+        return self._header()[2]
+
+    @property
+    def total_spots(self):
+        return self._header()[3]
+
+    @property
+    def occupied_spots(self):
+        return self._header()[4]
+
+    def bind(self, spot_ids):
+        # Set the local spot order used to address bits and vehicle slots.
+        self.spot_ids = list(spot_ids)
+        self.spot_index = {spot_id: index for index, spot_id in enumerate(self.spot_ids)}
+
+    @contextmanager
+    def lock(self):
+        """Hold the cross-process write lock. Re-entrant within one process."""
+        with self._mutex:
+            if self._lock_depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                if os.fstat(self._fd).st_size != len(self._map):
+                    self._remap()
+            self._lock_depth += 1
+            try:
+                yield self
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _write_header(self, generation, version, total, occupied):
+        _HEADER.pack_into(self._map, 0, _MAGIC, generation, version, total, occupied)
+
+    def reset(self, generation, spot_ids):
+        """Start a new layout generation with every spot free. Caller must hold the lock."""
+        self.bind(spot_ids)
+        total = len(self.spot_ids)
+        size = self._region_size(total)
+        if size > len(self._map):
+            # Never shrink: other workers may still have the larger region mapped.
+            os.ftruncate(self._fd, size)
+            self._remap()
+        start = _HEADER.size
+        self._map[start:start + size - _HEADER.size] = bytes(size - _HEADER.size)
+        self._write_header(generation, self.version + 1, total, 0)
+
+    def set_spot(self, spot_id, vehicle_id):
+        """
+        Mark a spot as occupied by vehicle_id, or free it when vehicle_id is None.
+        Caller must hold the lock. Returns False for unknown spots.
+        """
+        index = self.spot_index.get(spot_id)
+        if index is None:
+            return False
+        magic, generation, version, total, occupied = self._header()
+        byte_offset, mask, slot = self._spot_offsets(index, total)
+        was_occupied = bool(self._map[byte_offset] & mask)
+
+        if vehicle_id is None:
+            self._map[byte_offset] &= ~mask & 0xFF
+            self._map[slot:slot + VEHICLE_ID_BYTES] = bytes(VEHICLE_ID_BYTES)
+            occupied -= was_occupied
+        else:
+            encoded = vehicle_id.encode("utf-8")
+            if len(encoded) > VEHICLE_ID_BYTES:
+                raise ValueError(f"Vehicle ID '{vehicle_id}' exceeds {VEHICLE_ID_BYTES} bytes.")
+            self._map[byte_offset] |= mask
+            self._map[slot:slot + VEHICLE_ID_BYTES] = encoded.ljust(VEHICLE_ID_BYTES, b"\0")
+            occupied += not was_occupied
+        log_offset = _HEADER.size + (version + 1) % CHANGE_LOG_ENTRIES * _CHANGE.size
+        _CHANGE.pack_into(self._map, log_offset, version + 1, index)
+        self._write_header(generation, version + 1, total, occupied)
+        return True
+
+    @staticmethod
+    def _spot_offsets(index, total):
+        # (occupancy byte offset, bit mask, vehicle id slot offset) of the spot at index
+        bitmap_start = _HEADER.size + _CHANGE_LOG_BYTES
+        slot = bitmap_start + (total + 7) // 8 + index * VEHICLE_ID_BYTES
+        return bitmap_start + index // 8, 1 << (index % 8), slot
+
+    def changed_since(self, version):
+        """
+        Indexes of the spots written after state version, oldest first, or None when the ring
+        no longer covers them all (too far behind, or the region was reset). Caller must hold the lock.
+        """
+        current = self.version
+        if not version <= current <= version + CHANGE_LOG_ENTRIES:
+            return None
+        indexes = []
+        for logged in range(version + 1, current + 1):
+            logged_version, index = _CHANGE.unpack_from(
+                self._map, _HEADER.size + logged % CHANGE_LOG_ENTRIES * _CHANGE.size
+            )
+            if logged_version != logged:
+                return None  # That version came from a reset, not a spot write
+            indexes.append(index)
+        return indexes
+
+    def read_spot(self, index):
+        """Vehicle id parked in the spot at index, or None. Caller must hold the lock."""
+        byte_offset, mask, slot = self._spot_offsets(index, self.total_spots)
+        if not self._map[byte_offset] & mask:
+            return None
+        return bytes(self._map[slot:slot + VEHICLE_ID_BYTES]).rstrip(b"\0").decode("utf-8")
+
+    def read_occupancy(self):
+        """Return the vehicle id (or None) for every bound spot, in spot order."""
+        total = self.total_spots
+        bitmap_start = _HEADER.size + _CHANGE_LOG_BYTES
+        slots_start = bitmap_start + (total + 7) // 8
+        view = memoryview(self._map)
+        try:
+            occupancy = []
+            for index in range(min(total, len(self.spot_ids))):
+                if view[bitmap_start + index // 8] & (1 << (index % 8)):
+                    slot = slots_start + index * VEHICLE_ID_BYTES
+                    occupancy.append(bytes(view[slot:slot + VEHICLE_ID_BYTES]).rstrip(b"\0").decode("utf-8"))
+                else:
+                    occupancy.append(None)
+            return occupancy
+        finally:
+            view.release()
+
+    def close(self):
+        for old_map in self._old_maps:
+            old_map.close()
+        self._old_maps = []
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        os.close(self._fd)
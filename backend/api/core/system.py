@@ -1,12 +1,68 @@
 from .parking import ParkingLot
 from .models import ParkingSpot
 from .manual_bfs_queue import ManualBFSQueue  # Importing ManualBFSQueue
+from .timer_wheel import HierarchicalTimerWheel
+from . import metrics
+from contextlib import contextmanager
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# State versions are unique across every lot in the process, so a rebuilt lot never reuses one
+_state_versions = itertools.count(1)
+
+# How distance-ordered (single-level) lots find the nearest free spot: "heap" pops the shared
+# availability heap, "bitmap" scans a per-level occupancy bitmap for its first free bit
+ALLOCATION_BACKENDS = ("heap", "bitmap")
+
+# Reservation holds expire on a timer wheel of one-second ticks, which reaches about 194 days
+RESERVATION_TICK_SECONDS = 1.0
+MAX_RESERVATION_SECONDS = HierarchicalTimerWheel(tick_seconds=RESERVATION_TICK_SECONDS).max_delay_seconds
 
 class SpotOnSystem:
-    def __init__(self, is_multi_level=False):
-        self.parking_lot = ParkingLot(is_multi_level=is_multi_level)
-        self.vehicle_to_spot = {}
+    # Spots are handled by their integer handle inside the system (searches, allocate_spot,
+    # release_spot, vehicle_to_spot, reservations). Methods that callers outside the core use,
+    # like park_vehicle, reserve_spot and get_vehicle_location, take and return external spot IDs.
+
+    def __init__(self, is_multi_level=False, clock=time.monotonic, lot_name="", allocation_backend="heap"):
+        if allocation_backend not in ALLOCATION_BACKENDS:
+            raise ValueError(f"allocation_backend must be one of {ALLOCATION_BACKENDS}.")
+        self.allocation_backend = allocation_backend
+        # The bitmap backend never searches the availability heap, so the lot does not keep one
+        self.parking_lot = ParkingLot(is_multi_level=is_multi_level, keeps_heap=allocation_backend != "bitmap")
+        self.lot_name = lot_name  # Label for this lot's metrics
+        self.clock = clock
+        # Held by every write and by replace_parking_lot, never while a layout is built;
+        # reads take no lock and work on whichever ParkingLot they picked up first
+        self.write_lock = threading.RLock()
+        self.parking_lot.write_lock = self.write_lock
+        self.reservations = {}  # vehicle_id to reserved spot handle
+        self.reservation_wheel = HierarchicalTimerWheel(tick_seconds=RESERVATION_TICK_SECONDS, start_time=clock())
         self.simulation = None  # Reference to ParkingSimulation
+        self.shared_state = None  # SharedLotState when occupancy is shared across worker processes
+        self.shared_generation = None  # Layout generation last synced from shared_state
+        self.shared_version = None  # State version last synced from shared_state
+        self.state_version = next(_state_versions)  # Changes whenever anything a status read returns changes
+
+    @property
+    def vehicle_to_spot(self):
+        # vehicle_id to spot handle; lives on the ParkingLot so a rebuilt lot starts without vehicles
+        return self.parking_lot.vehicle_to_spot
+
+    def replace_parking_lot(self, parking_lot):
+        # Swap in a lot built off to the side. Readers see the old lot or the new one, never a
+        # mix; holds on the old lot are dropped with it.
+        with self.write_lock:
+            parking_lot.write_lock = self.write_lock
+            self.parking_lot = parking_lot
+            self.reservations = {}
+            self.reservation_wheel = HierarchicalTimerWheel(
+                tick_seconds=RESERVATION_TICK_SECONDS, start_time=self.clock()
+            )
+        self.mark_state_changed()
 
     def initialize_parking_lot(self, spots_config):
         for spot_id, level, distance, coordinate in spots_config:
@@ -17,58 +73,311 @@ class SpotOnSystem:
             spot.is_occupied = False
             spot.vehicle_id = None
         self.vehicle_to_spot.clear()
+        self.clear_reservations()
+        self.parking_lot.recount_occupancy()
+        self.mark_state_changed()
+
+    def attach_shared_state(self, shared_state):
+        # Share occupancy with other worker processes through a SharedLotState region.
+        # The process that created the region publishes its state; later ones adopt it.
+        self.shared_state = shared_state
+        with shared_state.lock():
+            if shared_state.created:
+                shared_state.reset(shared_state.generation, self.parking_lot.spots.keys())
+                for spot_id, spot in self.parking_lot.spots.items():
+                    if spot.is_occupied:
+                        shared_state.set_spot(spot_id, spot.vehicle_id)
+                self.shared_generation = shared_state.generation
+                self.shared_version = shared_state.version
+            else:
+                self.sync_shared_state()
+
+    @contextmanager
+    def shared_transaction(self):
+        # Hold the write lock and, when shared, the cross-process lock, starting from the latest shared state.
+        with self.write_lock:
+            if self.shared_state is None:
+                yield
+                return
+            with self.shared_state.lock():
+                self.sync_shared_state()
+                yield
+
+    def sync_shared_state(self):
+        # Adopt changes other workers made to the shared region since our last sync: spot by spot
+        # from the region's change log, or by reading every spot back when the log does not reach.
+        shared_state = self.shared_state
+        if shared_state is None or shared_state.version == self.shared_version:
+            return
+        with self.write_lock, shared_state.lock():  # Same order as shared_transaction
+            if shared_state.version == self.shared_version:
+                return  # Another thread synced while we waited
+            generation = shared_state.generation
+            changed = None
+            if generation == self.shared_generation:
+                changed = shared_state.changed_since(self.shared_version)
+            if changed is None:
+                self._reload_shared_state(generation)
+            else:
+                self._apply_shared_changes(changed)
+            self.mark_state_changed()
+            self.shared_generation = generation
+            self.shared_version = shared_state.version
+            if self.simulation is not None:
+                self.simulation.refresh_nearest_spots()
+
+    def _reload_shared_state(self, generation):
+        # Read every spot back from the shared region and rebuild the derived structures.
+        shared_state = self.shared_state
+        if generation != self.shared_generation and self.simulation is not None:
+            # Another worker re-initialized the lot; rebuild the same seeded layout.
+            self.simulation.build_layout(generation)
+        shared_state.bind(self.parking_lot.spots.keys())
+        if len(shared_state.spot_ids) != shared_state.total_spots:
+            raise RuntimeError(
+                f"Shared lot state has {shared_state.total_spots} spots but the local layout has "
+                f"{len(shared_state.spot_ids)}."
+            )
+
+        self.vehicle_to_spot.clear()
+        for spot_id, vehicle_id in zip(shared_state.spot_ids, shared_state.read_occupancy()):
+            spot = self.parking_lot.spots[spot_id]
+            spot.is_occupied = vehicle_id is not None
+            spot.vehicle_id = vehicle_id
+            if vehicle_id is not None:
+                self.vehicle_to_spot[vehicle_id] = spot_id
+        self.parking_lot.rebuild_available_spots()
+        self.parking_lot.recount_occupancy()
+
+    def _apply_shared_changes(self, indexes):
+        # Bring the spots other workers wrote up to date, each once, from its current shared value.
+        shared_state = self.shared_state
+        spots = self.parking_lot.spots
+        for index in dict.fromkeys(indexes):
+            spot = spots[shared_state.spot_ids[index]]
+            vehicle_id = shared_state.read_spot(index)
+            if vehicle_id == spot.vehicle_id:
+                continue
+            if spot.is_occupied:
+                # A vehicle that moved may already be mapped to its new spot
+                if self.vehicle_to_spot.get(spot.vehicle_id) == spot.id:
+                    del self.vehicle_to_spot[spot.vehicle_id]
+                spot.is_occupied = False
+                spot.vehicle_id = None
+                if not spot.is_reserved and spot.distance_from_entrance != float('inf'):
+                    self.parking_lot.push_available(spot)
+                self._count_occupancy(spot, -1)
+            if vehicle_id is not None:
+                spot.is_occupied = True
+                spot.vehicle_id = vehicle_id
+                self.vehicle_to_spot[vehicle_id] = spot.id
+                self.parking_lot.remove_available(spot)
+                self._count_occupancy(spot, 1)
+
+    def publish_shared_layout(self, generation):
+        # Start a new shared layout generation after this worker rebuilt the lot.
+        if self.shared_state is None:
+            return
+        self.shared_state.reset(generation, self.parking_lot.spots.keys())
+        self.shared_generation = generation
+        self.shared_version = self.shared_state.version
+
+    def reserve_spot(self, vehicle_id, preferred_level=0, ttl_seconds=300):
+        # Hold the spot park_vehicle would pick for this vehicle. The spot is hidden from
+        # searches until the vehicle parks, the hold is cancelled or ttl_seconds pass.
+        with self.shared_transaction():
+            if vehicle_id in self.vehicle_to_spot or vehicle_id in self.reservations:
+                return None  # Vehicle already parked or holding a spot
+
+            spot_id = self.find_nearest_spot(preferred_level)
+            spot = self.parking_lot.spots.get(spot_id) if spot_id else None
+            if not spot:
+                return None
+            # Scheduled first: a ttl the wheel rejects raises before the spot is held
+            self.reservation_wheel.schedule(vehicle_id, ttl_seconds)
+            self.parking_lot.remove_available(spot)
+            spot.is_reserved = True
+            spot.reserved_for = vehicle_id
+            self.reservations[vehicle_id] = spot_id
+            self.parking_lot.update_spot_indexes(spot)
+            self.mark_state_changed()
+            logger.debug(f"Spot {spot_id} reserved for vehicle {vehicle_id} for {ttl_seconds} seconds.")
+            return self.parking_lot.external_id(spot_id)
+
+    def cancel_reservation(self, vehicle_id):
+        # Give a held spot back before its hold expires.
+        with self.write_lock:
+            if vehicle_id not in self.reservations:
+                return False
+            self.reservation_wheel.cancel(vehicle_id)
+            self._release_reservation(vehicle_id)
+            return True
+
+    def expire_reservations(self):
+        # Turn the timer wheel to now and return expired holds to the available spots.
+        with self.write_lock:
+            for vehicle_id in self.reservation_wheel.advance(self.clock()):
+                logger.debug(f"Reservation for vehicle {vehicle_id} expired.")
+                self._release_reservation(vehicle_id)
+
+    def clear_reservations(self):
+        # Drop every hold, e.g. when the lot layout is rebuilt.
+        for vehicle_id in list(self.reservations):
+            self.cancel_reservation(vehicle_id)
+
+    def _release_reservation(self, vehicle_id):
+        spot_id = self.reservations.pop(vehicle_id)
+        spot = self.parking_lot.spots.get(spot_id)
+        if spot and spot.is_reserved:
+            spot.is_reserved = False
+            spot.reserved_for = None
+            if not spot.is_occupied and spot.distance_from_entrance != float('inf'):
+                self.parking_lot.push_available(spot)
+            self.parking_lot.update_spot_indexes(spot)
+            self.mark_state_changed()
+        return spot_id
 
     def park_vehicle(self, vehicle_id, preferred_level=0):
-        if vehicle_id in self.vehicle_to_spot:
-            return None  # Vehicle already parked
+        with self.shared_transaction():
+            if vehicle_id in self.vehicle_to_spot:
+                return None  # Vehicle already parked
 
-        spot_id = self.find_nearest_spot(preferred_level)
-        if spot_id and self.allocate_spot(vehicle_id, spot_id):
-            self.vehicle_to_spot[vehicle_id] = spot_id
-            return spot_id
-        return None
+            self.expire_reservations()
+            if vehicle_id in self.reservations:
+                # Park in the held spot; it goes back on the heap so allocate_spot can take it
+                self.reservation_wheel.cancel(vehicle_id)
+                spot_id = self._release_reservation(vehicle_id)
+            else:
+                spot_id = self.find_nearest_spot(preferred_level)
+                if not spot_id:
+                    metrics.ALLOCATION_FAILURES.inc(self.lot_name, "no_spot")
+            if spot_id and self.allocate_spot(vehicle_id, spot_id):
+                self.vehicle_to_spot[vehicle_id] = spot_id
+                return self.parking_lot.external_id(spot_id)
+            return None
 
     def remove_vehicle(self, vehicle_id):
-        if vehicle_id not in self.vehicle_to_spot:
-            return False  # Vehicle not found
+        with self.shared_transaction():
+            if vehicle_id not in self.vehicle_to_spot:
+                return False  # Vehicle not found
 
-        spot_id = self.vehicle_to_spot[vehicle_id]
-        if self.release_spot(spot_id):
-            del self.vehicle_to_spot[vehicle_id]
-            return True
-        return False
+            spot_id = self.vehicle_to_spot[vehicle_id]
+            if self.release_spot(spot_id):
+                del self.vehicle_to_spot[vehicle_id]
+                return True
+            return False
+
+    def apply_gate_commands(self, commands):
+        # Apply many ("arrival" | "departure", vehicle_id, preferred_level) commands in order in one
+        # write transaction. Arrivals give the spot ID or None, departures True or False.
+        results = []
+        with self.shared_transaction():
+            self.expire_reservations()
+            for command, vehicle_id, preferred_level in commands:
+                if command == "arrival":
+                    results.append(self.park_vehicle(vehicle_id, preferred_level))
+                else:
+                    results.append(self.remove_vehicle(vehicle_id))
+        return results
+
+    def occupy_spots_bulk(self, assignments):
+        # Mark many (spot handle, vehicle_id) pairs occupied and rebuild the availability heap once.
+        # Used when seeding a lot; skips spots that are unknown, taken or unreachable.
+        occupied = 0
+        for spot_id, vehicle_id in assignments:
+            spot = self.parking_lot.spots.get(spot_id)
+            if spot and not spot.is_occupied and spot.distance_from_entrance != float('inf'):
+                spot.is_occupied = True
+                spot.vehicle_id = vehicle_id
+                self.vehicle_to_spot[vehicle_id] = spot_id
+                occupied += 1
+        self.parking_lot.rebuild_available_spots()
+        self.parking_lot.recount_occupancy()
+        self.mark_state_changed()
+        return occupied
+
+    def snapshot(self):
+        # The lot's spots plus parked vehicles and reservation holds with their deadlines.
+        self.expire_reservations()
+        return {
+            "parking_lot": self.parking_lot.snapshot(),
+            "vehicle_to_spot": dict(self.vehicle_to_spot),
+            "reservations": [
+                (vehicle_id, spot_id, self.reservation_wheel.deadline(vehicle_id))
+                for vehicle_id, spot_id in self.reservations.items()
+            ],
+        }
+
+    def restore(self, snapshot):
+        # Take back the state of snapshot(); holds whose deadline passed in between are dropped.
+        self.clear_reservations()
+        self.parking_lot.restore(snapshot["parking_lot"])
+        self.vehicle_to_spot.clear()
+        self.vehicle_to_spot.update(snapshot["vehicle_to_spot"])
+        now = self.clock()
+        for vehicle_id, spot_id, deadline in snapshot["reservations"]:
+            spot = self.parking_lot.spots.get(spot_id)
+            if spot is None or spot.is_occupied or deadline is None or deadline <= now:
+                continue
+            self.parking_lot.remove_available(spot)
+            spot.is_reserved = True
+            spot.reserved_for = vehicle_id
+            self.reservations[vehicle_id] = spot_id
+            self.reservation_wheel.schedule(vehicle_id, deadline - now)
+        self.mark_state_changed()
 
     def get_spot_info(self, spot_id):
-        return self.parking_lot.spots.get(spot_id)
+        return self.parking_lot.spots.get(self.parking_lot.handle_of(spot_id))
 
     def get_vehicle_location(self, vehicle_id):
-        return self.vehicle_to_spot.get(vehicle_id)
+        return self.parking_lot.external_id(self.vehicle_to_spot.get(vehicle_id))
 
-    def get_total_occupied_spots(self):
-        return len(self.vehicle_to_spot)
+    def get_total_occupied_spots(self, parking_lot=None):
+        # Readers pass the ParkingLot they are serializing so the count matches its spots.
+        if self.shared_state is not None:
+            return self.shared_state.occupied_spots  # Read straight from the shared header
+        return len((parking_lot or self.parking_lot).vehicle_to_spot)
 
     def find_nearest_spot_priority_queue(self, level):
         # Find the nearest available spot using the manual priority queue for a specific level.
         if level not in self.parking_lot.entry_points:
-            print(f"No entry point set for level {level}.")
+            logger.debug(f"No entry point set for level {level}.")
             return None
 
         temp_queue = self.parking_lot.available_spots.copy()
+        pops = 0
         while not temp_queue.is_empty():
             distance, spot_id = temp_queue.pop()
+            pops += 1
             spot = self.parking_lot.spots.get(spot_id)
-            if spot and not spot.is_occupied and spot.level == level:
-                print(f"Nearest spot (Priority Queue) for level {level}: {spot_id} at distance {distance:.2f}")
+            if spot and not spot.is_occupied and not spot.is_reserved and spot.level == level:
+                logger.debug(f"Nearest spot (Priority Queue) for level {level}: {spot_id} at distance {distance:.2f}")
+                metrics.SEARCH_COST.observe(pops, self.lot_name, "priority_queue")
                 return spot_id
             else:
-                print(f"Spot {spot_id} is occupied or not on level {level}. Continuing search.")
-        print(f"No available spots found using Priority Queue for level {level}.")
+                logger.debug(f"Spot {spot_id} is occupied or not on level {level}. Continuing search.")
+        logger.debug(f"No available spots found using Priority Queue for level {level}.")
+        metrics.SEARCH_COST.observe(pops, self.lot_name, "priority_queue")
         return None
 
+    def find_nearest_spot_bitmap(self, level):
+        # Find the nearest available spot on a level from the first free bit of its occupancy bitmap.
+        if level not in self.parking_lot.entry_points:
+            logger.debug(f"No entry point set for level {level}.")
+            return None
+
+        nearest, words_read = self.parking_lot.occupancy_bitmap(level).scan_first_free()
+        metrics.SEARCH_COST.observe(words_read, self.lot_name, "bitmap")
+        if nearest is None:
+            logger.debug(f"No available spots found using the bitmap for level {level}.")
+            return None
+        logger.debug("Nearest spot (Bitmap) for level %s: %s at distance %s", level, nearest[1], nearest[0])
+        return nearest[1]
+
     def find_nearest_spot_bfs(self, level):
         # Find the nearest available spot using BFS for a specific level.
         if level not in self.parking_lot.entry_points:
-            print(f"No entry point set for level {level}.")
+            logger.debug(f"No entry point set for level {level}.")
             return None
 
         entry_point = self.parking_lot.entry_points[level]
@@ -77,31 +386,35 @@ class SpotOnSystem:
         queue.enqueue(entry_point)
         visited.add(entry_point)
 
+        expanded = 0
         while not queue.is_empty():
             current_point = queue.dequeue()
-            # Check if any spot exists at the current_point and is available
-            for spot_id, coord in self.parking_lot.spot_coordinates.items():
-                if coord == current_point:
-                    spot = self.parking_lot.spots.get(spot_id)
-                    if spot and not spot.is_occupied and spot.level == level:
-                        print(f"Nearest spot (BFS) for level {level}: {spot_id} at {coord}")
-                        return spot_id
+            expanded += 1
+            # Check if a spot exists at the current_point and is available
+            spot_id = self.parking_lot.spot_at.get((level, current_point))
+            if spot_id is not None:
+                spot = self.parking_lot.spots.get(spot_id)
+                if spot and not spot.is_occupied and not spot.is_reserved:
+                    logger.debug(f"Nearest spot (BFS) for level {level}: {spot_id} at {current_point}")
+                    metrics.SEARCH_COST.observe(expanded, self.lot_name, "bfs")
+                    return spot_id
 
             # Explore neighboring points
             neighbors = self.get_neighbors(current_point)
             for neighbor in neighbors:
-                if neighbor not in visited:
+                if neighbor not in visited and self.parking_lot.is_walkable(level, neighbor):
                     visited.add(neighbor)
                     queue.enqueue(neighbor)
-                    print(f"Adding neighbor to queue: {neighbor} on level {level}")
+                    logger.debug(f"Adding neighbor to queue: {neighbor} on level {level}")
 
-        print(f"No available spots found using BFS for level {level}.")
+        logger.debug(f"No available spots found using BFS for level {level}.")
+        metrics.SEARCH_COST.observe(expanded, self.lot_name, "bfs")
         return None
 
     def get_neighbors(self, point):
         # Get adjacent points (up, down, left, right).
         if not isinstance(point, tuple) or len(point) != 2:
-            print(f"Invalid point format: {point}. Expected a tuple of two integers.")
+            logger.debug(f"Invalid point format: {point}. Expected a tuple of two integers.")
             return []
         x, y = point
         neighbors = [
@@ -115,55 +428,107 @@ class SpotOnSystem:
     def calculate_distance(self, point1, point2):
         # Calculate Manhattan distance between two points.
         if not isinstance(point1, tuple) or not isinstance(point2, tuple):
-            print(f"Invalid points format: {point1}, {point2}. Expected tuples of two integers.")
+            logger.debug(f"Invalid points format: {point1}, {point2}. Expected tuples of two integers.")
             return float('inf')
         x1, y1 = point1
         x2, y2 = point2
         distance = abs(x2 - x1) + abs(y2 - y1)
-        print(f"Calculated distance between {point1} and {point2}: {distance:.2f}")
+        logger.debug(f"Calculated distance between {point1} and {point2}: {distance:.2f}")
         return distance
 
     def find_nearest_spot(self, level):
         # Determine which algorithm to use based on parking lot type and find the nearest spot for a specific level.
+        self.expire_reservations()
         if self.parking_lot.is_multi_level:
             return self.find_nearest_spot_bfs(level)
+        elif self.allocation_backend == "bitmap":
+            return self.find_nearest_spot_bitmap(level)
         else:
             return self.find_nearest_spot_priority_queue(level)
 
+    def count_free_spots_within(self, level, min_distance=None, max_distance=None):
+        # Free spots on a level with min_distance <= distance from its entry point <= max_distance.
+        self.expire_reservations()
+        return self.parking_lot.distance_index(level).count_free(min_distance, max_distance)
+
+    def find_first_free_spot_from(self, level, min_distance=0):
+        # (distance, spot_id) of the nearest free spot on a level at or beyond min_distance, or None.
+        self.expire_reservations()
+        first_free = self.parking_lot.distance_index(level).first_free(min_distance)
+        if first_free is None:
+            return None
+        return first_free[0], self.parking_lot.external_id(first_free[1])
+
     def allocate_spot(self, vehicle_id, spot_id):
         # Allocate a spot to a vehicle.
-        spot = self.parking_lot.spots.get(spot_id)
-        if spot and not spot.is_occupied:
-            spot.is_occupied = True
-            spot.vehicle_id = vehicle_id
-            self.vehicle_to_spot[vehicle_id] = spot_id
-            # Remove the spot from available spots
-            success = self.parking_lot.available_spots.remove((spot.distance_from_entrance, spot_id))
-            if success:
-                print(f"Spot {spot_id} allocated to vehicle {vehicle_id}.")
-                return True
-            else:
-                print(f"Failed to remove spot {spot_id} from available spots during allocation.")
-        print(f"Failed to allocate spot {spot_id} to vehicle {vehicle_id}.")
-        return False
+        with self.shared_transaction():
+            spot = self.parking_lot.spots.get(spot_id)
+            if spot and not spot.is_occupied:
+                if self.shared_state is not None:
+                    try:
+                        self.shared_state.set_spot(spot_id, vehicle_id)
+                    except ValueError as ve:
+                        logger.debug(f"Failed to allocate spot {spot_id} to vehicle {vehicle_id}: {ve}")
+                        metrics.ALLOCATION_FAILURES.inc(self.lot_name, "rejected")
+                        return False
+                spot.is_occupied = True
+                spot.vehicle_id = vehicle_id
+                self.vehicle_to_spot[vehicle_id] = spot_id
+                # Remove the spot from available spots
+                success = self.parking_lot.remove_available(spot)
+                self._mark_shared_synced()
+                self._count_occupancy(spot, 1)
+                metrics.ALLOCATIONS.inc(self.lot_name)
+                if success:
+                    logger.debug(f"Spot {spot_id} allocated to vehicle {vehicle_id}.")
+                    return True
+                else:
+                    logger.debug(f"Failed to remove spot {spot_id} from available spots during allocation.")
+            logger.debug(f"Failed to allocate spot {spot_id} to vehicle {vehicle_id}.")
+            metrics.ALLOCATION_FAILURES.inc(self.lot_name, "taken")
+            return False
 
     def release_spot(self, spot_id):
         """
         Release a spot from a vehicle.
         """
-        spot = self.parking_lot.spots.get(spot_id)
-        if spot and spot.is_occupied:
-            vehicle_id = spot.vehicle_id
-            spot.is_occupied = False
-            spot.vehicle_id = None
-            # Removed the line that deletes vehicle_id from self.vehicle_to_spot
-            # self.vehicle_to_spot.pop(vehicle_id, None)
-            distance = spot.distance_from_entrance
-            if distance != float('inf'):
-                self.parking_lot.available_spots.push((distance, spot_id))
-                print(f"Spot {spot_id} has been released and is now available.")
-            else:
-                print(f"Spot {spot_id} has invalid distance and was not added back to available spots.")
-            return True
-        print(f"Failed to release spot {spot_id}. It may already be vacant.")
-        return False
+        with self.shared_transaction():
+            spot = self.parking_lot.spots.get(spot_id)
+            if spot and spot.is_occupied:
+                if self.shared_state is not None:
+                    self.shared_state.set_spot(spot_id, None)
+                vehicle_id = spot.vehicle_id
+                spot.is_occupied = False
+                spot.vehicle_id = None
+                # Removed the line that deletes vehicle_id from self.vehicle_to_spot
+                # self.vehicle_to_spot.pop(vehicle_id, None)
+                distance = spot.distance_from_entrance
+                if distance != float('inf'):
+                    self.parking_lot.push_available(spot)
+                    logger.debug(f"Spot {spot_id} has been released and is now available.")
+                else:
+                    logger.debug(f"Spot {spot_id} has invalid distance and was not added back to available spots.")
+                self._mark_shared_synced()
+                self._count_occupancy(spot, -1)
+                metrics.RELEASES.inc(self.lot_name)
+                return True
+            logger.debug(f"Failed to release spot {spot_id}. It may already be vacant.")
+            return False
+
+    def _count_occupancy(self, spot, delta):
+        occupied_by_level = self.parking_lot.occupied_by_level
+        occupied_by_level[spot.level] = occupied_by_level.get(spot.level, 0) + delta
+        self.parking_lot.update_tile_counts(spot, delta)
+        self.parking_lot.update_spot_indexes(spot)
+        self.mark_state_changed()
+
+    def mark_state_changed(self):
+        # Invalidate rendered status for this lot and record the per-level counts in the history.
+        self.state_version = next(_state_versions)
+        if self.simulation is not None:
+            self.simulation.record_occupancy()
+
+    def _mark_shared_synced(self):
+        # Our own write is already applied locally, so skip re-reading it on the next sync.
+        if self.shared_state is not None:
+            self.shared_version = self.shared_state.version
@@ -0,0 +1,80 @@
+import math
+
+FINEST_SHIFT = 2  # Finest tiles are 2**2 = 4 cells a side; finer detail comes from the spot grid itself
+
+
+class TilePyramid:
+    """
+    Spot and occupied counts for square tiles over one level, at every zoom.
+    Zoom 0 is a single tile over the whole level and each zoom splits every
+    tile into four. Only tiles that contain spots are stored. Changing one spot
+    touches one tile per zoom, and listing a zoom costs O(tiles at that zoom).
+    """
+
+    def __init__(self, origin, max_zoom):
+        self.origin = origin
+        self.max_zoom = max_zoom
+        self.zooms = [{} for _ in range(max_zoom + 1)]  # (tile_x, tile_y) to [spots, occupied]
+
+    @classmethod
+    def build(cls, cells):
+        """Build from (x, y, is_occupied) for every spot on the level."""
+        cells = list(cells)
+        if not cells:
+            return cls((0, 0), 0)
+        min_x = min(x for x, _, _ in cells)
+        min_y = min(y for _, y, _ in cells)
+        extent = max(max(x for x, _, _ in cells) - min_x, max(y for _, y, _ in cells) - min_y) + 1
+        max_zoom = max(0, math.ceil(math.log2(extent)) - FINEST_SHIFT)
+        pyramid = cls((min_x, min_y), max_zoom)
+
+        # Count the finest tiles spot by spot, then sum each coarser zoom from the one below it
+        shift = FINEST_SHIFT
+        finest = pyramid.zooms[max_zoom]
+        for x, y, is_occupied in cells:
+            key = ((x - min_x) >> shift, (y - min_y) >> shift)
+            counts = finest.get(key)
+            if counts is None:
+                counts = finest[key] = [0, 0]
+            counts[0] += 1
+            counts[1] += is_occupied
+        for zoom in range(max_zoom - 1, -1, -1):
+            coarser = pyramid.zooms[zoom]
+            for (tile_x, tile_y), (spots, occupied) in pyramid.zooms[zoom + 1].items():
+                key = (tile_x >> 1, tile_y >> 1)
+                counts = coarser.get(key)
+                if counts is None:
+                    counts = coarser[key] = [0, 0]
+                counts[0] += spots
+                counts[1] += occupied
+        return pyramid
+
+    def tile_size(self, zoom):
+        """Side of a tile at zoom, in grid cells."""
+        return 1 << (FINEST_SHIFT + self.max_zoom - zoom)
+
+    def update(self, x, y, delta):
+        # A spot at (x, y) became occupied (delta 1) or free (delta -1).
+        tile_x = (x - self.origin[0]) >> FINEST_SHIFT
+        tile_y = (y - self.origin[1]) >> FINEST_SHIFT
+        for zoom in range(self.max_zoom, -1, -1):
+            counts = self.zooms[zoom].get((tile_x, tile_y))
+            if counts is None:
+                return  # Spot is not part of this pyramid
+            counts[1] += delta
+            tile_x >>= 1
+            tile_y >>= 1
+
+    def tiles(self, zoom, viewport=None):
+        """[(tile_x, tile_y, spots, occupied)] at zoom, optionally only tiles inside (x0, y0, x1, y1) tile coordinates."""
+        if not 0 <= zoom <= self.max_zoom:
+            raise ValueError(f"zoom must be between 0 and {self.max_zoom}.")
+        items = self.zooms[zoom].items()
+        if viewport is None:
+            return [(tile_x, tile_y, spots, occupied) for (tile_x, tile_y), (spots, occupied) in items]
+        x0, y0, x1, y1 = viewport
+        return [
+            (tile_x, tile_y, spots, occupied)
+            for (tile_x, tile_y), (spots, occupied) in items
+            if x0 <= tile_x <= x1 and y0 <= tile_y <= y1
+        ]
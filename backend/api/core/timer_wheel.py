@@ -0,0 +1,103 @@
+import math
+
+
+class HierarchicalTimerWheel:
+    """
+    Hierarchical timing wheel for expiring many timers cheaply.
+
+    Level 0 has one slot per tick; every higher level has slots that each span a
+    whole turn of the level below. Timers far in the future sit in a coarse slot
+    and cascade down as the wheel turns, so scheduling, cancelling and each tick
+    cost O(1) no matter how many timers are pending.
+    """
+
+    def __init__(self, tick_seconds=1.0, slots_per_level=64, num_levels=4, start_time=0.0):
+        self.tick_seconds = tick_seconds
+        self.slots_per_level = slots_per_level
+        self.num_levels = num_levels
+        self.start_time = start_time
+        self.current_tick = 0
+        self.wheels = [[set() for _ in range(slots_per_level)] for _ in range(num_levels)]
+        self.timers = {}  # key to (expiry_tick, level, slot)
+
+    @property
+    def max_ticks(self):
+        return self.slots_per_level ** self.num_levels - 1
+
+    @property
+    def max_delay_seconds(self):
+        # Longest delay schedule accepts
+        return self.max_ticks * self.tick_seconds
+
+    def __len__(self):
+        return len(self.timers)
+
+    def _place(self, key, expiry_tick):
+        # Put a timer in the finest level whose span still reaches its expiry.
+        delta = max(expiry_tick - self.current_tick, 0)
+        span = self.slots_per_level
+        for level in range(self.num_levels):
+            if delta < span or level == self.num_levels - 1:
+                slot = (expiry_tick // (span // self.slots_per_level)) % self.slots_per_level
+                self.wheels[level][slot].add(key)
+                self.timers[key] = (expiry_tick, level, slot)
+                return
+            span *= self.slots_per_level
+
+    def schedule(self, key, delay_seconds):
+        """Fire key after delay_seconds, replacing any timer already scheduled for it."""
+        if not math.isfinite(delay_seconds):
+            raise ValueError(f"Delay of {delay_seconds} seconds is not a finite number.")
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        if ticks > self.max_ticks:
+            raise ValueError(f"Delay of {delay_seconds} seconds exceeds the wheel range.")
+        self.cancel(key)
+        self._place(key, self.current_tick + ticks)
+
+    def cancel(self, key):
+        """Remove a pending timer. Returns False if key had none."""
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+        _, level, slot = timer
+        self.wheels[level][slot].discard(key)
+        return True
+
+    def deadline(self, key):
+        """Time at which key's timer fires, or None if it has none."""
+        timer = self.timers.get(key)
+        if timer is None:
+            return None
+        return self.start_time + timer[0] * self.tick_seconds
+
+    def advance(self, now):
+        """Turn the wheel up to time now and return the keys whose timers expired."""
+        target_tick = int((now - self.start_time) / self.tick_seconds)
+        expired = []
+        while self.current_tick < target_tick:
+            if not self.timers:
+                self.current_tick = target_tick  # Nothing pending; skip the idle ticks
+                break
+            self.current_tick += 1
+            self._cascade()
+            bucket = self.wheels[0][self.current_tick % self.slots_per_level]
+            if bucket:
+                for key in bucket:
+                    del self.timers[key]
+                expired.extend(bucket)
+                bucket.clear()
+        return expired
+
+    def _cascade(self):
+        # When a level completes a turn, move the next coarse slot's timers down a level.
+        span = self.slots_per_level
+        for level in range(1, self.num_levels):
+            if self.current_tick % span:
+                return
+            slot = (self.current_tick // span) % self.slots_per_level
+            bucket = self.wheels[level][slot]
+            moved = list(bucket)
+            bucket.clear()
+            for key in moved:
+                self._place(key, self.timers[key][0])
+            span *= self.slots_per_level
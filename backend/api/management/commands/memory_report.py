@@ -0,0 +1,99 @@
+import json
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Build lots under tracemalloc and report the bytes each one holds, broken down by data "
+        "structure. Without --count the registered lots are measured; with it, that many lots "
+        "are built from --layout (or random grids) to size worker memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lot", action="append", dest="lots", help="only this registered lot (repeatable)")
+        parser.add_argument("--count", type=int, help="build this many private lots instead of the registered ones")
+        parser.add_argument("--layout", help="CSV/JSON lot map for the --count lots")
+        parser.add_argument("--levels", type=int, default=3, help="levels of random-grid --count lots")
+        parser.add_argument("--multi-level", action="store_true", help="--count lots use the BFS search")
+        parser.add_argument("--top", type=int, default=10, help="largest allocation sites to list")
+        parser.add_argument("--frames", type=int, default=1, help="traceback depth recorded by tracemalloc")
+        parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+
+    def handle(self, *args, **options):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(options["frames"])  # Before any lot is built, so builds are traced
+
+        if options["count"]:
+            from api.core.lotmanager import ParkingLotManager
+            manager = ParkingLotManager()
+            lot_names = [f"memory-report-{index}" for index in range(options["count"])]
+            for lot_name in lot_names:
+                manager.add_parking_lot(
+                    lot_name, options["levels"], options["multi_level"], "", layout_path=options["layout"]
+                )
+        else:
+            from api.views import parking_lot_manager as manager
+            lot_names = options["lots"]
+
+        # Build the lots; a manager never builds one just to report on it
+        if lot_names:
+            for lot_name in lot_names:
+                simulation = manager.get_parking_lot(lot_name)
+                if simulation is None:
+                    raise CommandError(f"Parking lot '{lot_name}' not found.")
+                simulation.total_spots
+        else:
+            manager.get_lot_summaries()
+
+        report = manager.memory_report(None if options["count"] else options["lots"], options["top"])
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report)
+
+    def print_report(self, report):
+        lots = report["lots"]
+        self.stdout.write(f"{'lot':<28}{'spots':>10}{'bytes':>14}{'per spot':>10}{'traced build':>15}")
+        self.stdout.write("=" * 77)
+        for lot in lots:
+            traced = lot["traced_build_bytes"]
+            self.stdout.write(
+                f"{lot['lot_name'][:27]:<28}{lot['spots']:>10,}{format_bytes(lot['total_bytes']):>14}"
+                f"{lot['bytes_per_spot']:>10.0f}{format_bytes(traced) if traced is not None else '-':>15}"
+            )
+
+        total = sum(lot["total_bytes"] for lot in lots)
+        if lots:
+            structures = {}
+            for lot in lots:
+                for name, size in lot["structures"].items():
+                    structures[name] = structures.get(name, 0) + size
+            self.stdout.write(f"\n{'structure (all lots)':<30}{'bytes':>14}{'share':>8}")
+            self.stdout.write("=" * 52)
+            for name, size in sorted(structures.items(), key=lambda item: -item[1]):
+                self.stdout.write(f"{name:<30}{format_bytes(size):>14}{size / total * 100 if total else 0:>7.1f}%")
+            average = total / len(lots)
+            self.stdout.write(
+                f"\n{len(lots)} lots, {format_bytes(total)} in lot structures; "
+                f"{format_bytes(average)} per lot on average, about {format_bytes(average * 1000)} per 1000 such lots."
+            )
+
+        for process in report["processes"]:
+            line = f"\nProcess {process['pid']}:"
+            if "peak_rss_bytes" in process:
+                line += f" peak RSS {format_bytes(process['peak_rss_bytes'])}"
+            if process["tracing"]:
+                line += (f", traced {format_bytes(process['traced_bytes'])}"
+                         f" (peak {format_bytes(process['traced_peak_bytes'])})")
+            self.stdout.write(line)
+            for site in process.get("top_allocations", []):
+                self.stdout.write(f"  {site['site']:<40}{format_bytes(site['bytes']):>14}{site['blocks']:>10,} blocks")
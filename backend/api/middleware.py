@@ -0,0 +1,179 @@
+import cProfile
+import hmac
+import io
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from .core import metrics
+from .core.lot_pins import LotPins
+
+PROFILE_HEADER = "X-SpotOn-Profile"
+PROFILE_ID_HEADER = "X-SpotOn-Profile-Id"
+PROFILE_SCOPE_HEADER = "X-SpotOn-Profile-Scope"
+PROFILE_QUERY_FLAG = "profile"
+
+
+class MetricsMiddleware:
+    """
+    Records how long each request takes, labelled by the URL name of the view
+    that handled it. Listed first so the time covers the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else "unmatched"
+        metrics.VIEW_LATENCY.observe(time.perf_counter() - start, view, request.method)
+        return response
+
+
+class LotPinMiddleware:
+    """
+    Keeps every lot a request looks up resident until its response has been
+    sent, so an idle lot is never paged out while a view, or a streamed body
+    still being generated from it, is using it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pins = LotPins()
+        try:
+            with pins.collecting():
+                response = self.get_response(request)
+        except BaseException:
+            pins.release()
+            raise
+        if response.streaming:
+            response.streaming_content = _ReleaseWhenDone(response.streaming_content, pins)
+        else:
+            pins.release()
+        return response
+
+
+class _ReleaseWhenDone:
+    # Streamed body that releases its lot pins once exhausted or closed by the server.
+
+    def __init__(self, chunks, pins):
+        self.chunks = iter(chunks)
+        self.pins = pins
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        close = getattr(self.chunks, "close", None)
+        if close is not None:
+            close()
+        self.pins.release()
+
+
+def profile_token_matches(request):
+    # True if the request carries SPOTON_PROFILE_TOKEN in the profile header or query flag.
+    token = settings.SPOTON_PROFILE_TOKEN
+    if not token:
+        return False
+    supplied = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_FLAG)
+    return bool(supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class ProfileStore:
+    """Most recent profiles by id; the oldest is dropped once max_entries is reached."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile_id, profile):
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profile_store = ProfileStore(settings.SPOTON_PROFILE_STORE_SIZE)
+
+
+class ProfilingMiddleware:
+    """
+    Runs the view under cProfile for requests that carry the profiling token.
+    The response gets an X-SpotOn-Profile-Id header; the summary and a pstats
+    dump are kept in profile_store under that id. Other requests only pay for
+    the settings check. A streamed body is produced after the view returns, as
+    the server reads it, so it is not part of the profile; such responses say so
+    in X-SpotOn-Profile-Scope.
+    """
+
+    # cProfile only records calls made on the thread that enabled it. Only one request
+    # is profiled at a time, so each profile holds one request's calls and nothing else.
+    _profiling = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SPOTON_PROFILE_TOKEN or not profile_token_matches(request):
+            return self.get_response(request)
+        if not self._profiling.acquire(blocking=False):
+            response = self.get_response(request)
+            response[PROFILE_ID_HEADER] = "busy"
+            return response
+
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+        finally:
+            self._profiling.release()
+
+        profile_id = uuid.uuid4().hex
+        profiler.create_stats()
+        dump = marshal.dumps(profiler.stats)  # Same bytes pstats.Stats.dump_stats writes
+        profile_store.add(profile_id, {
+            "path": request.get_full_path(),
+            "method": request.method,
+            "seconds": elapsed,
+            "streamed": response.streaming,
+            "summary": summarize_profile(profiler),  # Consumes profiler.stats
+            "pstats": dump,
+        })
+        response[PROFILE_ID_HEADER] = profile_id
+        if response.streaming:
+            response[PROFILE_SCOPE_HEADER] = "view; streamed body not profiled"
+        return response
+
+
+def summarize_profile(profiler, limit=25):
+    # Top functions by cumulative time, then the same restricted to SpotOn's own modules.
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output).sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(limit)
+    output.write("\nSpotOn call paths (api/core, api/simulation):\n")
+    stats.print_stats(r"api[\\/](core|simulation)", limit)
+    return output.getvalue()
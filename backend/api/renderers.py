@@ -0,0 +1,92 @@
+import json
+import math
+import threading
+from collections import OrderedDict
+from .core import metrics
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library encoder.
+    orjson = None
+
+
+def _finite(data):
+    # data with NaN and infinite floats replaced by None, as orjson encodes them.
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite(value) for value in data]
+    return data
+
+
+def json_dumps(data):
+    """
+    Encode data as compact JSON bytes, with orjson when it is installed. Either way,
+    NaN and infinite floats become null.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        return json.dumps(data, separators=(",", ":"), allow_nan=False).encode()
+    except ValueError:
+        # Rare, so the copy is only made once the fast encode has refused a non-finite float
+        return json.dumps(_finite(data), separators=(",", ":"), allow_nan=False).encode()
+
+
+class RenderedCache:
+    """
+    LRU cache of encoded response bodies keyed by (lot, level, state version).
+    Storing a new version for a (lot, level) drops the previous one, so entries
+    are only evicted by size when many lots or levels are being read.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}  # (lot, level) to the version currently cached
+        self._lock = threading.Lock()
+
+    def get(self, lot, level, version):
+        key = (lot, level, version)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+        metrics.RENDER_CACHE_LOOKUPS.inc("hit" if body is not None else "miss")
+        return body
+
+    def put(self, lot, level, version, body):
+        with self._lock:
+            previous = self._versions.get((lot, level))
+            if previous is not None:
+                self._entries.pop((lot, level, previous), None)
+            self._versions[(lot, level)] = version
+            self._entries[(lot, level, version)] = body
+            while len(self._entries) > self.max_entries:
+                (old_lot, old_level, _), _ = self._entries.popitem(last=False)
+                self._versions.pop((old_lot, old_level), None)
+
+    def bytes_by_lot(self):
+        # Bytes of cached bodies per lot, for memory reports.
+        totals = {}
+        with self._lock:
+            for (lot, _, _), body in self._entries.items():
+                totals[lot] = totals.get(lot, 0) + len(body)
+        return totals
+
+    def discard_lot(self, lot):
+        # Drop every cached body of a lot, e.g. when it is paged out.
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == lot]:
+                del self._entries[key]
+                self._versions.pop((lot, key[1]), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+render_cache = RenderedCache()
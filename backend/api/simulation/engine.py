@@ -5,13 +5,30 @@ import math
 import signal
 from datetime import datetime
 from ..core.system import SpotOnSystem
+from ..core.parking import ParkingLot
 from ..core.manual_priority_queue import ManualPriorityQueue
 from ..core.manual_bfs_queue import ManualBFSQueue  # Importing ManualBFSQueue
+from ..core.shared_state import SharedLotState
+from ..core.layout_loader import load_layout, paused_gc
+from ..core.distances import manhattan_distances
+from ..core import metrics
+from ..core.history import OccupancyHistory
+from .forecast import LotFork, run_forecast
+from ..renderers import json_dumps, render_cache
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SPOTS = 1000  # Spots encoded per chunk of a streamed response
+MAX_AREA_CELLS = 250_000  # Largest viewport, in grid cells, served with individual spots
+
+# Simulation parameters used when start_simulation or a forecast is not given them
+DEFAULT_DURATION_SECONDS = 60
+DEFAULT_UPDATE_INTERVAL = 2.0
+DEFAULT_ARRIVAL_RATE = 0.7
+DEFAULT_DEPARTURE_RATE = 0.3
+
 class ParkingSimulation:
     def __init__(
         self,
@@ -19,45 +36,140 @@ class ParkingSimulation:
         num_levels,
         is_multi_level,
         address,
-        occupancy_rate=0.5  # Default occupancy rate of 10%
+        occupancy_rate=0.5,  # Default occupancy rate of 10%
+        seed=None,  # Seed for reproducible layouts; required when sharing state across workers
+        shared_state_dir=None,  # Directory holding the shared occupancy region, if any
+        layout_path=None,  # CSV/JSON file with a real lot map; random grids are generated without one
+        allocation_backend="heap",  # Nearest-spot search for single-level lots; see SpotOnSystem
+        snapshot=None  # State from snapshot() of a paged-out lot; restored instead of building a new one
     ):
         self.lot_name = lot_name
         self.is_multi_level = is_multi_level
         self.num_levels = num_levels
         self.address = address
-        self.level_layouts = {}
-        self.system = SpotOnSystem(is_multi_level=is_multi_level)
+        self.system = SpotOnSystem(
+            is_multi_level=is_multi_level, lot_name=lot_name, allocation_backend=allocation_backend
+        )
         self.system.simulation = self  # Link SpotOnSystem back to this ParkingSimulation
-        self.total_spots = 0
         self.is_simulation_running = False
         self.simulation_thread = None
+        self.simulation_parameters = None  # (update_interval, arrival_rate, departure_rate) of the last start
         self.occupancy_rate = occupancy_rate  # Initialize occupancy_rate
-        self.perimeter_points = {}  # Entry points per level
-        self.spot_coordinates = {}  # Map of spot_id to (x, y)
-        self.current_entry_points = {}  # Current entry point per level
-        self.nearest_spot_ids = {}  # Nearest spot ID per level
-        self.initialize_parking_lot()
-        self.set_initial_occupancy()  # Set initial occupancy after initialization
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if snapshot is not None:
+            self.restore(snapshot)  # The layout file is not read again
+        else:
+            self.layout = load_layout(layout_path) if layout_path else None
+            if self.layout is not None:
+                self.num_levels = self.layout.num_levels
+            self.history = OccupancyHistory(self.num_levels)  # Per-level occupancy over time
+            self.build_layout()
+            self.set_initial_occupancy()  # Set initial occupancy after initialization
+        if shared_state_dir:
+            self.system.attach_shared_state(
+                SharedLotState.for_lot(shared_state_dir, lot_name, self.system.parking_lot.spots.keys())
+            )
+
+    # Layout state lives on the current ParkingLot and is replaced with it by build_layout.
+    # A reader that needs several of these should take system.parking_lot once and use that.
+
+    @property
+    def total_spots(self):
+        return len(self.system.parking_lot.spots)
+
+    @property
+    def level_layouts(self):
+        return self.system.parking_lot.level_layouts
+
+    @property
+    def perimeter_points(self):
+        return self.system.parking_lot.perimeter_points  # Entry point candidates per level
+
+    @property
+    def current_entry_points(self):
+        return self.system.parking_lot.entry_points
+
+    @property
+    def nearest_spot_ids(self):
+        return self.system.parking_lot.nearest_spot_ids  # External ID of the nearest spot per level
+
+    @property
+    def spot_coordinates(self):
+        return self.system.parking_lot.spot_coordinates  # (x, y) by spot handle
+
+    def snapshot(self):
+        # Plain data for rebuilding this lot as it is now, without its layout build or initial occupancy.
+        return {
+            "system": self.system.snapshot(),
+            "num_levels": self.num_levels,
+            "layout": self.layout,
+            "rng_state": self.rng.getstate(),
+            "history": self.history,
+        }
+
+    def restore(self, snapshot):
+        # Take back the state of snapshot(); the history goes first so the restore is recorded in it.
+        self.num_levels = snapshot["num_levels"]
+        self.layout = snapshot["layout"]
+        self.rng.setstate(snapshot["rng_state"])
+        self.history = snapshot["history"]
+        self.system.restore(snapshot["system"])
+
+    def close(self):
+        # Unmap the shared occupancy region and close its file; the lot must not be used afterwards.
+        if self.system.shared_state is not None:
+            self.system.shared_state.close()
 
     def initialize_parking_lot(self):
-        # Initialize the parking lot with spots, levels, and set initial occupancy.
+        # Re-initialize the parking lot with a new layout, built off to the side and swapped in.
+        shared_state = self.system.shared_state
+        if shared_state is None:
+            self.build_layout()
+            return
+        # Bump the shared generation so every other worker rebuilds the same layout on its next sync.
+        # The lot is built before taking the locks; if another worker got there first, build again.
+        while True:
+            generation = shared_state.generation + 1
+            parking_lot = self.build_parking_lot(generation)
+            parking_lot.build_indexes_like(self.system.parking_lot)
+            with self.system.shared_transaction():
+                if shared_state.generation + 1 != generation:
+                    continue
+                self.system.replace_parking_lot(parking_lot)
+                self.system.publish_shared_layout(generation)
+                return
+
+    def refresh_nearest_spots(self):
+        # Recompute the nearest available spot on every level.
+        for level in range(self.num_levels):
+            self.update_nearest_spot(level)
+
+    def build_layout(self, generation=0):
+        # Build a new lot and swap it in with one assignment. Readers and the simulation thread
+        # keep working on the old lot until then and never see a half-built one.
+        parking_lot = self.build_parking_lot(generation)
+        parking_lot.build_indexes_like(self.system.parking_lot)
+        self.system.replace_parking_lot(parking_lot)
+
+    def build_parking_lot(self, generation=0):
+        # A new ParkingLot with spots, levels and entry points and no vehicles.
+        # Seeded lots derive the layout from (seed, generation) so every worker builds the same one.
         logger.info(f"Initializing parking lot '{self.lot_name}' with {self.num_levels} levels.")
-        self.total_spots = 0
-        self.level_layouts = {}
-        self.perimeter_points = {}
-        self.spot_coordinates = {}
-        self.system.parking_lot.spots.clear()  # Clear existing spots
-        self.system.parking_lot.levels.clear()  # Clear existing levels
-        self.system.parking_lot.available_spots = ManualPriorityQueue()  # Reset the manual priority queue
-        self.current_entry_points = {}
-        self.nearest_spot_ids = {}
-        self.system.parking_lot.spot_coordinates.clear()  # Clear spot coordinates in parking lot
+        if self.seed is not None:
+            self.rng.seed(f"{self.seed}:{generation}")
+        parking_lot = ParkingLot(
+            is_multi_level=self.is_multi_level, keeps_heap=self.system.parking_lot.keeps_heap
+        )
+        if self.layout is not None:
+            self.apply_layout(parking_lot, self.layout)
+            return parking_lot
 
         for level in range(self.num_levels):
             # Randomly generate the number of rows and columns for this level (4-7)
-            num_rows = random.randint(4, 7)
-            num_cols = random.randint(4, 7)
-            self.level_layouts[level] = (num_rows, num_cols)
+            num_rows = self.rng.randint(4, 7)
+            num_cols = self.rng.randint(4, 7)
+            parking_lot.level_layouts[level] = (num_rows, num_cols)
             logger.debug(f"Level {level + 1}: {num_rows} rows x {num_cols} columns.")
 
             # Create spots for this level
@@ -72,124 +184,304 @@ class ParkingSimulation:
             for spot_id, lvl, _, coord in spots_config:
                 try:
                     # Set distance to None; it will be calculated after entry point is set
-                    self.system.parking_lot.add_parking_spot(spot_id, lvl, None, coord)
-                    self.spot_coordinates[spot_id] = coord  # Map spot_id to coordinates
-                    self.system.parking_lot.spot_coordinates[spot_id] = coord  # Update in parking lot
+                    parking_lot.add_parking_spot(spot_id, lvl, None, coord)
                 except ValueError as ve:
                     logger.error(str(ve))
                     continue  # Skip adding this spot if there's an error
 
-            self.total_spots += len(spots_config)
-            logger.info(f"Level {level + 1}: Added {len(spots_config)} spots.")
+            logger.debug(f"Level {level + 1}: Added {len(spots_config)} spots.")
 
             # Define perimeter points (entry points) around the grid for this level
-            perimeter = []
-            for j in range(num_cols):
-                # Top perimeter (y = -1)
-                perimeter.append((j, -1))
-                # Bottom perimeter (y = num_rows)
-                perimeter.append((j, num_rows))
-            for i in range(num_rows):
-                # Left perimeter (x = -1)
-                perimeter.append((-1, i))
-                # Right perimeter (x = num_cols)
-                perimeter.append((num_cols, i))
-            self.perimeter_points[level] = perimeter
+            perimeter = self.get_perimeter_points(0, 0, num_cols - 1, num_rows - 1)
+            parking_lot.perimeter_points[level] = perimeter
 
             # Set random entry point for this level
             if perimeter:
-                random.shuffle(perimeter)
-                entry_point = random.choice(perimeter)
-                self.current_entry_points[level] = entry_point
-                self.system.parking_lot.set_entry_point(level, entry_point)
-                logger.info(f"Level {level + 1}: Initial Entry Point set to {entry_point}.")
-
-                # Update distance_from_entry for each spot and populate available_spots priority queue
-                for spot_id, _, _, _ in spots_config:
-                    spot = self.system.parking_lot.spots.get(spot_id)
-                    if spot:
-                        distance = self.calculate_distance(entry_point, self.spot_coordinates[spot_id])
-                        if distance != float('inf'):
-                            spot.distance_from_entrance = distance
-                            # Now that we have the distance, add the spot to the available_spots queue
-                            if not spot.is_occupied:
-                                success = self.system.parking_lot.available_spots.push((distance, spot_id))
-                                if not success:
-                                    logger.warning(f"Failed to push spot {spot_id} into available_spots.")
-                        else:
-                            spot.distance_from_entrance = float('inf')
-                            logger.warning(f"Spot {spot_id} has invalid distance. Set to infinity.")
-                    else:
-                        logger.warning(f"Spot ID '{spot_id}' not found in spots dictionary.")
+                self.rng.shuffle(perimeter)
+                entry_point = self.rng.choice(perimeter)
+                parking_lot.set_entry_point(level, entry_point)
+                logger.debug(f"Level {level + 1}: Initial Entry Point set to {entry_point}.")
+
+                # Update distance_from_entry for every spot on the level in one vectorized pass
+                parking_lot.assign_distances(level, entry_point)
+
+        # Populate the available_spots priority queue once all distances are known
+        parking_lot.rebuild_available_spots()
+        return parking_lot
+
+    def rotate_entry_point(self, level, entry_point=None):
+        # Move a level's entry point (a random perimeter point if none is given) and
+        # recompute distances and the availability heap in bulk.
+        with self.system.write_lock:
+            parking_lot = self.system.parking_lot
+            if entry_point is None:
+                entry_point = self.rng.choice(parking_lot.perimeter_points[level])
+            parking_lot.move_entry_point(level, entry_point)
+            self.system.mark_state_changed()
+            self.update_nearest_spot(level)
+        logger.info(f"Level {level + 1}: Entry point moved to {entry_point}.")
+        return entry_point
+
+    def get_perimeter_points(self, min_x, min_y, max_x, max_y):
+        # Points one cell outside the bounding box of a level; candidates for entry points.
+        perimeter = []
+        for x in range(min_x, max_x + 1):
+            perimeter.append((x, min_y - 1))  # Top perimeter
+            perimeter.append((x, max_y + 1))  # Bottom perimeter
+        for y in range(min_y, max_y + 1):
+            perimeter.append((min_x - 1, y))  # Left perimeter
+            perimeter.append((max_x + 1, y))  # Right perimeter
+        return perimeter
+
+    def apply_layout(self, parking_lot, layout):
+        # Fill a new ParkingLot from a loaded LotLayout: distances are computed per level in bulk
+        # and the availability heap is heapified once instead of pushing every spot.
+        distances = []
+        entry_points = {}
+        for level, start, end in layout.level_ranges():
+            xs = layout.xs[start:end]
+            ys = layout.ys[start:end]
+            min_x, min_y, max_x, max_y = min(xs), min(ys), max(xs), max(ys)
+            parking_lot.level_layouts[level] = (max_y + 1, max_x + 1)
+            perimeter = self.get_perimeter_points(min_x, min_y, max_x, max_y)
+            parking_lot.perimeter_points[level] = perimeter
+            entry_point = layout.entry_points.get(level) or self.rng.choice(perimeter)
+            entry_points[level] = entry_point
+            distances.extend(manhattan_distances(xs, ys, entry_point))
+            logger.debug(f"Level {level + 1}: Loaded {end - start} spots, entry point {entry_point}.")
+
+        parking_lot.add_parking_spots_bulk(
+            layout.spot_ids, layout.levels, distances, zip(layout.xs, layout.ys)
+        )
+        for level, entry_point in entry_points.items():
+            parking_lot.set_entry_point(level, entry_point)
+        for level, cells in layout.obstacles.items():
+            for cell in cells:
+                parking_lot.add_obstacle(level, cell)
+        logger.info(
+            f"Loaded layout for '{self.lot_name}': {len(parking_lot.spots)} spots on "
+            f"{len(parking_lot.level_layouts)} levels."
+        )
 
     def set_initial_occupancy(self):
         # Set the initial occupancy of parking spots based on occupancy_rate.
         logger.info(f"Setting initial occupancy with rate {self.occupancy_rate * 100:.0f}%.")
         spot_ids = list(self.system.parking_lot.spots.keys())
-        random.shuffle(spot_ids)
+        self.rng.shuffle(spot_ids)
         spots_to_occupy = int(len(spot_ids) * self.occupancy_rate)
-        occupied_spots = 0
-
-        for spot_id in spot_ids[:spots_to_occupy]:
-            spot = self.system.parking_lot.spots.get(spot_id)
-            if spot and not spot.is_occupied and spot.distance_from_entrance != float('inf'):
-                vehicle_id = f"V{random.randint(1000, 9999)}"
-                success = self.system.allocate_spot(vehicle_id, spot_id)
-                if success:
-                    occupied_spots += 1
-                    logger.info(f"Initially occupied spot {spot_id} by vehicle {vehicle_id}.")
+        # Unique vehicle numbers; V1000-V9999 unless the lot needs more
+        vehicle_numbers = self.rng.sample(range(1000, max(10000, 1000 + 2 * spots_to_occupy)), spots_to_occupy)
+        with paused_gc():
+            occupied_spots = self.system.occupy_spots_bulk(
+                (spot_id, f"V{number}") for spot_id, number in zip(spot_ids, vehicle_numbers)
+            )
 
         logger.info(f"Initial occupancy set: {occupied_spots} spots occupied.")
 
         # Update nearest spot for each level after initial occupancy
-        for level in range(self.num_levels):
-            self.update_nearest_spot(level)
+        self.refresh_nearest_spots()
+
+    def record_occupancy(self):
+        # Append the current occupied count per level to the history.
+        occupied_by_level = self.system.parking_lot.occupied_by_level
+        self.history.record([occupied_by_level.get(level, 0) for level in range(self.num_levels)])
+
+    def get_occupancy_history(self, start=None, end=None, resolution=None):
+        # Occupancy per level between start and end (epoch seconds) from the matching history tier.
+        history = self.history.query(start, end, resolution)
+        history["spots_by_level"] = [
+            len(self.system.parking_lot.levels.get(level, [])) for level in range(self.num_levels)
+        ]
+        return history
 
     def update_nearest_spot(self, level):
         # Update the nearest available spot for a specific level.
         logger.debug(f"Updating nearest spot for level {level + 1}.")
-        nearest_spot_id = self.system.find_nearest_spot(level)
-        self.nearest_spot_ids[level] = nearest_spot_id if nearest_spot_id else "N/A"
-        if nearest_spot_id:
-            logger.info(f"Nearest Spot Updated for level {level + 1}: {nearest_spot_id}")
+        nearest_spot_id = self.system.parking_lot.external_id(self.system.find_nearest_spot(level)) or "N/A"
+        if self.nearest_spot_ids.get(level) != nearest_spot_id:
+            self.nearest_spot_ids[level] = nearest_spot_id
+            self.system.mark_state_changed()
+        if nearest_spot_id != "N/A":
+            logger.debug(f"Nearest Spot Updated for level {level + 1}: {nearest_spot_id}")
         else:
-            logger.info(f"No available nearest spot found for level {level + 1}.")
+            logger.debug(f"No available nearest spot found for level {level + 1}.")
 
     def get_current_status(self):
         # Retrieve the current status of the parking lot.
-        total_occupied = self.system.get_total_occupied_spots()
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        parking_lot = self.system.parking_lot  # Every field below comes from this one lot
+        total_occupied = self.system.get_total_occupied_spots(parking_lot)
         logger.debug(f"Total occupied spots: {total_occupied}")
 
         # Serialize spots by level
+        spots = parking_lot.spots
+        spot_ids = parking_lot.spot_ids
         spots_by_level = {}
         for level in range(self.num_levels):
             spots_in_level = [
-                {
-                    "id": spot_id,
-                    "isOccupied": spot.is_occupied,
-                    "level": level + 1,  # Adjust level to be 1-based
-                    "distance": spot.distance_from_entrance,
-                    "vehicle_id": spot.vehicle_id,
-                }
-                for spot_id, spot in self.system.parking_lot.spots.items()
-                if spot.level == level
+                self.serialize_spot(spot_ids[handle], spots[handle])
+                for handle in parking_lot.levels.get(level, [])
             ]
             spots_by_level[level] = spots_in_level
             logger.debug(f"Level {level + 1}: {len(spots_in_level)} spots serialized.")
 
         status = {
             'timestamp': datetime.now().isoformat(),
-            'total_spots': self.total_spots,
+            'total_spots': len(spots),
             'occupied_spots': total_occupied,
-            'available_spots': self.total_spots - total_occupied,
+            'available_spots': len(spots) - total_occupied,
             'spots_by_level': spots_by_level,
-            'level_layouts': self.level_layouts,
-            'nearest_spot_ids': self.nearest_spot_ids,  # Nearest spot per level
-            'entry_points': self.current_entry_points,  # Entry point per level
+            'level_layouts': parking_lot.level_layouts,
+            'nearest_spot_ids': parking_lot.nearest_spot_ids,  # Nearest spot per level
+            'entry_points': parking_lot.entry_points,  # Entry point per level
         }
-        logger.debug(f"Current status: {status}")
+        logger.debug("Current status: %s", status)  # Lazy: formatting a large lot is expensive
         return status
 
+    def serialize_spot(self, spot_id, spot):
+        return {
+            "id": spot_id,
+            "isOccupied": spot.is_occupied,
+            "isReserved": spot.is_reserved,
+            "level": spot.level + 1,  # Adjust level to be 1-based
+            "distance": spot.distance_from_entrance,
+            "vehicle_id": spot.vehicle_id,
+        }
+
+    def iter_level_spots_json(self, parking_lot, level):
+        # A level's spots as the inside of a JSON array, encoded a bounded batch at a time.
+        spots = parking_lot.spots
+        spot_ids = parking_lot.spot_ids
+        handles = parking_lot.levels.get(level, [])
+        for start in range(0, len(handles), STREAM_CHUNK_SPOTS):
+            batch = [
+                self.serialize_spot(spot_ids[handle], spots[handle])
+                for handle in handles[start:start + STREAM_CHUNK_SPOTS]
+            ]
+            yield (b',' if start else b'') + json_dumps(batch)[1:-1]
+
+    def iter_status_json(self):
+        # get_current_status as a stream of JSON chunks, level by level, so memory use does
+        # not grow with the lot size. Same fields and order as the non-streamed response.
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        parking_lot = self.system.parking_lot  # A re-initialization mid-stream does not change this response
+        total_occupied = self.system.get_total_occupied_spots(parking_lot)
+        yield json_dumps({
+            'timestamp': datetime.now().isoformat(),
+            'total_spots': len(parking_lot.spots),
+            'occupied_spots': total_occupied,
+            'available_spots': len(parking_lot.spots) - total_occupied,
+        })[:-1] + b',"spots_by_level":{'
+        for level in range(self.num_levels):
+            yield (b',' if level else b'') + json_dumps(str(level)) + b':['
+            yield from self.iter_level_spots_json(parking_lot, level)
+            yield b']'
+        yield b'},' + json_dumps({
+            'level_layouts': parking_lot.level_layouts,
+            'nearest_spot_ids': parking_lot.nearest_spot_ids,
+            'entry_points': parking_lot.entry_points,
+        })[1:]
+
+    def iter_parking_grid_json(self, lot_name, level):
+        # get_parking_grid as a stream of JSON chunks, spot batch by spot batch.
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        parking_lot = self.system.parking_lot
+        yield json_dumps({"lot_name": lot_name, "level": level + 1})[:-1] + b',"spots":['
+        yield from self.iter_level_spots_json(parking_lot, level)
+        yield b'],' + json_dumps({
+            "level_layouts": parking_lot.level_layouts,
+            "nearest_spot_id": parking_lot.nearest_spot_ids.get(level, "N/A"),
+            "entry_point": parking_lot.entry_points.get(level, "N/A"),
+        })[1:]
+
+    def get_tiles(self, level, zoom, viewport=None):
+        # Spot and occupied counts per tile of a level at a zoom, optionally within a tile viewport.
+        # Under the write lock, so no spot change lands between the tiles of one response.
+        with self.system.write_lock:
+            pyramid = self.system.parking_lot.tile_pyramid(level)
+            return {
+                "level": level + 1,
+                "zoom": zoom,
+                "max_zoom": pyramid.max_zoom,
+                "tile_size": pyramid.tile_size(zoom) if 0 <= zoom <= pyramid.max_zoom else None,
+                "origin": pyramid.origin,
+                "tiles": [
+                    {"x": tile_x, "y": tile_y, "spots": spots, "occupied": occupied, "free": spots - occupied}
+                    for tile_x, tile_y, spots, occupied in pyramid.tiles(zoom, viewport)
+                ],
+            }
+
+    def get_free_spots_by_distance(self, level, min_distance=None, max_distance=None):
+        # Free spots on a level within a distance range of its entry point, and the nearest one in it.
+        # Both come from one state: the write lock keeps spot changes out of the index meanwhile.
+        self.system.sync_shared_state()
+        with self.system.write_lock:
+            first_free = self.system.find_first_free_spot_from(level, 0 if min_distance is None else min_distance)
+            free_spots = self.system.count_free_spots_within(level, min_distance, max_distance)
+        if first_free is not None and max_distance is not None and first_free[0] > max_distance:
+            first_free = None
+        return {
+            "level": level + 1,
+            "min_distance": min_distance,
+            "max_distance": max_distance,
+            "free_spots": free_spots,
+            "first_free_spot": None if first_free is None else {"spot_id": first_free[1], "distance": first_free[0]},
+        }
+
+    def get_parking_grid_area(self, lot_name, level, x0, y0, x1, y1):
+        # Like get_parking_grid but only the spots inside a box of grid cells, with their coordinates.
+        if x1 < x0 or y1 < y0:
+            raise ValueError("Area must have x0 <= x1 and y0 <= y1.")
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_AREA_CELLS:
+            raise ValueError(f"Area is larger than {MAX_AREA_CELLS} cells; request tiles instead.")
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        parking_lot = self.system.parking_lot
+        spots = []
+        for handle in parking_lot.spots_in_area(level, x0, y0, x1, y1):
+            x, y = parking_lot.spot_coordinates[handle]
+            spots.append(dict(self.serialize_spot(parking_lot.spot_ids[handle], parking_lot.spots[handle]), x=x, y=y))
+        return {
+            "lot_name": lot_name,
+            "level": level + 1,
+            "area": [x0, y0, x1, y1],
+            "spots": spots,
+            "level_layouts": parking_lot.level_layouts,
+            "nearest_spot_id": parking_lot.nearest_spot_ids.get(level, "N/A"),
+            "entry_point": parking_lot.entry_points.get(level, "N/A"),
+        }
+
+    def render_status(self):
+        # get_current_status as JSON bytes, encoded again only after the lot state changed.
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        version = self.system.state_version
+        body = render_cache.get(self.lot_name, None, version)
+        if body is None:
+            status = self.get_current_status()
+            del status['timestamp']
+            body = json_dumps(status)
+            render_cache.put(self.lot_name, None, version, body)
+        # The timestamp is the only per-request field; splice it in front of the cached body
+        return b'{"timestamp":' + json_dumps(datetime.now().isoformat()) + b',' + body[1:]
+
+    def render_parking_grid(self, lot_name, level):
+        # get_parking_grid as JSON bytes, cached per level and state version. None if it failed.
+        self.system.sync_shared_state()
+        self.system.expire_reservations()
+        version = self.system.state_version
+        body = render_cache.get(self.lot_name, level, version)
+        if body is None:
+            grid_data = self.get_parking_grid(lot_name, level)
+            if grid_data is None:
+                return None
+            body = json_dumps(grid_data)
+            render_cache.put(self.lot_name, level, version, body)
+        return body
+
     def get_parking_grid(self, lot_name, level):
         # Retrieve the parking grid for a specific lot and level.
         try:
@@ -201,11 +493,12 @@ class ParkingSimulation:
                 "lot_name": lot_name,
                 "level": level + 1,  # Adjusting back to 1-based index for frontend
                 "spots": level_spots,
-                "level_layouts": self.level_layouts,  # Send the full level_layouts dictionary
-                "nearest_spot_id": self.nearest_spot_ids.get(level, "N/A"),
-                "entry_point": self.current_entry_points.get(level, "N/A"),
+                # The rest comes from the same status read, so from the same lot as the spots
+                "level_layouts": status_data["level_layouts"],  # Send the full level_layouts dictionary
+                "nearest_spot_id": status_data["nearest_spot_ids"].get(level, "N/A"),
+                "entry_point": status_data["entry_points"].get(level, "N/A"),
             }
-            logger.debug(f"Retrieved grid data for lot '{lot_name}', level {level + 1}: {grid_data}")
+            logger.debug("Retrieved grid data for lot %r, level %d: %s", lot_name, level + 1, grid_data)
             return grid_data
         except Exception as e:
             logger.exception(f"Error in get_parking_grid: {str(e)}")
@@ -221,18 +514,27 @@ class ParkingSimulation:
             logger.error(f"No entry point set for level {level + 1}.")
             return vehicle_id, False, level + 1
 
-        spot_id = self.system.find_nearest_spot(level)
+        # Search and allocate in one write transaction, so the spot found is still free when taken
+        with self.system.shared_transaction():
+            spot_id = self.system.find_nearest_spot(level)
+            success = bool(spot_id) and self.system.allocate_spot(vehicle_id, spot_id)
         if spot_id:
-            success = self.system.allocate_spot(vehicle_id, spot_id)
             if success:
-                logger.info(f"Vehicle {vehicle_id} parked at {spot_id} on level {level + 1}.")
+                logger.info(
+                    "Vehicle %s parked at %s on level %d.",
+                    vehicle_id, self.system.parking_lot.external_id(spot_id), level + 1
+                )
                 # Update nearest spot after parking
                 self.update_nearest_spot(level)
                 return vehicle_id, True, level + 1
             else:
-                logger.warning(f"Vehicle {vehicle_id} failed to park at {spot_id} on level {level + 1}.")
+                logger.warning(
+                    "Vehicle %s failed to park at %s on level %d.",
+                    vehicle_id, self.system.parking_lot.external_id(spot_id), level + 1
+                )
         else:
             logger.warning(f"Vehicle {vehicle_id} failed to park on level {level + 1}. No available spots.")
+            metrics.ALLOCATION_FAILURES.inc(self.lot_name, "no_spot")
 
         # Ensure nearest spot is updated even if parking failed
         self.update_nearest_spot(level)
@@ -280,18 +582,20 @@ class ParkingSimulation:
 
         # Apply default values if parameters are None
         if duration_seconds is None:
-            duration_seconds = 60
+            duration_seconds = DEFAULT_DURATION_SECONDS
         if update_interval is None:
-            update_interval = 2.0
+            update_interval = DEFAULT_UPDATE_INTERVAL
         if arrival_rate is None:
-            arrival_rate = 0.7
+            arrival_rate = DEFAULT_ARRIVAL_RATE
         if departure_rate is None:
-            departure_rate = 0.3
+            departure_rate = DEFAULT_DEPARTURE_RATE
 
+        self.simulation_parameters = (update_interval, arrival_rate, departure_rate)
         self.is_simulation_running = True
         self.simulation_thread = threading.Thread(
             target=self.run_simulation,
-            args=(duration_seconds, update_interval, arrival_rate, departure_rate)
+            args=(duration_seconds, update_interval, arrival_rate, departure_rate),
+            name=f"{metrics.SIMULATION_THREAD_PREFIX}{self.lot_name}"
         )
         self.simulation_thread.start()
         logger.info(f"Simulation started with duration {duration_seconds} seconds, update interval {update_interval} seconds, arrival rate {arrival_rate}, departure rate {departure_rate}.")
@@ -320,6 +624,53 @@ class ParkingSimulation:
             logger.info("Simulation ended.")
             self.is_simulation_running = False
 
+    def fork(self):
+        # Per-level counts a forecast runs from, read together under the write lock so they are
+        # never torn by a concurrent park or release. Free spots are the level's spots less the
+        # parked and held ones. Like the other reads, a shared lot first adopts what other workers changed.
+        self.system.sync_shared_state()
+        with self.system.write_lock:
+            self.system.expire_reservations()
+            parking_lot = self.system.parking_lot
+            levels = range(self.num_levels)
+            held_by_level = {}
+            for spot_id in self.system.reservations.values():
+                level = parking_lot.spots[spot_id].level
+                held_by_level[level] = held_by_level.get(level, 0) + 1
+            parked_by_level = [parking_lot.occupied_by_level.get(level, 0) for level in levels]
+            free_by_level = [
+                len(parking_lot.levels.get(level, ())) - parked - held_by_level.get(level, 0)
+                if level in parking_lot.entry_points else 0
+                for level, parked in zip(levels, parked_by_level)
+            ]
+        return LotFork(
+            lot_name=self.lot_name,
+            forked_at=datetime.now(),
+            free_by_level=free_by_level,
+            parked_by_level=parked_by_level,
+        )
+
+    def forecast(self, horizon_seconds=3600, replications=200, seed=0, budget_seconds=0.25,
+                 arrival_rate=None, departure_rate=None, update_interval=None):
+        # Fast-forward a fork of the lot under the running simulation's rates (or the defaults);
+        # the live lot keeps serving requests and is not locked meanwhile.
+        running = self.simulation_parameters if self.is_simulation_running else None
+        default_interval, default_arrival, default_departure = running or (
+            DEFAULT_UPDATE_INTERVAL, DEFAULT_ARRIVAL_RATE, DEFAULT_DEPARTURE_RATE
+        )
+        forecast = run_forecast(
+            self.fork(),
+            horizon_seconds,
+            update_interval if update_interval is not None else default_interval,
+            arrival_rate if arrival_rate is not None else default_arrival,
+            departure_rate if departure_rate is not None else default_departure,
+            replications=replications,
+            seed=seed,
+            budget_seconds=budget_seconds,
+        )
+        forecast["simulation_running"] = running is not None
+        return forecast
+
     def stop_simulation(self):
         # Stop the simulation gracefully.
         self.is_simulation_running = False
@@ -0,0 +1,302 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; replications then run one at a time in plain Python.
+    np = None
+
+BLOCK_REPLICATIONS = 128  # Replications sharing one random stream; each block is seeded by (seed, block)
+STEP_CHUNK = 512  # Steps stepped between deadline checks, with their random draws made at once
+WALK_CHUNK = 8192  # Steps of a single-level replication advanced per NumPy pass
+WALK_LEAP_MIN = 64  # Fewest steps worth drawing as one leap
+LEVEL_LEAP_SHARE = 16  # A multi-level leap is at most this fraction of the smallest free or parked count
+MAX_STEPS = 10_000_000  # Longest horizon, in simulation steps, one forecast may cover
+MAX_REPLICATIONS = 10_000
+
+
+@dataclass
+class LotFork:
+    """
+    The live lot state a forecast runs from. A simulation step only depends on how many
+    spots each level can still give out and how many vehicles are parked on it, so the
+    fork copies those counts and never the spots themselves.
+
+    Attributes:
+        lot_name: Lot the fork was taken from
+        forked_at: When the counts were read
+        free_by_level: Spots an arriving vehicle could be given, per level; 0 for levels without an entry point
+        parked_by_level: Parked vehicles per level
+    """
+    lot_name: str
+    forked_at: datetime
+    free_by_level: list
+    parked_by_level: list
+
+
+def _percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list; None when it is empty.
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _run_block_walk(fork, steps, arrival_rate, departure_rate, count, seed, block, deadline):
+    # Single-level lots: the parked count is a walk that arrivals push up and departures pull
+    # down, held between 0 and the level's capacity. Each pass draws WALK_CHUNK steps and
+    # reflects their running sum off the barrier it starts nearer to (an arrival at capacity
+    # is turned away, a departure from an empty lot does nothing), up to the first step that
+    # would cross the other barrier. At least m steps away from both barriers, the next m steps
+    # cannot touch either one, so their arrivals and departures are drawn as one multinomial
+    # sample instead. Exact, at NumPy speed instead of one step per iteration.
+    rng = np.random.default_rng([seed, block])
+    capacity = fork.free_by_level[0] + fork.parked_by_level[0]
+    leave_threshold = arrival_rate + departure_rate
+    probabilities = [arrival_rate, departure_rate, 1 - leave_threshold]
+    full_ats, turned_aways = [], []
+    for _ in range(count):
+        parked = fork.parked_by_level[0]
+        full_at = 0 if parked == capacity else -1
+        turned_away = 0
+        step = 0
+        while step < steps:
+            if time.perf_counter() > deadline:
+                return full_ats, turned_aways
+            leap = min(parked, capacity - parked, steps - step)
+            if leap >= WALK_LEAP_MIN:
+                arrivals, departures, _ = rng.multinomial(leap, probabilities)
+                parked += int(arrivals - departures)
+                if parked == capacity and full_at < 0:
+                    full_at = step + leap - 1  # Only an all-arrival leap ends full, on its last step
+                step += leap
+                continue
+            draws = rng.random(min(WALK_CHUNK, steps - step))
+            moves = (draws < arrival_rate).astype(np.int64) - ((draws >= arrival_rate) & (draws < leave_threshold))
+            walk = parked + np.cumsum(moves)
+            if 2 * parked >= capacity:
+                held = np.maximum.accumulate(np.maximum(walk - capacity, 0))  # Arrivals turned away so far
+                path = walk - held
+                crossing = np.flatnonzero(path < 0)  # Departures from an empty lot
+            else:
+                held = None
+                path = walk + np.maximum.accumulate(np.maximum(-walk, 0))
+                crossing = np.flatnonzero(path > capacity)  # Arrivals at a full lot
+            used = crossing[0] if crossing.size else len(moves)
+            if full_at < 0 and used:
+                filled = np.flatnonzero(path[:used] == capacity)
+                if filled.size:
+                    full_at = step + int(filled[0])
+            if used:
+                parked = int(path[used - 1])
+                if held is not None:
+                    turned_away += int(held[used - 1])
+            if crossing.size:
+                if held is None:
+                    turned_away += 1  # The crossing step was an arrival at a full lot
+                used += 1  # The crossing step leaves parked where it was
+            step += used
+        full_ats.append(full_at)
+        turned_aways.append(turned_away)
+    return full_ats, turned_aways
+
+
+def _run_block_levels(fork, steps, arrival_rate, departure_rate, count, seed, block, deadline):
+    # Multi-level lots. While every level has at least LEVEL_LEAP_SHARE times k free spots and
+    # parked vehicles, k steps are drawn as one leap: arrivals split evenly over the levels and
+    # departures in proportion to the parked counts at the start of the leap, which the leap
+    # moves by at most 1 / LEVEL_LEAP_SHARE. Nearer the barriers it steps exactly, like
+    # _run_block_python, on draws made a chunk at a time.
+    rng = np.random.default_rng([seed, block])
+    num_levels = len(fork.free_by_level)
+    leave_threshold = arrival_rate + departure_rate
+    probabilities = [arrival_rate, departure_rate, 1 - leave_threshold]
+    level_shares = [1 / num_levels] * num_levels
+    full_ats, turned_aways = [], []
+    for _ in range(count):
+        free = list(fork.free_by_level)
+        parked = list(fork.parked_by_level)
+        total_free, total_parked = sum(free), sum(parked)
+        full_at = 0 if total_free == 0 else -1
+        turned_away = 0
+        step = 0
+        while step < steps:
+            if time.perf_counter() > deadline:
+                return full_ats, turned_aways
+            leap = min(min(free), min(parked)) // LEVEL_LEAP_SHARE
+            leap = min(leap, steps - step)
+            if leap >= WALK_LEAP_MIN:
+                arrivals, departures, _ = rng.multinomial(leap, probabilities)
+                arrived = rng.multinomial(arrivals, level_shares)
+                departed = rng.multinomial(departures, [count / total_parked for count in parked])
+                for level in range(num_levels):
+                    change = int(arrived[level] - departed[level])
+                    free[level] -= change
+                    parked[level] += change
+                total_free, total_parked = sum(free), sum(parked)
+                step += leap
+                continue
+            chunk = min(STEP_CHUNK, steps - step)
+            actions = rng.random(chunk).tolist()
+            levels = rng.integers(num_levels, size=chunk).tolist()
+            picks = rng.random(chunk).tolist()
+            for offset in range(chunk):
+                action = actions[offset]
+                if action < arrival_rate:
+                    level = levels[offset]
+                    if free[level]:
+                        free[level] -= 1
+                        parked[level] += 1
+                        total_free -= 1
+                        total_parked += 1
+                        if not total_free and full_at < 0:
+                            full_at = step + offset
+                    else:
+                        turned_away += 1
+                elif action < leave_threshold and total_parked:
+                    # A departure is a random parked vehicle, so its level is picked in proportion to parked counts
+                    pick = min(int(picks[offset] * total_parked), total_parked - 1)
+                    level = 0
+                    while pick >= parked[level]:
+                        pick -= parked[level]
+                        level += 1
+                    parked[level] -= 1
+                    free[level] += 1
+                    total_free += 1
+                    total_parked -= 1
+            step += chunk
+        full_ats.append(full_at)
+        turned_aways.append(turned_away)
+    return full_ats, turned_aways
+
+
+def _run_block_python(fork, steps, arrival_rate, departure_rate, count, seed, block, deadline):
+    # Every step of every replication in plain Python, for when NumPy is not installed.
+    num_levels = len(fork.free_by_level)
+    leave_threshold = arrival_rate + departure_rate
+    full_ats, turned_aways = [], []
+    for replication in range(count):
+        rng = random.Random(f"{seed}-{block}-{replication}")
+        free = list(fork.free_by_level)
+        parked = list(fork.parked_by_level)
+        total_free, total_parked = sum(free), sum(parked)
+        full_at = 0 if total_free == 0 else -1
+        turned_away = 0
+        for chunk_start in range(0, steps, STEP_CHUNK):
+            if time.perf_counter() > deadline:
+                return full_ats, turned_aways
+            for step in range(chunk_start, min(chunk_start + STEP_CHUNK, steps)):
+                action = rng.random()
+                if action < arrival_rate:
+                    level = rng.randrange(num_levels)
+                    if free[level]:
+                        free[level] -= 1
+                        parked[level] += 1
+                        total_free -= 1
+                        total_parked += 1
+                        if not total_free and full_at < 0:
+                            full_at = step
+                    else:
+                        turned_away += 1
+                elif action < leave_threshold and total_parked:
+                    pick = rng.randrange(total_parked)
+                    level = 0
+                    while pick >= parked[level]:
+                        pick -= parked[level]
+                        level += 1
+                    parked[level] -= 1
+                    free[level] += 1
+                    total_free += 1
+                    total_parked -= 1
+        full_ats.append(full_at)
+        turned_aways.append(turned_away)
+    return full_ats, turned_aways
+
+
+def run_forecast(fork, horizon_seconds, step_seconds, arrival_rate, departure_rate,
+                 replications=200, seed=0, budget_seconds=0.25):
+    """
+    Run the lot simulation forward from fork on a virtual clock, one step every step_seconds
+    for horizon_seconds, in seeded replications. Each step is an arrival with probability
+    arrival_rate, a departure with probability departure_rate, or nothing. Replications run
+    in blocks until all are done or budget_seconds have passed; replications still running
+    at the deadline are dropped, so fewer may come back than were asked for (none when the
+    horizon is too long for the budget). The same seed gives the same replications.
+    """
+    if not all(math.isfinite(value) and value > 0 for value in (horizon_seconds, step_seconds)):
+        raise ValueError("horizon and update_interval must be positive numbers.")
+    if not all(0 <= rate <= 1 for rate in (arrival_rate, departure_rate)):
+        raise ValueError("arrival_rate and departure_rate must be between 0 and 1.")
+    # As in run_simulation, departures only get the probability arrivals leave over
+    departure_rate = min(departure_rate, 1 - arrival_rate)
+    if not 1 <= replications <= MAX_REPLICATIONS:
+        raise ValueError(f"replications must be between 1 and {MAX_REPLICATIONS}.")
+    steps = math.ceil(horizon_seconds / step_seconds)
+    if steps > MAX_STEPS:
+        raise ValueError(f"horizon covers {steps} steps; at most {MAX_STEPS} are simulated.")
+    if not fork.free_by_level:
+        raise ValueError(f"Parking lot '{fork.lot_name}' has no levels.")
+
+    if np is None:
+        run_block = _run_block_python
+    elif len(fork.free_by_level) == 1:
+        run_block = _run_block_walk
+    else:
+        run_block = _run_block_levels
+    started = time.perf_counter()
+    deadline = started + budget_seconds
+    full_ats, turned_aways = [], []
+    block = 0
+    while len(full_ats) < replications:
+        count = min(BLOCK_REPLICATIONS, replications - len(full_ats))
+        block_full_ats, block_turned_aways = run_block(
+            fork, steps, arrival_rate, departure_rate, count, seed, block, deadline
+        )
+        full_ats.extend(block_full_ats)
+        turned_aways.extend(block_turned_aways)
+        block += 1
+        if len(block_full_ats) < count:
+            break  # The budget ran out during the block
+
+    times_to_full = sorted(step * step_seconds for step in full_ats if step >= 0)
+    turned_aways.sort()
+    completed = len(full_ats)
+    return {
+        "lot_name": fork.lot_name,
+        "forked_at": fork.forked_at.isoformat(),
+        "horizon_seconds": horizon_seconds,
+        "update_interval": step_seconds,
+        "arrival_rate": arrival_rate,
+        "departure_rate": departure_rate,
+        "seed": seed,
+        "replications": completed,
+        "requested_replications": replications,
+        "truncated": completed < replications,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "initial": {
+            "free_spots": sum(fork.free_by_level),
+            "parked": sum(fork.parked_by_level),
+            "levels": [
+                {"level": level + 1, "free_spots": free, "parked": parked}
+                for level, (free, parked) in enumerate(zip(fork.free_by_level, fork.parked_by_level))
+            ],
+        },
+        # Seconds from the fork until no level can take an arrival, over the replications that filled up
+        "time_to_full": {
+            "probability": round(len(times_to_full) / completed, 4) if completed else None,
+            "p10": _percentile(times_to_full, 0.1),
+            "p50": _percentile(times_to_full, 0.5),
+            "p90": _percentile(times_to_full, 0.9),
+            "mean": round(sum(times_to_full) / len(times_to_full), 3) if times_to_full else None,
+        },
+        # Arrivals turned away from a full level within the horizon, over all replications
+        "turned_away": {
+            "p10": _percentile(turned_aways, 0.1),
+            "p50": _percentile(turned_aways, 0.5),
+            "p90": _percentile(turned_aways, 0.9),
+            "mean": round(sum(turned_aways) / completed, 3) if completed else None,
+            "max": turned_aways[-1] if completed else None,
+        },
+    }
@@ -1,67 +1,241 @@
-import os
-import time
+import argparse
 import random
-from typing import Dict
+import shutil
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional, TextIO
 from .engine import ParkingSimulation
 
+# ANSI control sequences; every frame is written as a single string
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+# Cell characters when every spot gets its own cell
+FREE, OCCUPIED, RESERVED, NEAREST, ENTRY = ".", "#", "R", "*", "E"
+# Occupied fraction of a tile, from empty to full, when a level is too large for one cell per spot
+DENSITY_RAMP = ".:-=+*%#@"
+HEADER_LINES = 4  # Title, statistics, last action and a blank line
+
+
+def move_to(row: int, col: int) -> str:
+    # Cursor position escape, 1-based.
+    return f"\x1b[{row};{col}H"
+
+
 class ConsoleVisualizer:
+    """
+    Terminal view of a lot that only rewrites the characters that changed since
+    the previous frame, using ANSI cursor moves. Each level gets a band of the
+    screen. Levels that fit are drawn one cell per spot; larger ones are drawn
+    from the lot's tile pyramid, one character per tile, so a frame costs
+    O(screen cells) however many spots the lot has.
+    """
+
+    def __init__(self, simulation: ParkingSimulation, stream: TextIO = sys.stdout):
+        self.simulation = simulation
+        self.stream = stream
+        self.frame: List[str] = []  # Lines currently on screen
+        self.screen_size = None
+
+    def start(self):
+        self.stream.write(HIDE_CURSOR + CLEAR_SCREEN)
+        self.frame = []
+
+    def finish(self):
+        # Leave the cursor below the drawing.
+        self.stream.write(move_to(len(self.frame) + 1, 1) + SHOW_CURSOR + "\n")
+        self.stream.flush()
+
+    def display_status(self, last_action: str = "", events_per_second: Optional[float] = None):
+        # Draw the current state, writing only the changed characters.
+        size = shutil.get_terminal_size(fallback=(100, 40))
+        if size != self.screen_size:
+            # Resized: positions of everything moved, so start from a clear screen
+            self.screen_size = size
+            self.stream.write(CLEAR_SCREEN)
+            self.frame = []
+        lines = self.build_frame(size.columns, size.lines, last_action, events_per_second)
+        self.stream.write(self.diff(self.frame, lines))
+        self.stream.flush()
+        self.frame = lines
+
+    def build_frame(self, columns: int, rows: int, last_action: str = "",
+                    events_per_second: Optional[float] = None) -> List[str]:
+        simulation = self.simulation
+        system = simulation.system
+        system.sync_shared_state()
+        system.expire_reservations()
+        occupied = system.get_total_occupied_spots()
+        total = simulation.total_spots
+        rate = f"{events_per_second:,.0f} events/s" if events_per_second is not None else ""
+        lines = [
+            f"=== SpotOn: {simulation.lot_name} === {datetime.now().strftime('%H:%M:%S')} {rate}",
+            f"Spots {total}  Occupied {occupied}  Available {total - occupied}  "
+            f"Occupancy {occupied / total * 100 if total else 0:.1f}%",
+            f"Last action: {last_action}",
+            "",
+        ]
+        num_levels = simulation.num_levels
+        band_rows = max((rows - HEADER_LINES - 1) // max(num_levels, 1) - 1, 1)
+        for level in range(num_levels):
+            lines.extend(self.level_lines(level, columns, band_rows))
+        return [line[:columns] for line in lines[:rows - 1]]
+
+    def level_lines(self, level: int, columns: int, band_rows: int) -> List[str]:
+        # Header plus up to band_rows rows for one level.
+        parking_lot = self.simulation.system.parking_lot
+        bounds = parking_lot.level_bounds.get(level)
+        occupied = parking_lot.occupied_by_level.get(level, 0)
+        header = f"Level {level + 1}: {len(parking_lot.levels.get(level, []))} spots, {occupied} occupied"
+        if bounds is None:
+            return [header]
+        min_x, min_y, max_x, max_y = bounds
+        if max_x - min_x + 1 <= columns and max_y - min_y + 1 <= band_rows:
+            return [header] + self.spot_rows(level, bounds)
+        return [header + " (one character per tile)"] + self.tile_rows(level, columns, band_rows)
+
+    def spot_rows(self, level: int, bounds: List[int]) -> List[str]:
+        simulation = self.simulation
+        parking_lot = simulation.system.parking_lot
+        min_x, min_y, max_x, max_y = bounds
+        grid = [[" "] * (max_x - min_x + 1) for _ in range(max_y - min_y + 1)]
+        spots = parking_lot.spots
+        coordinates = parking_lot.spot_coordinates
+        for spot_id in parking_lot.levels.get(level, []):
+            spot = spots[spot_id]
+            x, y = coordinates[spot_id]
+            grid[y - min_y][x - min_x] = OCCUPIED if spot.is_occupied else RESERVED if spot.is_reserved else FREE
+        nearest = parking_lot.handle_of(simulation.nearest_spot_ids.get(level))
+        if nearest is not None and not spots[nearest].is_occupied:
+            x, y = coordinates[nearest]
+            grid[y - min_y][x - min_x] = NEAREST
+        entry_point = simulation.current_entry_points.get(level)
+        if entry_point is not None:
+            x, y = entry_point
+            grid[y - min_y][x - min_x] = ENTRY
+        return ["".join(row) for row in grid]
+
+    def tile_rows(self, level: int, columns: int, band_rows: int) -> List[str]:
+        # Finest zoom whose tiles fit the band, from the incrementally maintained pyramid.
+        parking_lot = self.simulation.system.parking_lot
+        pyramid = parking_lot.tile_pyramid(level)
+        bounds = parking_lot.level_bounds[level]
+        span_x, span_y = bounds[2] - pyramid.origin[0] + 1, bounds[3] - pyramid.origin[1] + 1
+        zoom = pyramid.max_zoom
+        while zoom > 0:
+            size = pyramid.tile_size(zoom)
+            if -(-span_x // size) <= columns and -(-span_y // size) <= band_rows:
+                break
+            zoom -= 1
+        size = pyramid.tile_size(zoom)
+        width, height = min(-(-span_x // size), columns), min(-(-span_y // size), band_rows)
+        grid = [[" "] * width for _ in range(height)]
+        top = len(DENSITY_RAMP) - 1
+        for tile_x, tile_y, spots, occupied in pyramid.tiles(zoom, (0, 0, width - 1, height - 1)):
+            grid[tile_y][tile_x] = DENSITY_RAMP[occupied * top // spots] if spots else " "
+        return ["".join(row) for row in grid]
+
     @staticmethod
-    def clear_screen():
-        os.system('cls' if os.name == 'nt' else 'clear')
-    
-    @staticmethod
-    def display_status(simulation: ParkingSimulation, last_action: str = ""): # show status in console
-        ConsoleVisualizer.clear_screen()
-        status = simulation.get_current_status()
-        
-        print("\n=== SpotOn Parking System Status ===")
-        print(f"Time: {status['timestamp'].strftime('%H:%M:%S')}")
-        print("=" * 40)
-        
-        for level, spots in status['spots_by_level'].items(): # show parking layout
-            print(f"\nLevel {level + 1}:")
-            print("-" * 20)
-            
-            for i in range(0, len(spots), 5): # show only 5 spots per line
-                line = ""
-                for spot in spots[i:i+5]:
-                    line += "[X] " if spot.is_occupied else "[ ] "
-                print(line)
-        
-        print("\n=== Statistics ===") # display stats - recharts use case
-        print(f"Total Spots: {status['total_spots']}")
-        print(f"Occupied Spots: {status['occupied_spots']}")
-        print(f"Available Spots: {status['available_spots']}")
-        print(f"Occupancy Rate: {status['occupancy_rate']:.1f}%")
-        
-        if last_action:
-            print("\nLast Action:", last_action)
-        print("=" * 40)
-
-def run_simulation(duration_seconds: int = 60, update_interval: float = 2.0):
-    simulation = ParkingSimulation(num_levels=3, spots_per_level=10)
-    
-    print(f"\nStarting simulation for {duration_seconds} seconds...")
-    print("Press Ctrl+C to stop the simulation")
-    
-    start_time = time.time()
+    def diff(previous: List[str], lines: List[str]) -> str:
+        # Escape sequences that turn the previous frame into this one, changed runs only.
+        output = []
+        for row, line in enumerate(lines):
+            old = previous[row] if row < len(previous) else ""
+            if line == old:
+                continue
+            width = max(len(line), len(old))
+            line, old = line.ljust(width), old.ljust(width)
+            col = 0
+            while col < width:
+                if line[col] == old[col]:
+                    col += 1
+                    continue
+                end = col
+                while end < width and line[end] != old[end]:
+                    end += 1
+                output.append(move_to(row + 1, col + 1) + line[col:end])
+                col = end
+        for row in range(len(lines), len(previous)):
+            output.append(move_to(row + 1, 1) + "\x1b[2K")  # Erase lines the frame no longer uses
+        return "".join(output)
+
+
+def run_simulation(simulation: ParkingSimulation, duration_seconds: float = 60, update_interval: float = 0.0,
+                   arrival_rate: float = 0.7, fps: float = 10.0, headless: bool = False,
+                   stream: TextIO = sys.stdout):
+    """
+    Run arrivals and departures as fast as update_interval allows. The screen is
+    redrawn at most fps times a second however fast events run; headless runs skip
+    drawing and print the event rate once a second instead.
+    """
+    visualizer = None if headless else ConsoleVisualizer(simulation, stream)
+    frame_interval = 1.0 / fps if fps > 0 else 0.0
+    start_time = last_report = time.perf_counter()
+    events = events_at_report = 0
+    events_per_second = 0.0
+    action = ""
+    if visualizer:
+        visualizer.start()
     try:
-        while time.time() - start_time < duration_seconds:
-            # simulation time!
-            if random.random() < 0.7: # 70% chance of arrival
-                vehicle_id, success = simulation.simulate_vehicle_arrival()
-                action = f"Vehicle {vehicle_id} arrived and {'found' if success else 'failed to find'} a spot"
+        while time.perf_counter() - start_time < duration_seconds:
+            if random.random() < arrival_rate:
+                vehicle_id, success, level = simulation.simulate_vehicle_arrival()
+                action = f"Vehicle {vehicle_id} {'parked' if success else 'found no spot'} on level {level}"
             else:
                 success = simulation.simulate_vehicle_departure()
-                action = f"Vehicle departure was {'successful' if success else 'failed'}"
-            
-            ConsoleVisualizer.display_status(simulation, action)
-            time.sleep(update_interval)
-            
+                action = f"Departure {'succeeded' if success else 'failed'}"
+            events += 1
+
+            now = time.perf_counter()
+            if now - last_report >= (frame_interval if visualizer else 1.0):
+                events_per_second = (events - events_at_report) / (now - last_report)
+                events_at_report, last_report = events, now
+                if visualizer:
+                    visualizer.display_status(action, events_per_second)
+                else:
+                    stream.write(f"{events:,} events, {events_per_second:,.0f} events/s, "
+                                 f"{simulation.system.get_total_occupied_spots()} occupied\n")
+                    stream.flush()
+            if update_interval:
+                time.sleep(update_interval)
     except KeyboardInterrupt:
-        print("\nSimulation stopped by user")
-    
-    print("\nSimulation completed!")
+        pass
+    finally:
+        if visualizer:
+            visualizer.display_status(action, events_per_second)
+            visualizer.finish()
+    elapsed = time.perf_counter() - start_time
+    stream.write(f"Simulation completed: {events:,} events in {elapsed:.1f}s "
+                 f"({events / elapsed if elapsed else 0:,.0f} events/s).\n")
+    return events
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a SpotOn simulation in the terminal.")
+    parser.add_argument("--levels", type=int, default=3)
+    parser.add_argument("--multi-level", action="store_true", help="find spots by BFS instead of distance order")
+    parser.add_argument("--layout", help="CSV/JSON lot map; a random grid per level is generated without one")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds to sleep between events")
+    parser.add_argument("--arrival-rate", type=float, default=0.7, help="chance an event is an arrival")
+    parser.add_argument("--fps", type=float, default=10.0, help="most frames drawn per second")
+    parser.add_argument("--headless", action="store_true", help="skip drawing and report events per second")
+    args = parser.parse_args(argv)
+
+    simulation = ParkingSimulation(
+        "Console", args.levels, args.multi_level, "Terminal", layout_path=args.layout
+    )
+    run_simulation(
+        simulation,
+        duration_seconds=args.duration,
+        update_interval=args.interval,
+        arrival_rate=args.arrival_rate,
+        fps=args.fps,
+        headless=args.headless,
+    )
+
 
 if __name__ == "__main__":
-    run_simulation()
\ No newline at end of file
+    main()
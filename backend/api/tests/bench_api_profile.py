@@ -0,0 +1,125 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+PROFILES = {
+    "full": "backend.settings",
+    "api": "backend.settings_api",
+}
+MIX = "park=4,remove=4,parking_grid=2"
+
+
+def run_child(settings_module, lot_name, requests, concurrency):
+    """Start the ASGI stack for settings_module in this fresh process and time it."""
+    start = time.perf_counter()
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    sys.path.insert(0, str(BACKEND_DIR))  # backend/ for `api` imports
+    import loadtest  # Runs django.setup()
+
+    from django.core.asgi import get_asgi_application
+    from django.db import connections
+
+    get_asgi_application()
+    loaded = time.perf_counter()
+    logging.getLogger("api").setLevel(logging.ERROR)
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+
+    # The first request also imports the URL conf and api.views, and builds the lot
+    mix = loadtest.RequestMix(lot_name, loadtest.parse_mix(MIX), seed=42)
+    loadtest.LoadTest(mix, interface="asgi", concurrency=1, requests=1, warmup=0).run()
+    first_request = time.perf_counter()
+
+    results, elapsed = loadtest.LoadTest(
+        mix, interface="asgi", concurrency=concurrency, requests=requests, warmup=200
+    ).run()
+    latencies = sorted(latency for series in results.latencies.values() for latency in series)
+    print(json.dumps({
+        "setup_seconds": loaded - start,
+        "first_request_seconds": first_request - loaded,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": loadtest.percentile(latencies, 50) / 1e6,
+        "p99_ms": loadtest.percentile(latencies, 99) / 1e6,
+        "modules": len(sys.modules),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "db_connections": sum(connections[alias].connection is not None for alias in connections),
+        "statuses": sorted({code for series in results.statuses.values() for code in series}),
+    }))
+
+
+class ApiProfileBenchmark:
+    """
+    Compares the full Django stack (backend.settings) with the API-only profile
+    (backend.settings_api). Each run is a fresh interpreter, which starts the ASGI
+    application and then drives loadtest.py's request mix through it in-process.
+    """
+
+    def __init__(self, repetitions=5, requests=3000, concurrency=8, lot_name="SM Aura"):
+        self.repetitions = repetitions
+        self.requests = requests
+        self.concurrency = concurrency
+        self.lot_name = lot_name
+
+    def measure(self, settings_module):
+        runs = []
+        for _ in range(self.repetitions):
+            output = subprocess.run(
+                [
+                    sys.executable, __file__, "--child", settings_module, "--lot", self.lot_name,
+                    "--requests", str(self.requests), "--concurrency", str(self.concurrency),
+                ],
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        return runs
+
+    def run(self):
+        print(
+            f"\nASGI, {self.requests} requests ({MIX}) x{self.concurrency} on '{self.lot_name}', "
+            f"median of {self.repetitions} processes"
+        )
+        print(
+            f"{'profile':<8}{'setup ms':>10}{'1st req ms':>12}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'modules':>9}{'RSS MB':>8}{'DB conns':>10}  statuses"
+        )
+        print("=" * 100)
+        for profile, settings_module in PROFILES.items():
+            runs = self.measure(settings_module)
+
+            def median(key):
+                return statistics.median(run[key] for run in runs)
+
+            print(
+                f"{profile:<8}{median('setup_seconds') * 1000:>10.1f}{median('first_request_seconds') * 1000:>12.1f}"
+                f"{median('requests_per_second'):>9,.0f}{median('p50_ms'):>9.3f}{median('p99_ms'):>9.3f}"
+                f"{median('modules'):>9.0f}{median('max_rss_mb'):>8.1f}{max(run['db_connections'] for run in runs):>10}"
+                f"  {', '.join(map(str, runs[0]['statuses']))}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full Django stack vs. the API-only profile.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lot", default="SM Aura")
+    parser.add_argument("--child", metavar="SETTINGS_MODULE", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_child(args.child, args.lot, args.requests, args.concurrency)
+        return
+    ApiProfileBenchmark(args.repetitions, args.requests, args.concurrency, args.lot).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.ingestion import QueueFull
+from api.core.lotmanager import ParkingLotManager
+
+LOT_NAME = "Gate Lot"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class GateBenchmark:
+    """
+    Synthetic burst load from many gate controllers at once: every controller sends
+    bursts_per_gate bursts of burst_size arrivals followed by the matching departures.
+    Direct calls park and remove one vehicle per call under the write lock; queued
+    calls submit each burst as one request and the lot's worker applies them in batches.
+    """
+
+    def __init__(self, num_gates=16, bursts_per_gate=20, burst_size=25, batch_sizes=(1, 32, 256), queue_depth=10000,
+                 grid_size=60):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.layout_path = self.write_layout(grid_size)
+        self.num_gates = num_gates
+        self.bursts_per_gate = bursts_per_gate
+        self.burst_size = burst_size
+        self.batch_sizes = batch_sizes
+        self.queue_depth = queue_depth
+
+    def write_layout(self, grid_size):
+        """A one-level grid_size x grid_size lot of spots, so bursts never fill it."""
+        path = Path(self.workdir.name) / "gate-lot.csv"
+        rows = ["spot_id,level,x,y,type"] + [
+            f"S-{x}-{y},1,{x},{y},spot" for x in range(grid_size) for y in range(grid_size)
+        ]
+        path.write_text("\n".join(rows) + "\n")
+        return str(path)
+
+    def new_manager(self, shared=False, **options):
+        # Shared lots keep occupancy in a memory-mapped region behind a cross-process lock
+        if shared:
+            options["shared_state_dir"] = tempfile.mkdtemp(dir=self.workdir.name)
+        manager = ParkingLotManager(**options)
+        manager.add_parking_lot(
+            LOT_NAME, num_levels=1, is_multi_level=False, address="benchmark", layout_path=self.layout_path
+        )
+        manager.get_parking_lot(LOT_NAME).total_spots  # Build before timing
+        return manager
+
+    def bursts(self, gate):
+        for burst in range(self.bursts_per_gate):
+            vehicle_ids = [f"G{gate}-{burst}-{i}" for i in range(self.burst_size)]
+            yield (
+                [("arrival", vehicle_id, 0) for vehicle_id in vehicle_ids]
+                + [("departure", vehicle_id, 0) for vehicle_id in vehicle_ids]
+            )
+
+    def run_gates(self, gate):
+        threads = [threading.Thread(target=gate, args=(index,)) for index in range(self.num_gates)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def measure_direct(self, shared):
+        """Each gate waits for every park/remove call before sending the next one."""
+        system = self.new_manager(shared).get_parking_lot(LOT_NAME).system
+        latencies = []
+
+        def gate(index):
+            own = []
+            for burst in self.bursts(index):
+                for command, vehicle_id, preferred_level in burst:
+                    started = time.perf_counter()
+                    if command == "arrival":
+                        system.park_vehicle(vehicle_id, preferred_level)
+                    else:
+                        system.remove_vehicle(vehicle_id)
+                    own.append(time.perf_counter() - started)
+            latencies.extend(own)
+
+        elapsed = self.run_gates(gate)
+        return len(latencies) / elapsed, latencies
+
+    def measure_queued(self, shared, batch_size, queue_depth):
+        """Each gate submits a burst, keeps its tickets and collects every result at the end."""
+        manager = self.new_manager(shared, gate_batch_size=batch_size, gate_queue_depth=queue_depth)
+        acks, tickets, rejected = [], [], [0]
+
+        def gate(index):
+            own_acks, own_tickets, own_rejected = [], [], 0
+            for burst in self.bursts(index):
+                started = time.perf_counter()
+                try:
+                    own_tickets.extend(manager.submit_gate_commands(LOT_NAME, burst)[0])
+                except QueueFull:
+                    own_rejected += len(burst)
+                own_acks.append(time.perf_counter() - started)
+            acks.extend(own_acks)
+            tickets.extend(own_tickets)
+            rejected[0] += own_rejected
+
+        start = time.perf_counter()
+        self.run_gates(gate)
+        results = manager.get_gate_results(LOT_NAME, tickets, timeout=600)
+        elapsed = time.perf_counter() - start
+        return {
+            "throughput": len(results) / elapsed,
+            "acks": acks,
+            "queued": [result["queued_seconds"] for result in results],
+            "completed": [result["completed_seconds"] for result in results],
+            "rejected": rejected[0],
+            "unfinished": sum(result["status"] in ("pending", "unknown") for result in results),
+        }
+
+    def run(self):
+        for shared in (False, True):
+            self.run_mode(shared)
+
+        print("\nBackpressure (queue depth 500):")
+        print("=" * 78)
+        run = self.measure_queued(False, max(self.batch_sizes), 500)
+        accepted = len(run["queued"])
+        print(
+            f"accepted {accepted:,}, rejected {run['rejected']:,} with QueueFull, "
+            f"queue delay p99 {percentile(run['queued'], 0.99) * 1000:.1f} ms, "
+            f"mean ack {statistics.mean(run['acks']) * 1000:.3f} ms"
+        )
+        self.workdir.cleanup()
+
+    def run_mode(self, shared):
+        commands = self.num_gates * self.bursts_per_gate * self.burst_size * 2
+        print(
+            f"\nGate ingestion{', shared occupancy' if shared else ''}: {self.num_gates} gates, "
+            f"{commands:,} commands in bursts of {self.burst_size * 2}"
+        )
+        print("=" * 78)
+        throughput, latencies = self.measure_direct(shared)
+        print(
+            f"{'direct calls':<22}{throughput:>10,.0f} cmd/s  "
+            f"per call p50 {percentile(latencies, 0.5) * 1000:.3f} ms  p99 {percentile(latencies, 0.99) * 1000:.3f} ms"
+        )
+        for batch_size in self.batch_sizes:
+            run = self.measure_queued(shared, batch_size, self.queue_depth)
+            print(
+                f"{f'queued, batch {batch_size}':<22}{run['throughput']:>10,.0f} cmd/s  "
+                f"ack p50 {percentile(run['acks'], 0.5) * 1000:.3f} ms  p99 {percentile(run['acks'], 0.99) * 1000:.3f} ms"
+            )
+            print(
+                f"{'':<22}{'':>16}queue delay p50 {percentile(run['queued'], 0.5) * 1000:.1f} ms  "
+                f"p99 {percentile(run['queued'], 0.99) * 1000:.1f} ms  "
+                f"done p99 {percentile(run['completed'], 0.99) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    GateBenchmark().run()
@@ -0,0 +1,58 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.sharding import ShardedParkingLotManager
+
+
+class ShardingBenchmark:
+    def __init__(self, shard_counts=(1, 2, 4), num_lots=8, num_clients=8, operations_per_client=200):
+        self.shard_counts = shard_counts
+        self.num_lots = num_lots
+        self.num_clients = num_clients
+        self.operations_per_client = operations_per_client
+
+    def client(self, manager, client_index, lot_names):
+        """Park and immediately remove vehicles, cycling through every lot."""
+        for i in range(self.operations_per_client):
+            lot = manager.get_parking_lot(lot_names[(client_index + i) % len(lot_names)])
+            vehicle_id = f"C{client_index}-{i}"
+            if lot.system.park_vehicle(vehicle_id, 0):
+                lot.system.remove_vehicle(vehicle_id)
+
+    def run_once(self, num_shards):
+        manager = ShardedParkingLotManager(num_shards)
+        try:
+            lot_names = [f"Lot {i}" for i in range(self.num_lots)]
+            for lot_name in lot_names:
+                manager.add_parking_lot(lot_name, num_levels=5, is_multi_level=True, address="benchmark")
+
+            clients = [
+                threading.Thread(target=self.client, args=(manager, index, lot_names))
+                for index in range(self.num_clients)
+            ]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            manager.close()
+
+        operations = self.num_clients * self.operations_per_client * 2  # park + remove
+        return operations / elapsed
+
+    def run(self):
+        print("\nSharded ParkingLotManager throughput:")
+        print("=" * 50)
+        for num_shards in self.shard_counts:
+            throughput = self.run_once(num_shards)
+            print(f"{num_shards} shard(s): {throughput:,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    ShardingBenchmark().run()
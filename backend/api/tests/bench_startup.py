@@ -0,0 +1,79 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BACKEND_DIR))  # backend/ for `api` imports
+
+from api.core.lotmanager import ParkingLotManager
+
+# Runs in a fresh interpreter so nothing is already imported or built.
+COLD_START_SCRIPT = """
+import json, os, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+import django
+django.setup()
+from api import views
+imported = time.perf_counter()
+first_access = {}
+for lot_name in views.parking_lot_manager.lot_descriptors:
+    lot_start = time.perf_counter()
+    views.parking_lot_manager.get_parking_lot(lot_name)
+    first_access[lot_name] = time.perf_counter() - lot_start
+print(json.dumps({"import_seconds": imported - start, "first_access_seconds": first_access}))
+"""
+
+
+class StartupBenchmark:
+    def __init__(self, repetitions=5, registration_sizes=(10, 100, 1000, 10000)):
+        self.repetitions = repetitions
+        self.registration_sizes = registration_sizes
+
+    def measure_cold_start(self):
+        """Time `django.setup()` plus importing api.views in a new process."""
+        runs = []
+        for _ in range(self.repetitions):
+            output = subprocess.run(
+                [sys.executable, "-c", COLD_START_SCRIPT],
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        return runs
+
+    def measure_registration(self, num_lots):
+        """Time registering num_lots lots and building one of them."""
+        manager = ParkingLotManager()
+        start = time.perf_counter()
+        for i in range(num_lots):
+            manager.add_parking_lot(f"Lot {i}", num_levels=3, is_multi_level=True, address="benchmark")
+        registered = time.perf_counter()
+        manager.get_parking_lot("Lot 0")
+        built = time.perf_counter()
+        return registered - start, built - registered
+
+    def run(self):
+        print("\nCold start (django.setup + import api.views):")
+        print("=" * 50)
+        runs = self.measure_cold_start()
+        import_times = [run["import_seconds"] for run in runs]
+        print(f"median {statistics.median(import_times) * 1000:.1f} ms over {len(runs)} runs")
+        for lot_name in runs[0]["first_access_seconds"]:
+            first_access = statistics.median(run["first_access_seconds"][lot_name] for run in runs)
+            print(f"  first access '{lot_name}': {first_access * 1000:.2f} ms")
+
+        print("\nLot registration vs. lot count:")
+        print("=" * 50)
+        for num_lots in self.registration_sizes:
+            registration, first_build = self.measure_registration(num_lots)
+            print(f"{num_lots:>6} lots: register {registration * 1000:.2f} ms, first build {first_build * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    StartupBenchmark().run()
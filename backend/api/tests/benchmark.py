@@ -0,0 +1,206 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.system import SpotOnSystem
+from api.core.distances import manhattan_distances
+from api.core.layout_loader import paused_gc
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+
+# Allocation strategies: name to the SpotOnSystem options that select it.
+STRATEGIES = {
+    "priority_queue": {"is_multi_level": False},
+    "bitmap": {"is_multi_level": False, "allocation_backend": "bitmap"},
+    "bfs": {"is_multi_level": True},
+}
+
+
+def percentile(samples: List[int], pct: float) -> float:
+    """Nearest-rank percentile of samples (already sorted)."""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return float(samples[rank - 1])
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Latency summary in microseconds."""
+    samples = sorted(samples_ns)
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "mean_us": total / len(samples) / 1000 if samples else 0.0,
+        "p50_us": percentile(samples, 50) / 1000,
+        "p90_us": percentile(samples, 90) / 1000,
+        "p99_us": percentile(samples, 99) / 1000,
+        "max_us": samples[-1] / 1000 if samples else 0.0,
+        "ops_per_sec": len(samples) / (total / 1e9) if total else 0.0,
+    }
+
+
+class AllocationBenchmark:
+    """
+    Drives SpotOnSystem park/remove workloads on square single-level lots and
+    records per-operation latency with perf_counter_ns.
+    """
+
+    def __init__(self, sizes=None, strategies=None, operations=200, warmup=20, repetitions=3,
+                 occupancy=0.5, seed=42):
+        self.sizes = sizes or DEFAULT_SIZES
+        self.strategies = strategies or list(STRATEGIES)
+        self.operations = operations
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.occupancy = occupancy
+        self.seed = seed
+
+    def build_system(self, strategy: str, size: int, rng: random.Random) -> SpotOnSystem:
+        """Square grid of `size` spots with the entry point just outside one corner."""
+        system = SpotOnSystem(**STRATEGIES[strategy])
+        side = math.ceil(math.sqrt(size))
+        coordinates = [(i % side, i // side) for i in range(size)]
+        entry_point = (-1, 0)
+        xs = [x for x, _ in coordinates]
+        ys = [y for _, y in coordinates]
+        system.parking_lot.set_entry_point(0, entry_point)
+        system.parking_lot.add_parking_spots_bulk(
+            [f"S{i}" for i in range(size)],
+            [0] * size,
+            manhattan_distances(xs, ys, entry_point),
+            coordinates,
+        )
+        occupied = rng.sample(range(size), int(size * self.occupancy))
+        with paused_gc():
+            handles = system.parking_lot.spot_handles
+            system.occupy_spots_bulk((handles[f"S{i}"], f"P{i}") for i in occupied)
+        return system
+
+    def run_workload(self, system: SpotOnSystem, rng: random.Random, count: int, samples: Dict[str, List[int]]):
+        """Alternate parking a new vehicle and removing a random parked one."""
+        perf_counter_ns = time.perf_counter_ns
+        parked = list(system.vehicle_to_spot)
+        for i in range(count):
+            if i % 2 == 0 or not parked:
+                vehicle_id = f"B{i}-{rng.random()}"
+                start = perf_counter_ns()
+                spot_id = system.park_vehicle(vehicle_id, 0)
+                elapsed = perf_counter_ns() - start
+                if spot_id:
+                    parked.append(vehicle_id)
+                    samples["park"].append(elapsed)
+                else:
+                    samples["park_failed"].append(elapsed)
+            else:
+                vehicle_id = parked.pop(rng.randrange(len(parked)))
+                start = perf_counter_ns()
+                system.remove_vehicle(vehicle_id)
+                samples["remove"].append(perf_counter_ns() - start)
+
+    def run_case(self, strategy: str, size: int) -> Dict[str, Dict[str, float]]:
+        samples = {"park": [], "park_failed": [], "remove": []}
+        for repetition in range(self.repetitions):
+            rng = random.Random(f"{self.seed}:{strategy}:{size}:{repetition}")
+            system = self.build_system(strategy, size, rng)
+            self.run_workload(system, rng, self.warmup, {"park": [], "park_failed": [], "remove": []})
+            self.run_workload(system, rng, self.operations, samples)
+        return {operation: summarize(values) for operation, values in samples.items() if values}
+
+    def run(self) -> Dict:
+        results = {}
+        for strategy in self.strategies:
+            for size in self.sizes:
+                key = f"{strategy}/{size}"
+                print(f"Running {key} ...", flush=True)
+                results[key] = self.run_case(strategy, size)
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "operations": self.operations,
+                "warmup": self.warmup,
+                "repetitions": self.repetitions,
+                "occupancy": self.occupancy,
+                "seed": self.seed,
+            },
+            "results": results,
+        }
+
+
+def print_report(report: Dict):
+    print(f"\n{'case':<24}{'op':<13}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'max us':>11}{'ops/s':>11}")
+    print("=" * 89)
+    for key, operations in report["results"].items():
+        for operation, stats in operations.items():
+            print(
+                f"{key:<24}{operation:<13}{stats['p50_us']:>10.1f}{stats['p90_us']:>10.1f}"
+                f"{stats['p99_us']:>10.1f}{stats['max_us']:>11.1f}{stats['ops_per_sec']:>11,.0f}"
+            )
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Cases whose p50 or p99 grew by more than threshold (a fraction) over the baseline."""
+    regressions = []
+    for key, operations in report["results"].items():
+        for operation, stats in operations.items():
+            previous = baseline.get("results", {}).get(key, {}).get(operation)
+            if not previous:
+                continue
+            for metric in ("p50_us", "p99_us"):
+                if previous[metric] and stats[metric] > previous[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{key} {operation} {metric}: {previous[metric]:.1f} -> {stats[metric]:.1f} us"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SpotOn allocation strategies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--operations", type=int, default=200, help="measured operations per repetition")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured operations per repetition")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--occupancy", type=float, default=0.5, help="fraction of spots filled before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = AllocationBenchmark(
+        sizes=args.sizes,
+        strategies=args.strategies,
+        operations=args.operations,
+        warmup=args.warmup,
+        repetitions=args.repetitions,
+        occupancy=args.occupancy,
+        seed=args.seed,
+    ).run()
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+
+from benchmark import percentile
+
+HOST = "localhost"  # Accepted by ALLOWED_HOSTS while DEBUG is on
+
+
+class RequestMix:
+    """
+    Picks the next request by weight and tracks which vehicles are parked so
+    removes target real vehicles. Shared by every worker.
+    """
+
+    def __init__(self, lot_name, weights, level=1, seed=None):
+        self.lot_name = lot_name
+        self.level = level
+        self.endpoints = list(weights)
+        self.weights = [weights[endpoint] for endpoint in self.endpoints]
+        self.rng = random.Random(seed)
+        self.parked = deque()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def next_request(self):
+        """Return (endpoint, method, path, query_string, body)."""
+        with self.lock:
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            if endpoint == "remove" and not self.parked:
+                endpoint = "park"
+            if endpoint == "park":
+                vehicle_id = f"LOAD-{next(self.counter)}"
+                body = {"vehicle_id": vehicle_id, "lot_name": self.lot_name, "preferred_level": 0}
+                return endpoint, "POST", "/api/park/", "", body
+            if endpoint == "remove":
+                body = {"vehicle_id": self.parked.popleft(), "lot_name": self.lot_name}
+                return endpoint, "POST", "/api/remove/", "", body
+        return endpoint, "GET", f"/api/parking_grid/{self.lot_name}/", f"level={self.level}", None
+
+    def completed(self, endpoint, body, status_code):
+        # Only vehicles the API actually parked become candidates for removal
+        if endpoint == "park" and status_code == 200:
+            with self.lock:
+                self.parked.append(body["vehicle_id"])
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # endpoint to latencies in ns
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, status_code, elapsed_ns):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed_ns)
+            self.statuses[endpoint][status_code] += 1
+
+
+def wsgi_environ(method, path, query_string, body):
+    payload = json.dumps(body).encode() if body is not None else b""
+    return {
+        "REQUEST_METHOD": method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": query_string,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(payload)),
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": HOST,
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(payload),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def asgi_scope(method, path, query_string, payload):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", HOST.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+
+
+class LoadTest:
+    """
+    Drives the real URL config in-process through Django's WSGI or ASGI handler.
+    Nothing goes over a socket, so the numbers are the framework and view cost
+    of a single worker.
+    """
+
+    def __init__(self, mix, interface="wsgi", concurrency=8, requests=2000, warmup=100):
+        self.mix = mix
+        self.interface = interface
+        self.concurrency = concurrency
+        self.requests = requests
+        self.warmup = warmup
+
+    def run(self):
+        runner = self.run_wsgi if self.interface == "wsgi" else self.run_asgi
+        runner(self.warmup, Results())
+        results = Results()
+        start = time.perf_counter()
+        runner(self.requests, results)
+        return results, time.perf_counter() - start
+
+    def run_wsgi(self, total, results):
+        handler = WSGIHandler()
+        remaining = itertools.count()
+
+        def worker():
+            while next(remaining) < total:
+                endpoint, method, path, query_string, body = self.mix.next_request()
+                response_status = []
+                start = time.perf_counter_ns()
+                response = handler(
+                    wsgi_environ(method, path, query_string, body),
+                    lambda status, headers, exc_info=None: response_status.append(status),
+                )
+                for _ in response:  # Drain the body so rendering is included
+                    pass
+                response.close()
+                status_code = int(response_status[0].split()[0])
+                results.record(endpoint, status_code, time.perf_counter_ns() - start)
+                self.mix.completed(endpoint, body, status_code)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(self.concurrency)]:
+                future.result()
+
+    def run_asgi(self, total, results):
+        asyncio.run(self._run_asgi(total, results))
+
+    async def _run_asgi(self, total, results):
+        handler = ASGIHandler()
+        remaining = itertools.count()
+
+        async def request(endpoint, method, path, query_string, body):
+            payload = json.dumps(body).encode() if body is not None else b""
+            disconnected = asyncio.Event()
+            response_status = []
+            sent_request = False
+
+            async def receive():
+                nonlocal sent_request
+                if not sent_request:
+                    sent_request = True
+                    return {"type": "http.request", "body": payload, "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    response_status.append(message["status"])
+
+            start = time.perf_counter_ns()
+            await handler(asgi_scope(method, path, query_string, payload), receive, send)
+            results.record(endpoint, response_status[0], time.perf_counter_ns() - start)
+            disconnected.set()
+            self.mix.completed(endpoint, body, response_status[0])
+
+        async def worker():
+            while next(remaining) < total:
+                await request(*self.mix.next_request())
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+
+def print_report(results, elapsed, interface, concurrency):
+    total = sum(len(latencies) for latencies in results.latencies.values())
+    print(f"\n{interface.upper()} x{concurrency}: {total} requests in {elapsed:.2f} s ({total / elapsed:,.0f} req/s)")
+    print(f"{'endpoint':<14}{'count':>7}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    print("=" * 76)
+    for endpoint, latencies in sorted(results.latencies.items()):
+        latencies.sort()
+        statuses = ", ".join(f"{code}: {count}" for code, count in sorted(results.statuses[endpoint].items()))
+        print(
+            f"{endpoint:<14}{len(latencies):>7}{len(latencies) / elapsed:>10,.0f}"
+            f"{percentile(latencies, 50) / 1e6:>9.2f}{percentile(latencies, 95) / 1e6:>9.2f}"
+            f"{percentile(latencies, 99) / 1e6:>9.2f}  {statuses}"
+        )
+
+
+def parse_mix(value):
+    """Parse 'park=4,remove=4,parking_grid=2' into a weight dict."""
+    weights = {}
+    for part in value.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in ("park", "remove", "parking_grid"):
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{endpoint}'.")
+        weights[endpoint] = float(weight or 1)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process load test of the SpotOn REST API.")
+    parser.add_argument("--interface", choices=["wsgi", "asgi", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("park=4,remove=4,parking_grid=2"))
+    parser.add_argument("--lot", default="SM Aura")
+    parser.add_argument("--level", type=int, default=1, help="level for parking_grid requests (1-based)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # Per-request view logging would dominate the measurement
+    logging.getLogger("api").setLevel(logging.ERROR)
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+
+    interfaces = ["wsgi", "asgi"] if args.interface == "both" else [args.interface]
+    for interface in interfaces:
+        mix = RequestMix(args.lot, args.mix, level=args.level, seed=args.seed)
+        results, elapsed = LoadTest(
+            mix,
+            interface=interface,
+            concurrency=args.concurrency,
+            requests=args.requests,
+            warmup=args.warmup,
+        ).run()
+        print_report(results, elapsed, interface, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.bitmap import WORD_BITS, OccupancyBitmap
+from api.core.system import SpotOnSystem
+
+
+def brute_first(entries, taken):
+    candidates = sorted((distance, spot_id) for distance, spot_id, _ in entries if not taken[spot_id])
+    return candidates[0] if candidates else None
+
+
+class OccupancyBitmapTest(unittest.TestCase):
+    def test_matches_brute_force_across_word_and_summary_boundaries(self):
+        rng = random.Random(11)
+        for size in (1, WORD_BITS - 1, WORD_BITS, WORD_BITS + 1, WORD_BITS * WORD_BITS + 3):
+            with self.subTest(size=size):
+                entries = [(rng.randint(0, size // 4), spot_id, rng.random() < 0.9) for spot_id in range(1, size + 1)]
+                taken = {spot_id: is_taken for _, spot_id, is_taken in entries}
+                bitmap = OccupancyBitmap(entries)
+                self.assertEqual(bitmap.first_free(), brute_first(entries, taken))
+                for _ in range(300):
+                    spot_id = rng.randint(1, size)
+                    taken[spot_id] = rng.random() < 0.8
+                    bitmap.set_taken(spot_id, taken[spot_id])
+                    self.assertEqual(bitmap.first_free(), brute_first(entries, taken))
+
+    def test_full_and_padded(self):
+        bitmap = OccupancyBitmap([(distance, distance, False) for distance in range(1, WORD_BITS + 2)])
+        for spot_id in range(1, WORD_BITS + 2):
+            bitmap.set_taken(spot_id, True)
+        self.assertIsNone(bitmap.first_free())  # Padding bits never read as free
+        bitmap.set_taken(WORD_BITS + 1, False)
+        self.assertEqual(bitmap.first_free(), (WORD_BITS + 1, WORD_BITS + 1))
+        bitmap.set_taken(WORD_BITS + 1, False)  # Freeing twice changes nothing
+        bitmap.set_taken(1000, True)  # Unknown spot is ignored
+        self.assertEqual(bitmap.first_free(), (WORD_BITS + 1, WORD_BITS + 1))
+        self.assertIsNone(OccupancyBitmap([]).first_free())
+
+    def test_scan_counts_the_words_read(self):
+        size = WORD_BITS * WORD_BITS + 3  # Two summary words
+        bitmap = OccupancyBitmap([(spot_id, spot_id, spot_id != 5) for spot_id in range(1, size + 1)])
+        self.assertEqual(bitmap.scan_first_free(), ((5, 5), 2))  # One summary word, one leaf word
+        bitmap.set_taken(5, True)
+        bitmap.set_taken(size, False)
+        self.assertEqual(bitmap.scan_first_free(), ((size, size), 3))
+        bitmap.set_taken(size, True)
+        self.assertEqual(bitmap.scan_first_free(), (None, 2))
+
+
+class BitmapBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.system = SpotOnSystem(clock=lambda: 0.0, allocation_backend="bitmap")
+        self.system.initialize_parking_lot([(f"S{i}", 0, float(i), (i, 0)) for i in range(1, 201)])
+        self.system.parking_lot.set_entry_point(0, (0, 0))
+        self.system.parking_lot.recount_occupancy()
+
+    def test_parks_nearest_free_spot(self):
+        system = self.system
+        for i in range(1, 101):
+            self.assertEqual(system.park_vehicle(f"V{i}"), f"S{i}")
+        self.assertTrue(system.remove_vehicle("V40"))
+        self.assertEqual(system.reserve_spot("R", ttl_seconds=60), "S40")
+        self.assertEqual(system.park_vehicle("W"), "S101")
+        self.assertTrue(system.cancel_reservation("R"))
+        self.assertEqual(system.park_vehicle("X"), "S40")
+
+    def test_keeps_no_heap(self):
+        system = self.system
+        self.assertEqual(system.parking_lot.available_spots.heap, [])
+        system.park_vehicle("V1")
+        system.reserve_spot("R", ttl_seconds=60)
+        system.remove_vehicle("V1")
+        system.cancel_reservation("R")
+        self.assertEqual(system.parking_lot.available_spots.heap, [])
+        system.parking_lot.set_keeps_heap(True)  # Switching back builds it from the free spots
+        self.assertEqual(len(system.parking_lot.available_spots.heap), 200)
+
+    def test_full_lot(self):
+        system = self.system
+        for i in range(1, 201):
+            system.park_vehicle(f"V{i}")
+        self.assertIsNone(system.park_vehicle("LATE"))
+        self.assertIsNone(system.reserve_spot("LATE"))
+
+
+if __name__ == "__main__":
+    unittest.main()
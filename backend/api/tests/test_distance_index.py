@@ -0,0 +1,107 @@
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.distance_index import DistanceIndex
+from api.core.system import SpotOnSystem
+
+
+def brute_count(entries, free, min_distance=None, max_distance=None):
+    return sum(
+        1 for distance, spot_id, _ in entries
+        if free[spot_id]
+        and (min_distance is None or distance >= min_distance)
+        and (max_distance is None or distance <= max_distance)
+    )
+
+
+def brute_first(entries, free, min_distance=0):
+    candidates = sorted((distance, spot_id) for distance, spot_id, _ in entries if free[spot_id] and distance >= min_distance)
+    return candidates[0] if candidates else None
+
+
+class DistanceIndexTest(unittest.TestCase):
+    def test_matches_brute_force_through_random_updates(self):
+        rng = random.Random(7)
+        for size in (0, 1, 2, 7, 64, 100, 257):
+            with self.subTest(size=size):
+                # Few distinct distances, so ties are broken by spot id
+                entries = [(rng.randint(0, 20), spot_id, rng.random() < 0.5) for spot_id in range(1, size + 1)]
+                free = {spot_id: is_free for _, spot_id, is_free in entries}
+                index = DistanceIndex(entries)
+                for _ in range(200):
+                    if size:
+                        spot_id = rng.randint(1, size)
+                        free[spot_id] = rng.random() < 0.5
+                        index.set_free(spot_id, free[spot_id])
+                    low = rng.choice([None, rng.randint(-1, 22)])
+                    high = rng.choice([None, rng.randint(-1, 22)])
+                    self.assertEqual(index.count_free(low, high), brute_count(entries, free, low, high))
+                    start = rng.randint(-1, 22)
+                    self.assertEqual(index.first_free(start), brute_first(entries, free, start))
+
+    def test_edges(self):
+        index = DistanceIndex([(1, 1, True), (2, 2, False), (2, 3, True)])
+        self.assertEqual(index.count_free(5, 1), 0)  # Empty range
+        self.assertEqual(index.first_free(3), None)  # Past the farthest spot
+        index.set_free(99, False)  # Unknown spot is ignored
+        index.set_free(1, True)  # Already free; counted once
+        self.assertEqual(index.count_free(), 2)
+        index.set_free(1, False)
+        index.set_free(3, False)
+        self.assertEqual(index.first_free(), None)
+        self.assertEqual(DistanceIndex([]).first_free(), None)
+
+
+class SpotIndexConsistencyTest(unittest.TestCase):
+    """Indexes kept up to date by allocate/release/reserve match ones built from scratch."""
+
+    def setUp(self):
+        self.system = SpotOnSystem(clock=lambda: 0.0)
+        self.system.initialize_parking_lot(
+            [(f"S{x}-{y}", 0, float(x + y), (x, y)) for x in range(12) for y in range(12)]
+        )
+        self.system.parking_lot.set_entry_point(0, (0, 0))
+        self.system.parking_lot.recount_occupancy()
+
+    def assert_indexes_match_rebuild(self):
+        parking_lot = self.system.parking_lot
+        index, bitmap = parking_lot.distance_index(0), parking_lot.occupancy_bitmap(0)
+        parking_lot.distance_indexes.clear()
+        parking_lot.occupancy_bitmaps.clear()
+        fresh_index, fresh_bitmap = parking_lot.distance_index(0), parking_lot.occupancy_bitmap(0)
+        self.assertEqual(index.free, fresh_index.free)
+        self.assertEqual(index.tree, fresh_index.tree)
+        self.assertEqual(bitmap.words, fresh_bitmap.words)
+        self.assertEqual(bitmap.summary, fresh_bitmap.summary)
+
+    def test_after_park_remove_reserve(self):
+        rng = random.Random(3)
+        system = self.system
+        system.parking_lot.distance_index(0)
+        system.parking_lot.occupancy_bitmap(0)
+        parked, reserved = [], []
+        for step in range(400):
+            action = rng.random()
+            if action < 0.45:
+                if system.park_vehicle(f"V{step}"):
+                    parked.append(f"V{step}")
+            elif action < 0.75 and parked:
+                self.assertTrue(system.remove_vehicle(parked.pop(rng.randrange(len(parked)))))
+            elif action < 0.9:
+                if system.reserve_spot(f"R{step}", ttl_seconds=60):
+                    reserved.append(f"R{step}")
+            elif reserved:
+                system.cancel_reservation(reserved.pop())
+            self.assert_indexes_match_rebuild()
+        free = sum(
+            1 for spot in system.parking_lot.spots.values() if not spot.is_occupied and not spot.is_reserved
+        )
+        self.assertEqual(system.count_free_spots_within(0), free)
+
+
+if __name__ == "__main__":
+    unittest.main()
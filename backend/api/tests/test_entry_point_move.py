@@ -0,0 +1,126 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.system import SpotOnSystem
+from api.simulation.engine import ParkingSimulation
+
+OLD_ENTRY, NEW_ENTRY = (0, 0), (6, 5)
+
+
+def make_system(allocation_backend):
+    # Two levels of 6 x 5 spots, both entered at OLD_ENTRY, with the eight spots nearest it on level 0 taken.
+    system = SpotOnSystem(clock=lambda: 0.0, allocation_backend=allocation_backend)
+    system.initialize_parking_lot(
+        [(f"L{level}-{x}-{y}", level, None, (x, y)) for level in (0, 1) for x in range(6) for y in range(5)]
+    )
+    for level in (0, 1):
+        system.parking_lot.move_entry_point(level, OLD_ENTRY)
+    system.parking_lot.recount_occupancy()
+    for number in range(8):
+        system.park_vehicle(f"V{number}", 0)
+    return system
+
+
+def manhattan(coordinate, entry_point):
+    return abs(coordinate[0] - entry_point[0]) + abs(coordinate[1] - entry_point[1])
+
+
+class MoveEntryPointTest(unittest.TestCase):
+    def move(self, system):
+        parking_lot = system.parking_lot
+        parking_lot.distance_index(0)  # Built against the old entry point
+        parking_lot.occupancy_bitmap(0)
+        with system.write_lock:
+            parking_lot.move_entry_point(0, NEW_ENTRY)
+            system.mark_state_changed()
+        return parking_lot
+
+    def free_by_distance(self, parking_lot, level):
+        # (distance, handle) of the level's free spots, nearest first.
+        return sorted(
+            (spot.distance_from_entrance, handle) for handle, spot in parking_lot.spots.items()
+            if spot.level == level and not spot.is_occupied and not spot.is_reserved
+        )
+
+    def test_distances_follow_the_new_entry_point(self):
+        system = make_system("heap")
+        parking_lot = self.move(system)
+        self.assertEqual(parking_lot.entry_points, {0: NEW_ENTRY, 1: OLD_ENTRY})
+        for handle, spot in parking_lot.spots.items():
+            entry_point = NEW_ENTRY if spot.level == 0 else OLD_ENTRY  # Level 1 is left alone
+            self.assertEqual(spot.distance_from_entrance, manhattan(parking_lot.spot_coordinates[handle], entry_point))
+
+    def test_heap_holds_every_free_spot_at_its_new_distance(self):
+        system = make_system("heap")
+        parking_lot = self.move(system)
+        self.assertEqual(
+            sorted(parking_lot.available_spots.heap),
+            sorted(self.free_by_distance(parking_lot, 0) + self.free_by_distance(parking_lot, 1)),
+        )
+        heap = parking_lot.available_spots.copy()
+        popped = [heap.pop()[0] for _ in range(len(heap.heap))]
+        self.assertEqual(popped, sorted(popped))  # The heap orders by distance only; ties come out in any order
+
+    def test_indexes_are_rebuilt_in_the_new_order(self):
+        for allocation_backend in ("heap", "bitmap"):
+            with self.subTest(allocation_backend=allocation_backend):
+                system = make_system(allocation_backend)
+                parking_lot = self.move(system)
+                free = self.free_by_distance(parking_lot, 0)
+                by_distance = sorted(
+                    (spot.distance_from_entrance, handle) for handle, spot in parking_lot.spots.items() if spot.level == 0
+                )
+                index = parking_lot.distance_index(0)
+                bitmap = parking_lot.occupancy_bitmap(0)
+                self.assertEqual(list(zip(index.distances, index.spot_ids)), by_distance)
+                self.assertEqual(list(zip(bitmap.distances, bitmap.spot_ids)), by_distance)
+                self.assertEqual(index.first_free(), free[0])
+                self.assertEqual(bitmap.first_free(), free[0])
+                for low, high in ((None, None), (0, 3), (4, 7), (8, None)):
+                    self.assertEqual(
+                        index.count_free(low, high),
+                        sum(1 for distance, _ in free if (low is None or distance >= low) and (high is None or distance <= high)),
+                    )
+
+    def test_parking_takes_the_spot_nearest_the_new_entry_point(self):
+        for allocation_backend in ("heap", "bitmap"):
+            with self.subTest(allocation_backend=allocation_backend):
+                system = make_system(allocation_backend)
+                parking_lot = self.move(system)
+                expected = [distance for distance, _ in self.free_by_distance(parking_lot, 0)[:3]]
+                parked = [system.park_vehicle(f"N{number}", 0) for number in range(3)]
+                self.assertEqual(parked[0], "L0-5-4")  # The corner next to NEW_ENTRY
+                self.assertEqual([system.get_spot_info(spot_id).distance_from_entrance for spot_id in parked], expected)
+                # Spots freed after the move go back at their new distance
+                system.remove_vehicle("N0")
+                system.remove_vehicle("V0")  # Parked at L0-0-0, now the farthest spot
+                self.assertEqual(parking_lot.distance_index(0).first_free()[1], parking_lot.handle_of("L0-5-4"))
+                self.assertEqual(parking_lot.occupancy_bitmap(0).first_free()[1], parking_lot.handle_of("L0-5-4"))
+                self.assertEqual(system.park_vehicle("N3", 0), "L0-5-4")
+                self.assertEqual(system.park_vehicle("N4", 1), "L1-0-0")  # Level 1 still fills from OLD_ENTRY
+
+
+class RotateEntryPointTest(unittest.TestCase):
+    def test_nearest_spot_follows_the_entry_point(self):
+        simulation = ParkingSimulation("Rotate Test", 1, False, "test", seed="rotate")
+        parking_lot = simulation.system.parking_lot
+        entry_point = next(
+            point for point in parking_lot.perimeter_points[0] if point != parking_lot.entry_points[0]
+        )
+        simulation.rotate_entry_point(0, entry_point)
+        nearest = min(
+            spot.distance_from_entrance for spot in parking_lot.spots.values()
+            if not spot.is_occupied and not spot.is_reserved
+        )
+        spot = simulation.system.get_spot_info(parking_lot.nearest_spot_ids[0])
+        self.assertFalse(spot.is_occupied)
+        self.assertEqual(spot.distance_from_entrance, nearest)
+        for handle, spot in parking_lot.spots.items():
+            self.assertEqual(spot.distance_from_entrance, manhattan(parking_lot.spot_coordinates[handle], entry_point))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from rest_framework.test import APIClient
+
+from api.simulation import forecast
+from api.simulation.forecast import LotFork, run_forecast
+
+# Long enough that no test here is cut short by the budget unless it means to be
+NO_BUDGET = 60
+
+
+def make_fork(free_by_level, parked_by_level):
+    return LotFork("Test Lot", datetime(2026, 1, 1), list(free_by_level), list(parked_by_level))
+
+
+def without_timing(result):
+    return {key: value for key, value in result.items() if key != "elapsed_ms"}
+
+
+class RunForecastTest(unittest.TestCase):
+    # Single-level lots use the NumPy walk, multi-level lots the NumPy level stepper.
+    forks = {
+        "single level": ([10], [10]),
+        "two levels": ([5, 5], [5, 5]),
+    }
+
+    def runners(self):
+        yield "numpy", mock.patch.object(forecast, "np", forecast.np)
+        yield "python", mock.patch.object(forecast, "np", None)
+
+    def test_same_seed_same_result(self):
+        for name, counts in self.forks.items():
+            for runner, patch in self.runners():
+                with self.subTest(fork=name, runner=runner), patch:
+                    fork = make_fork(*counts)
+                    first = run_forecast(fork, 600, 1, 0.5, 0.3, replications=300, seed=7, budget_seconds=NO_BUDGET)
+                    again = run_forecast(fork, 600, 1, 0.5, 0.3, replications=300, seed=7, budget_seconds=NO_BUDGET)
+                    other = run_forecast(fork, 600, 1, 0.5, 0.3, replications=300, seed=8, budget_seconds=NO_BUDGET)
+                    self.assertEqual(without_timing(first), without_timing(again))
+                    self.assertNotEqual(first["turned_away"], other["turned_away"])
+
+    def test_full_lot_is_full_at_once(self):
+        for name, counts in {"single level": ([0], [20]), "two levels": ([0, 0], [10, 10])}.items():
+            for runner, patch in self.runners():
+                with self.subTest(fork=name, runner=runner), patch:
+                    result = run_forecast(
+                        make_fork(*counts), 60, 1, 0.5, 0.0, replications=50, budget_seconds=NO_BUDGET
+                    )
+                    time_to_full = result["time_to_full"]
+                    self.assertEqual(time_to_full["probability"], 1.0)
+                    self.assertEqual((time_to_full["p10"], time_to_full["p90"], time_to_full["mean"]), (0, 0, 0))
+
+    def test_numpy_and_python_runners_agree(self):
+        # Different random streams, so only the distributions match: within about 4 standard errors.
+        for name, counts in self.forks.items():
+            with self.subTest(fork=name):
+                fork = make_fork(*counts)
+                with mock.patch.object(forecast, "np", forecast.np):
+                    fast = run_forecast(fork, 60, 1, 0.5, 0.3, replications=2000, seed=1, budget_seconds=NO_BUDGET)
+                with mock.patch.object(forecast, "np", None):
+                    slow = run_forecast(fork, 60, 1, 0.5, 0.3, replications=2000, seed=1, budget_seconds=NO_BUDGET)
+                self.assertEqual(fast["replications"], slow["replications"])
+                self.assertLess(0.3, slow["time_to_full"]["probability"])
+                self.assertLess(slow["time_to_full"]["probability"], 0.9)
+                self.assertAlmostEqual(
+                    fast["time_to_full"]["probability"], slow["time_to_full"]["probability"], delta=0.06
+                )
+                self.assertAlmostEqual(fast["turned_away"]["mean"], slow["turned_away"]["mean"], delta=0.6)
+
+    def test_budget_truncates(self):
+        fork = make_fork([10], [10])
+        result = run_forecast(fork, 10**6, 1, 0.5, 0.3, replications=200, budget_seconds=0.05)
+        self.assertTrue(result["truncated"])
+        self.assertLess(result["replications"], result["requested_replications"])
+        spent = run_forecast(fork, 60, 1, 0.5, 0.3, replications=200, budget_seconds=0)
+        self.assertTrue(spent["truncated"])
+        self.assertEqual(spent["replications"], 0)
+        self.assertIsNone(spent["time_to_full"]["probability"])
+        whole = run_forecast(fork, 60, 1, 0.5, 0.3, replications=200, budget_seconds=NO_BUDGET)
+        self.assertFalse(whole["truncated"])
+        self.assertEqual(whole["replications"], 200)
+
+    def test_invalid_arguments(self):
+        fork = make_fork([10], [10])
+        for arguments in (
+            (0, 1, 0.5, 0.3),
+            (float("nan"), 1, 0.5, 0.3),
+            (60, float("inf"), 0.5, 0.3),
+            (60, 1, 1.5, 0.3),
+            (60, 1, 0.5, -0.1),
+            (60, 1, float("nan"), 0.3),
+            (10**8, 1, 0.5, 0.3),  # More steps than MAX_STEPS
+        ):
+            with self.subTest(arguments=arguments), self.assertRaises(ValueError):
+                run_forecast(fork, *arguments)
+        with self.assertRaises(ValueError):
+            run_forecast(fork, 60, 1, 0.5, 0.3, replications=0)
+        with self.assertRaises(ValueError):
+            run_forecast(make_fork([], []), 60, 1, 0.5, 0.3)
+
+
+class ForecastViewTest(unittest.TestCase):
+    url = "/api/forecast/SM Aura/"
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+
+    def test_forecast(self):
+        response = self.client.get(self.url, {"horizon": 600, "replications": 20, "seed": 3, "budget_ms": 2000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["lot_name"], "SM Aura")
+        self.assertEqual(response.data["replications"], 20)
+        self.assertEqual(response.data["seed"], 3)
+
+    def test_invalid_query_is_rejected(self):
+        for query in (
+            {"horizon": "-1"},
+            {"horizon": "nan"},
+            {"horizon": "soon"},
+            {"arrival_rate": "2"},
+            {"departure_rate": "-0.5"},
+            {"arrival_rate": "nan"},
+            {"update_interval": "0"},
+            {"replications": "0"},
+            {"replications": "1.5"},
+            {"seed": "x"},
+            {"budget_ms": "0"},
+            {"budget_ms": "5000"},
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(self.url, query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.data)
+
+    def test_unknown_lot(self):
+        self.assertEqual(self.client.get("/api/forecast/Nowhere/").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.ingestion import GateQueue, QueueFull
+from api.core.system import SpotOnSystem
+
+
+def make_simulation(num_spots=10):
+    system = SpotOnSystem(clock=lambda: 0.0)
+    system.initialize_parking_lot([(f"S{i}", 0, float(i), (i, 0)) for i in range(1, num_spots + 1)])
+    system.parking_lot.set_entry_point(0, (0, 0))
+    system.parking_lot.recount_occupancy()
+    return SimpleNamespace(system=system)
+
+
+class GateQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.simulation = make_simulation()
+        self.batches = []
+        self.first_batch = threading.Event()  # Set to let the worker past its first batch
+        apply = self.simulation.system.apply_gate_commands
+
+        def recording_apply(commands):
+            self.batches.append(list(commands))
+            if len(self.batches) == 1:
+                self.first_batch.wait(5)
+            return apply(commands)
+
+        self.simulation.system.apply_gate_commands = recording_apply
+
+    def make_queue(self, **options):
+        return GateQueue("Test Lot", lambda: self.simulation, **options)
+
+    def wait_until_taken(self):
+        # Until the worker has taken the first batch and is held inside it.
+        deadline = time.monotonic() + 5
+        while not self.batches and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_commands_are_applied_in_order_in_batches(self):
+        gate_queue = self.make_queue(max_depth=100, batch_size=4)
+        tickets = gate_queue.submit([("arrival", "V0", 0)])
+        self.wait_until_taken()
+        for i in range(1, 10):
+            tickets += gate_queue.submit([("arrival", f"V{i}", 0)])
+        tickets += gate_queue.submit([("departure", "V3", 0), ("arrival", "LATE", 0), ("departure", "NOBODY", 0)])
+        self.assertEqual(tickets, list(range(1, 14)))
+        self.first_batch.set()
+        results = gate_queue.results(tickets, timeout=5)
+        # The first command went alone; the rest queued up behind it and went in fours
+        self.assertEqual([len(batch) for batch in self.batches], [1, 4, 4, 4])
+        self.assertEqual([result["ticket"] for result in results], tickets)
+        self.assertEqual([result["spot_id"] for result in results[:10]], [f"S{i}" for i in range(1, 11)])
+        self.assertEqual(
+            [(result["command"], result["status"]) for result in results[10:]],
+            [("departure", "departed"), ("arrival", "parked"), ("departure", "not_found")],
+        )
+        self.assertEqual(results[11]["spot_id"], "S4")  # The spot V3 left in the same batch
+        self.assertEqual(gate_queue.depth, 0)
+
+    def test_full_queue_rejects_the_whole_submit(self):
+        gate_queue = self.make_queue(max_depth=3, batch_size=10)
+        gate_queue.submit([("arrival", "V0", 0)])
+        self.wait_until_taken()
+        gate_queue.submit([("arrival", "V1", 0), ("arrival", "V2", 0)])
+        with self.assertRaises(QueueFull):
+            gate_queue.submit([("arrival", "V3", 0), ("arrival", "V4", 0)])
+        self.assertEqual(gate_queue.depth, 2)
+        self.assertEqual(gate_queue.submit([("arrival", "V3", 0)]), [4])
+        self.first_batch.set()
+        self.assertEqual([result["status"] for result in gate_queue.results([1, 2, 3, 4], timeout=5)], ["parked"] * 4)
+
+    def test_invalid_commands_are_rejected_before_queueing(self):
+        gate_queue = self.make_queue()
+        for commands in (
+            [("arrival", "V1", 0), ("exit", "V2", 0)],
+            [("arrival", "", 0)],
+            [("arrival", "V1", -1)],
+        ):
+            with self.subTest(commands=commands), self.assertRaises(ValueError):
+                gate_queue.submit(commands)
+        self.assertEqual(gate_queue.depth, 0)
+        self.assertFalse(gate_queue.is_draining)
+
+    def test_pending_unknown_and_trimmed_results(self):
+        gate_queue = self.make_queue(max_depth=10, max_results=2)
+        tickets = gate_queue.submit([("arrival", "V1", 0), ("arrival", "V2", 0)])
+        self.assertEqual(
+            [result["status"] for result in gate_queue.results(tickets + [99])], ["pending", "pending", "unknown"]
+        )
+        self.first_batch.set()
+        gate_queue.results(tickets, timeout=5)
+        tickets += gate_queue.submit([("arrival", "V3", 0), ("arrival", "V4", 0)])
+        statuses = [result["status"] for result in gate_queue.results(tickets, timeout=5)]
+        self.assertEqual(statuses, ["unknown", "unknown", "parked", "parked"])  # Only the last two are kept
+
+    def test_failed_batch_reports_the_error(self):
+        self.first_batch.set()
+
+        def failing_apply(commands):
+            raise RuntimeError("lot unavailable")
+
+        self.simulation.system.apply_gate_commands = failing_apply
+        gate_queue = self.make_queue()
+        with self.assertLogs("api.core.ingestion", "ERROR"):
+            tickets = gate_queue.submit([("arrival", "V1", 0), ("departure", "V2", 0)])
+            results = gate_queue.results(tickets, timeout=5)
+        self.assertEqual([(result["status"], result["error"]) for result in results], [("error", "lot unavailable")] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
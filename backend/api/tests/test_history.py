@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.history import OccupancyHistory, _Tier
+
+
+class ManualClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def points(result):
+    return [(point["timestamp"], point["occupied_by_level"]) for point in result["points"]]
+
+
+class OccupancyHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.history = OccupancyHistory(2, tiers=((1, 10), (5, 4)), clock=self.clock)
+
+    def record_at(self, now, values):
+        self.clock.now = now
+        self.history.record(values)
+
+    def test_means_are_time_weighted(self):
+        self.record_at(0, [0, 4])
+        self.record_at(0.25, [8, 4])
+        self.record_at(1, [8, 0])
+        self.clock.now = 1.5
+        self.assertEqual(points(self.history.query(0, 1, resolution=1)), [(0, [6.0, 4.0]), (1, [8.0, 0.0])])
+
+    def test_idle_periods_are_filled_in(self):
+        self.record_at(0, [1, 0])
+        self.record_at(3, [2, 0])
+        self.record_at(5, [3, 0])
+        self.assertEqual(
+            [values[0] for _, values in points(self.history.query(0, 5, resolution=1))], [1.0, 1.0, 1.0, 2.0, 2.0]
+        )
+        # The 5 s point is the mean of the 1 s points it covers
+        self.assertEqual(points(self.history.query(0, 5, resolution=5)), [(0, [1.4, 0.0])])
+
+    def test_rings_keep_their_capacity(self):
+        for second in range(100):
+            self.record_at(second, [second % 3 + 1, 0])
+        self.record_at(10**9, [0, 0])  # A long gap writes at most a ring's worth of points
+        for tier in self.history.tiers:
+            self.assertEqual(len(tier.points), tier.capacity)
+        fine = points(self.history.query(resolution=1))
+        self.assertEqual(fine[0], (10**9 - 10, [1, 0]))  # The value held since second 99
+        self.assertEqual(fine[-1], (10**9 - 1, [1, 0]))
+
+    def test_query_picks_the_finest_tier_reaching_start(self):
+        self.record_at(0, [1, 1])
+        self.record_at(30, [2, 2])
+        self.assertEqual(self.history.query(25, 30)["resolution"], 1)
+        self.assertEqual(self.history.query(15, 30)["resolution"], 5)
+        self.assertEqual(self.history.query(0, 30)["resolution"], 5)  # Past every tier: the coarsest
+        self.assertEqual(self.history.query(25, 30, resolution=5)["resolution"], 5)
+        with self.assertRaises(ValueError):
+            self.history.query(25, 30, resolution=60)
+        with self.assertRaises(ValueError):
+            self.history.query(30, 25)
+
+    def test_clock_going_back_is_ignored(self):
+        self.record_at(10, [1, 0])
+        self.record_at(5, [2, 0])  # Taken as the value from 10 on
+        self.record_at(12, [3, 0])
+        self.assertEqual(
+            [values[0] for _, values in points(self.history.query(10, 11, resolution=1))], [2.0, 2.0]
+        )
+
+
+class SteppingClock:
+    # Advances a quarter second per reading.
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.now += 0.25
+            return self.now
+
+
+class ConcurrentHistoryTest(unittest.TestCase):
+    def test_concurrent_records_and_queries_hold_each_span_once(self):
+        history = OccupancyHistory(1, tiers=((1, 100000), (60, 1000)), clock=SteppingClock())
+        fine_tier = history.tiers[0]
+        spans, errors = [], []
+        hold = _Tier.hold
+
+        def preempted_hold(tier, values, start, end):
+            time.sleep(0)  # Let another record() run between reading last_time and holding the span
+            if tier is fine_tier:
+                spans.append((start, end))
+            hold(tier, values, start, end)
+
+        def record():
+            for _ in range(2000):
+                history.record([5])
+
+        def query():
+            try:
+                for _ in range(200):
+                    history.query(resolution=1)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=record) for _ in range(4)] + [threading.Thread(target=query) for _ in range(2)]
+        with mock.patch.object(_Tier, "hold", preempted_hold):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        spans.sort()
+        self.assertEqual(  # The held spans tile the timeline: no gaps, no overlaps
+            [start for start, _ in spans[1:]], [end for _, end in spans[:-1]]
+        )
+        self.assertEqual(spans[-1][1], history.last_time)
+        timestamps = [timestamp for timestamp, _ in fine_tier.points]
+        self.assertEqual(timestamps, list(range(int(history.last_time))))  # One point per whole second
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.layout_loader import load_layout
+from api.core.parking import ParkingLot
+
+CSV_LAYOUT = """spot_id,level,x,y,type
+B1,2,0,0,spot
+A1,1,1,0,
+A2,1,2,0,spot
+,1,3,0,obstacle
+E1,1,0,0,entry
+
+A3,1,1,1,SPOT
+"""
+
+
+class LayoutLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content if isinstance(content, str) else json.dumps(content))
+        return path
+
+    def assert_rejected(self, name, content, message):
+        path = self.write(name, content)
+        with self.assertRaises(ValueError) as raised:
+            load_layout(path)
+        self.assertIn(message, str(raised.exception))
+
+    def test_csv(self):
+        layout = load_layout(self.write("lot.csv", CSV_LAYOUT))
+        # Sorted by level, file order kept within a level
+        self.assertEqual(layout.spot_ids, ["A1", "A2", "A3", "B1"])
+        self.assertEqual(layout.levels, [0, 0, 0, 1])
+        self.assertEqual(list(zip(layout.xs, layout.ys)), [(1, 0), (2, 0), (1, 1), (0, 0)])
+        self.assertEqual(layout.obstacles, {0: {(3, 0)}})
+        self.assertEqual(layout.entry_points, {0: (0, 0)})
+        self.assertEqual(layout.num_levels, 2)
+        self.assertEqual(layout.level_ranges(), [(0, 0, 3), (1, 3, 4)])
+
+    def test_json(self):
+        rows = {
+            "spots": [{"id": "B1", "level": 2, "x": 0, "y": 0}, {"id": 7, "level": 1, "x": 1, "y": 0}],
+            "obstacles": [{"level": 1, "x": 3, "y": 0}],
+            "entry_points": [{"level": 1, "x": 0, "y": 0}],
+        }
+        columns = {"spots": {"id": ["B1", 7], "level": [2, 1], "x": [0, 1], "y": [0, 0]}}
+        for name, content in (("rows.json", rows), ("columns.json", columns)):
+            with self.subTest(name=name):
+                layout = load_layout(self.write(name, content))
+                self.assertEqual(layout.spot_ids, ["7", "B1"])
+                self.assertEqual(layout.levels, [0, 1])
+                self.assertEqual(list(zip(layout.xs, layout.ys)), [(1, 0), (0, 0)])
+        layout = load_layout(self.write("rows.json", rows))
+        self.assertEqual(layout.obstacles, {0: {(3, 0)}})
+        self.assertEqual(layout.entry_points, {0: (0, 0)})
+
+    def test_malformed_csv(self):
+        header = "spot_id,level,x,y,type\nA1,1,0,0,spot\n"
+        for content, message in (
+            ("spot_id,level,x\nA1,1,0\n", "missing columns: y"),
+            (header + "A2,1,zero,0,spot\n", "line 3: invalid literal"),
+            (header + "A2,1\n", "line 3: expected 5 columns, found 2"),
+            (header + "A2,1,1,0\n", "line 3: expected 5 columns, found 4"),
+            (header + ",1,1,0,spot\n", "line 3: spot_id is empty"),
+            (header + "A2,1,1,0,ramp\n", "line 3: unknown row type 'ramp'"),
+            ("spot_id,level,x,y\nA1,0,0,0\n", "levels below 1"),
+            ("spot_id,level,x,y\n", "contains no spots"),
+        ):
+            with self.subTest(message=message):
+                self.assert_rejected("lot.csv", content, message)
+
+    def test_malformed_json(self):
+        for content, message in (
+            ({"spots": [{"id": "A1", "level": 1, "x": 0, "y": 0}, {"id": "A2", "level": 1, "x": 1}]},
+             "spot 2: missing field 'y'"),
+            ({"spots": [{"id": "A1", "level": "one", "x": 0, "y": 0}]}, "spot 1: invalid literal"),
+            ({"spots": [{"id": "A1", "level": 1, "x": 0, "y": 0}], "entry_points": [{"level": 1, "x": None, "y": 0}]},
+             "entry_points item 1"),
+            ({"spots": {"id": ["A1"], "level": [1], "x": [0]}}, "spot columns: missing field 'y'"),
+            ({"spots": {"id": ["A1", "A2"], "level": [1], "x": [0, 1], "y": [0, 0]}}, "different lengths"),
+        ):
+            with self.subTest(message=message):
+                self.assert_rejected("lot.json", content, message)
+        self.assert_rejected("lot.txt", "", "Unsupported layout file type")
+
+    def test_duplicates_name_both_rows(self):
+        header = "spot_id,level,x,y,type\n"
+        for name, content, message in (
+            ("lot.csv", header + "A1,1,0,0,spot\n\nO,1,5,5,obstacle\nA1,1,1,0,spot\n",
+             "line 5: spot ID 'A1' repeats line 2"),
+            ("lot.csv", header + "A1,1,0,0,spot\nA2,2,0,0,spot\nA3,1,0,0,spot\n",
+             "line 4: level 1 cell (0, 0) repeats line 2"),
+            ("lot.json", {"spots": [{"id": "A1", "level": 1, "x": 0, "y": 0}, {"id": "A1", "level": 2, "x": 0, "y": 0}]},
+             "spot 2: spot ID 'A1' repeats spot 1"),
+            ("lot.json", {"spots": {"id": ["A1", "A2", "A3"], "level": [1, 1, 1], "x": [0, 1, 1], "y": [0, 0, 0]}},
+             "spot 3: level 1 cell (1, 0) repeats spot 2"),
+        ):
+            with self.subTest(message=message):
+                self.assert_rejected(name, content, message)
+
+
+class BulkSpotsTest(unittest.TestCase):
+    def setUp(self):
+        self.parking_lot = ParkingLot(is_multi_level=True)
+        self.parking_lot.add_parking_spots_bulk(["A1", "A2"], [0, 0], [1, 2], [(1, 0), (2, 0)])
+
+    def test_duplicates_are_rejected_and_nothing_is_added(self):
+        for spot_ids, levels, coordinates, message in (
+            (["B1", "B1"], [0, 0], [(5, 0), (6, 0)], "Row 2: spot ID 'B1' repeats row 1"),
+            (["B1", "A2"], [0, 0], [(5, 0), (6, 0)], "Row 2: spot ID 'A2' already exists"),
+            (["B1", "B2"], [1, 1], [(5, 0), (5, 0)], "Row 2: level 2 cell (5, 0) repeats row 1"),
+            (["B1", "B2"], [1, 0], [(5, 0), (2, 0)], "Row 2: level 1 cell (2, 0) already holds spot 'A2'"),
+        ):
+            with self.subTest(message=message):
+                with self.assertRaises(ValueError) as raised:
+                    self.parking_lot.add_parking_spots_bulk(spot_ids, levels, [3, 4], coordinates)
+                self.assertEqual(str(raised.exception), message + ".")
+                self.assertEqual(self.parking_lot.spot_ids[1:], ["A1", "A2"])
+                self.assertEqual(len(self.parking_lot.spot_at), 2)
+
+    def test_same_cell_on_another_level_is_allowed(self):
+        handles = self.parking_lot.add_parking_spots_bulk(["B1"], [1], [1], [(1, 0)])
+        self.assertEqual(self.parking_lot.spot_at[(1, (1, 0))], handles[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
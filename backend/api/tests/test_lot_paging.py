@@ -0,0 +1,100 @@
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.lot_pins import LotPins
+from api.core.lotmanager import ParkingLotManager
+
+
+def make_manager(shared_state_dir=None):
+    spill_dir = tempfile.TemporaryDirectory()
+    # Any second resident lot is over the limit, and every lot counts as idle
+    manager = ParkingLotManager(
+        shared_state_dir=shared_state_dir, memory_limit_bytes=1, idle_seconds=0, spill_dir=spill_dir.name
+    )
+    for name in ("A", "B", "C"):
+        manager.add_parking_lot(name, 1, False, "")
+    return manager, spill_dir
+
+
+class PageOutTest(unittest.TestCase):
+    def setUp(self):
+        self.manager, self.spill_dir = make_manager()
+
+    def tearDown(self):
+        self.spill_dir.cleanup()
+
+    def test_pinned_lot_stays_resident(self):
+        manager = self.manager
+        with LotPins():
+            lot_a = manager.get_parking_lot("A")
+            manager.get_parking_lot("B")
+            self.assertIs(manager.parking_lots.get("A"), lot_a)
+            self.assertEqual(manager.lot_users, {"A": 1, "B": 1})
+        self.assertEqual(manager.lot_users, {})
+        manager.get_parking_lot("C")
+        self.assertEqual(set(manager.parking_lots), {"C"})
+        self.assertEqual(set(manager.paged_out), {"A", "B"})
+
+    def test_file_is_written_outside_the_build_lock(self):
+        manager = self.manager
+        spot_id = manager.get_parking_lot("A").system.park_vehicle("V1")
+        save = manager.lot_store.save
+        writing, finish = threading.Event(), threading.Event()
+
+        def slow_save(lot_name, snapshot):
+            self.assertFalse(manager._build_lock.locked())
+            if lot_name == "A":
+                writing.set()
+                finish.wait(5)
+            return save(lot_name, snapshot)
+
+        found = {}
+        with mock.patch.object(manager.lot_store, "save", side_effect=slow_save):
+            evicting = threading.Thread(target=manager.get_parking_lot, args=("B",))
+            evicting.start()
+            self.assertTrue(writing.wait(5))
+            manager.get_parking_lot("C")  # Builds, and pages B out, while A is being written
+            waiting = threading.Thread(target=lambda: found.update(lot=manager.get_parking_lot("A")))
+            waiting.start()
+            waiting.join(0.2)
+            self.assertTrue(waiting.is_alive())  # A is paged back in only from the complete file
+            finish.set()
+            evicting.join(5)
+            waiting.join(5)
+        self.assertEqual(found["lot"].system.get_vehicle_location("V1"), spot_id)
+
+    def test_failed_write_keeps_the_lot_resident(self):
+        manager = self.manager
+        lot_a = manager.get_parking_lot("A")
+        with mock.patch.object(manager.lot_store, "save", side_effect=OSError("disk full")), \
+                self.assertLogs("api.core.lotmanager", "ERROR"):
+            manager.get_parking_lot("B")
+        self.assertIs(manager.get_parking_lot("A"), lot_a)
+        self.assertNotIn("A", manager.paged_out)
+        self.assertEqual(manager.paging_out, {})
+
+
+class SharedPageOutTest(unittest.TestCase):
+    def test_shared_state_is_closed(self):
+        with tempfile.TemporaryDirectory() as shared_dir:
+            manager, spill_dir = make_manager(shared_dir)
+            shared_state = manager.get_parking_lot("A").system.shared_state
+            manager.get_parking_lot("B")
+            self.assertIn("A", manager.paged_out)
+            self.assertIsNone(shared_state._map)
+            with self.assertRaises(OSError):
+                shared_state.close()  # The file descriptor is already closed
+            self.assertIsNotNone(manager.get_parking_lot("A").system.shared_state._map)
+            for simulation in manager.parking_lots.values():
+                simulation.close()
+            spill_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import math
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.parking import ParkingLot
+from api.core.system import SpotOnSystem
+from api.simulation.engine import ParkingSimulation
+
+
+def make_system(num_spots=5):
+    system = SpotOnSystem(clock=lambda: 0.0)
+    system.initialize_parking_lot([(f"S{i}", 0, float(i), (i, 0)) for i in range(1, num_spots + 1)])
+    system.parking_lot.set_entry_point(0, (0, 0))
+    system.parking_lot.recount_occupancy()
+    return system
+
+
+def make_lot(prefix, num_spots):
+    parking_lot = ParkingLot()
+    parking_lot.add_parking_spots_bulk(
+        [f"{prefix}{i}" for i in range(1, num_spots + 1)], [0] * num_spots,
+        [float(i) for i in range(1, num_spots + 1)], [(i, 0) for i in range(1, num_spots + 1)],
+    )
+    parking_lot.set_entry_point(0, (0, 0))
+    return parking_lot
+
+
+class ReplaceParkingLotTest(unittest.TestCase):
+    def test_swap_drops_vehicles_and_holds_with_the_old_lot(self):
+        system = make_system()
+        system.park_vehicle("CAR", 0)
+        system.reserve_spot("HOLD", 0)
+        old_lot, old_version = system.parking_lot, system.state_version
+        new_lot = make_lot("N", 3)
+
+        system.replace_parking_lot(new_lot)
+        self.assertIs(system.parking_lot, new_lot)
+        self.assertIs(new_lot.write_lock, system.write_lock)
+        self.assertNotEqual(system.state_version, old_version)
+        self.assertEqual(system.vehicle_to_spot, {})
+        self.assertEqual(system.reservations, {})
+        self.assertIsNone(system.get_vehicle_location("CAR"))
+        # A reader still holding the old lot sees it whole and unchanged
+        self.assertEqual(old_lot.external_id(old_lot.vehicle_to_spot["CAR"]), "S1")
+        self.assertTrue(old_lot.spots[old_lot.handle_of("S2")].is_reserved)
+
+        self.assertEqual(system.park_vehicle("CAR", 0), "N1")
+        self.assertEqual(system.reserve_spot("HOLD", 0), "N2")
+        self.assertTrue(system.cancel_reservation("HOLD"))
+
+
+class ConcurrentRebuildTest(unittest.TestCase):
+    def test_readers_never_see_a_half_built_lot(self):
+        simulation = ParkingSimulation("Swap Test", 3, True, "test")  # Unseeded, so each rebuild differs
+        add_parking_spot = ParkingLot.add_parking_spot
+
+        def yielding_add(parking_lot, *args):
+            time.sleep(0)  # Give readers a chance to look while the new lot is being built
+            return add_parking_spot(parking_lot, *args)
+
+        errors, statuses = [], []
+        done = threading.Event()
+
+        def check(status):
+            levels = range(simulation.num_levels)
+            spots = [spot for level in levels for spot in status["spots_by_level"][level]]
+            layouts = status["level_layouts"]
+            assert sorted(layouts) == list(levels), f"levels laid out: {sorted(layouts)}"
+            assert sorted(status["entry_points"]) == list(levels), f"entry points: {sorted(status['entry_points'])}"
+            assert status["total_spots"] == len(spots) == sum(rows * cols for rows, cols in layouts.values())
+            assert all(math.isfinite(spot["distance"]) for spot in spots), "spot without a distance"
+
+        def read():
+            try:
+                while not done.is_set():
+                    status = simulation.get_current_status()
+                    check(status)
+                    statuses.append(status["total_spots"])
+            except Exception as e:
+                errors.append(e)
+                done.set()
+
+        def park():
+            try:
+                number = 0
+                while not done.is_set():
+                    number += 1
+                    vehicle_id = f"P{number}"
+                    if simulation.system.park_vehicle(vehicle_id, number % 3):
+                        simulation.system.remove_vehicle(vehicle_id)
+            except Exception as e:
+                errors.append(e)
+                done.set()
+
+        threads = [threading.Thread(target=read) for _ in range(2)] + [threading.Thread(target=park)]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-4)  # Each sleep(0) would otherwise wait out the busy threads' 5 ms slices
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        with mock.patch.object(ParkingLot, "add_parking_spot", yielding_add):
+            for thread in threads:
+                thread.start()
+            sizes = set()
+            for _ in range(10):
+                if done.is_set():
+                    break
+                simulation.initialize_parking_lot()
+                sizes.add(len(simulation.system.parking_lot.spots))
+            done.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(errors, [])
+        self.assertGreater(len(sizes), 1)  # The rebuilds really changed the layout
+        self.assertTrue(statuses)
+
+
+if __name__ == "__main__":
+    unittest.main()
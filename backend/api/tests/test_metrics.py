@@ -0,0 +1,58 @@
+import gc
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.metrics import Counter, Histogram
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gc.collect()
+
+
+class ThreadShardTest(unittest.TestCase):
+    def test_exited_threads_fold_into_the_retired_total(self):
+        counter = Counter("test_total", "Test counter.", ["lot"])
+        histogram = Histogram("test_seconds", "Test histogram.", ["lot"], buckets=(1, 10))
+
+        def record():
+            counter.inc("A")
+            counter.inc("B", amount=2)
+            histogram.observe(0.5, "A")
+            histogram.observe(5, "A", count=3)
+
+        for _ in range(5):
+            run_threads(20, record)
+        self.assertEqual(len(counter._shards), 0)
+        self.assertEqual(len(histogram._shards), 0)
+        self.assertEqual(counter.collect(), {("A",): 100, ("B",): 200})
+        self.assertEqual(histogram.collect(), {("A",): ([100, 300, 0], 100 * 0.5 + 300 * 5)})
+
+    def test_live_and_retired_shards_are_summed(self):
+        counter = Counter("test_total", "Test counter.")
+        counter.inc()  # This thread's shard stays live
+        run_threads(3, counter.inc)
+        self.assertEqual(len(counter._shards), 1)
+        self.assertEqual(counter.collect(), {(): 4})
+        counter.inc()
+        self.assertEqual(counter.collect(), {(): 5})
+
+    def test_snapshot_is_not_changed_by_later_retirements(self):
+        histogram = Histogram("test_seconds", "Test histogram.", buckets=(1,))
+        run_threads(1, lambda: histogram.observe(0.5))
+        before = histogram.collect()
+        run_threads(1, lambda: histogram.observe(2))
+        self.assertEqual(before, {(): ([1, 0], 0.5)})
+        self.assertEqual(histogram.collect(), {(): ([1, 1], 2.5)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,15 @@
 import time
 import random
 from memory_profiler import profile
-from api.core.parking import ParkingLot
+from api.core.system import SpotOnSystem
 from typing import Tuple, List, Dict
 import math
 
 def measure_time(func):
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = time.perf_counter()
         result = func(*args, **kwargs)
-        end = time.time()
+        end = time.perf_counter()
         print(f"{func.__name__} took {end - start:.4f} seconds")
         return result
     return wrapper
@@ -52,29 +52,23 @@ class PerformanceTest:
 
         return spots
 
-    def simulate_arrivals(self, lot: ParkingLot, num_operations: int, arrival_rate: float) -> None:
-        """Simulate vehicle arrivals."""
-        for _ in range(int(num_operations * arrival_rate)):
-            spot_id = random.choice(list(lot.spots.keys()))
-            spot = lot.spots.get(spot_id)
-            if spot and not spot.is_occupied:
-                spot.is_occupied = True
+    def simulate_arrivals(self, system: SpotOnSystem, num_operations: int, arrival_rate: float, level: int = 0) -> None:
+        """Simulate vehicle arrivals through the allocator so the heap stays in sync."""
+        for i in range(int(num_operations * arrival_rate)):
+            system.park_vehicle(f"V{level}-{i}", level)
 
-    def simulate_departures(self, lot: ParkingLot, num_operations: int, departure_rate: float) -> None:
+    def simulate_departures(self, system: SpotOnSystem, num_operations: int, departure_rate: float) -> None:
         """Simulate vehicle departures."""
-        occupied_spots = [spot_id for spot_id, spot in lot.spots.items() if spot.is_occupied]
+        parked = list(system.vehicle_to_spot)
         for _ in range(int(num_operations * departure_rate)):
-            if occupied_spots:
-                spot_id = random.choice(occupied_spots)
-                spot = lot.spots.get(spot_id)
-                if spot:
-                    spot.is_occupied = False
-                    occupied_spots.remove(spot_id)
+            if parked:
+                system.remove_vehicle(parked.pop(random.randrange(len(parked))))
 
     @measure_time
     def test_priority_queue_single_level(self, size: int, arrival_rate: float, departure_rate: float, num_operations: int) -> None:
         """Test PQ performance with corridor layout."""
-        lot = ParkingLot(is_multi_level=False)
+        system = SpotOnSystem(is_multi_level=False)
+        lot = system.parking_lot
         lot.set_entry_point(0, self.entry_points["corner"])
 
         # Add spots in corridor pattern
@@ -83,18 +77,19 @@ class PerformanceTest:
             lot.add_parking_spot(spot_id, level, distance, coordinate)
 
         # Simulate arrivals and departures
-        self.simulate_arrivals(lot, num_operations, arrival_rate)
-        self.simulate_departures(lot, num_operations, departure_rate)
+        self.simulate_arrivals(system, num_operations, arrival_rate)
+        self.simulate_departures(system, num_operations, departure_rate)
 
         # Find nearest spot
-        nearest_spot = lot.find_nearest_spot_priority_queue(0)
-        print(f"PQ - Found nearest spot: {nearest_spot}")
+        nearest_spot = system.find_nearest_spot_priority_queue(0)
+        print(f"PQ - Found nearest spot: {lot.external_id(nearest_spot)}")
 
     @measure_time
     @profile
     def test_bfs_multi_level(self, size: int, num_levels: int, arrival_rate: float, departure_rate: float, num_operations: int) -> None:
         """Test BFS performance with multi-level corridor layout."""
-        lot = ParkingLot(is_multi_level=True)
+        system = SpotOnSystem(is_multi_level=True)
+        lot = system.parking_lot
 
         # Set entry points for each level
         for level in range(num_levels):
@@ -106,14 +101,15 @@ class PerformanceTest:
             lot.add_parking_spot(spot_id, level, distance, coordinate)
 
         # Simulate arrivals and departures
-        self.simulate_arrivals(lot, num_operations, arrival_rate)
-        self.simulate_departures(lot, num_operations, departure_rate)
+        for level in range(num_levels):
+            self.simulate_arrivals(system, num_operations // num_levels, arrival_rate, level)
+        self.simulate_departures(system, num_operations, departure_rate)
 
         # Test finding nearest spot on each level
         for level in range(num_levels):
             print(f"\nSearching on level {level}:")
-            nearest_spot = lot.find_nearest_spot_bfs(level)
-            print(f"BFS - Found nearest spot on level {level}: {nearest_spot}")
+            nearest_spot = system.find_nearest_spot_bfs(level)
+            print(f"BFS - Found nearest spot on level {level}: {lot.external_id(nearest_spot)}")
 
     def run_tests(self) -> None:
         print("\nTesting Single-Level Priority Queue Implementation:")
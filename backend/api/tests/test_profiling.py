@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.middleware import PROFILE_ID_HEADER, PROFILE_SCOPE_HEADER, profile_store
+
+TOKEN = "test-profile-token"
+LOT = "SM Aura"
+
+
+class ProfilingMiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        token = override_settings(SPOTON_PROFILE_TOKEN=TOKEN)
+        token.enable()
+        self.addCleanup(token.disable)
+        self.client = APIClient(SERVER_NAME="localhost")
+
+    def profiled_get(self, path):
+        response = self.client.get(path, HTTP_X_SPOTON_PROFILE=TOKEN)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def summary(self, profile_id):
+        response = self.profiled_get(f"/api/debug/profile/{profile_id}/")
+        return response.content.decode()
+
+    def test_buffered_response_is_profiled_whole(self):
+        response = self.profiled_get(f"/api/status/{LOT}/")
+        profile_id = response[PROFILE_ID_HEADER]
+        self.assertNotIn(PROFILE_SCOPE_HEADER, response)
+        self.assertFalse(profile_store.get(profile_id)["streamed"])
+        self.assertNotIn("not profiled", self.summary(profile_id).splitlines()[0])
+
+    def test_streamed_body_is_marked_as_not_profiled(self):
+        response = self.profiled_get(f"/api/status/{LOT}/?stream=1")
+        self.assertTrue(response.streaming)
+        b"".join(response.streaming_content)
+        profile_id = response[PROFILE_ID_HEADER]
+        self.assertEqual(response[PROFILE_SCOPE_HEADER], "view; streamed body not profiled")
+        self.assertTrue(profile_store.get(profile_id)["streamed"])
+        self.assertIn("the streamed body was not profiled", self.summary(profile_id).splitlines()[0])
+
+    def test_requests_without_the_token_are_not_profiled(self):
+        for headers in ({}, {"HTTP_X_SPOTON_PROFILE": "wrong"}):
+            with self.subTest(headers=headers):
+                response = self.client.get(f"/api/status/{LOT}/?stream=1", **headers)
+                b"".join(response.streaming_content)
+                self.assertNotIn(PROFILE_ID_HEADER, response)
+                self.assertNotIn(PROFILE_SCOPE_HEADER, response)
+
+
+if __name__ == "__main__":
+    unittest.main()
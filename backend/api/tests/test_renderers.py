@@ -0,0 +1,43 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api import renderers
+from api.renderers import json_dumps
+
+DATA = {
+    "lot_name": "Test Lot",
+    1: {"distance": 2.5, "occupied": True, "coordinates": (3, 4)},
+    "means": [1.0, float("nan"), float("inf"), -float("inf")],
+    "nested": {"p50": float("nan"), "spots": [{"distance": float("inf")}]},
+    "empty": None,
+}
+EXPECTED = {
+    "lot_name": "Test Lot",
+    "1": {"distance": 2.5, "occupied": True, "coordinates": [3, 4]},
+    "means": [1.0, None, None, None],
+    "nested": {"p50": None, "spots": [{"distance": None}]},
+    "empty": None,
+}
+
+
+class JsonDumpsTest(unittest.TestCase):
+    def test_standard_library_fallback(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(json.loads(json_dumps(DATA)), EXPECTED)
+            self.assertEqual(json_dumps({"a": [1, 2.5]}), b'{"a":[1,2.5]}')
+
+    @unittest.skipIf(renderers.orjson is None, "orjson is not installed")
+    def test_both_encoders_agree(self):
+        fast = json_dumps(DATA)
+        with mock.patch.object(renderers, "orjson", None):
+            fallback = json_dumps(DATA)
+        self.assertEqual(json.loads(fast), json.loads(fallback))
+
+
+if __name__ == "__main__":
+    unittest.main()
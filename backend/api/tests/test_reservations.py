@@ -0,0 +1,127 @@
+import math
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.system import MAX_RESERVATION_SECONDS, SpotOnSystem
+from api.core.timer_wheel import HierarchicalTimerWheel
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_system(num_spots=5, clock=None):
+    """One-level lot with spots S1..Sn in a row, S1 nearest the entry point."""
+    system = SpotOnSystem(clock=clock or FakeClock())
+    system.initialize_parking_lot(
+        [(f"S{i}", 0, float(i), (i, 0)) for i in range(1, num_spots + 1)]
+    )
+    system.parking_lot.set_entry_point(0, (0, 0))
+    system.parking_lot.recount_occupancy()
+    return system
+
+
+class HierarchicalTimerWheelTest(unittest.TestCase):
+    def test_fires_on_its_tick_and_not_before(self):
+        wheel = HierarchicalTimerWheel()
+        wheel.schedule("a", 5)
+        self.assertEqual(wheel.advance(4.9), [])
+        self.assertEqual(wheel.advance(5.0), ["a"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cascades_from_every_level(self):
+        wheel = HierarchicalTimerWheel(slots_per_level=4, num_levels=3)
+        delays = {"level0": 3, "level1": 9, "level2": 4 * 4 * 2 + 7, "edge": 4 * 4}
+        for key, delay in delays.items():
+            wheel.schedule(key, delay)
+        fired = {}
+        for second in range(1, wheel.max_ticks + 1):
+            for key in wheel.advance(second):
+                fired[key] = second
+        self.assertEqual(fired, delays)
+
+    def test_cancel_and_reschedule(self):
+        wheel = HierarchicalTimerWheel()
+        wheel.schedule("a", 10)
+        wheel.schedule("a", 100)  # Replaces the first timer
+        self.assertEqual(wheel.deadline("a"), 100)
+        self.assertEqual(wheel.advance(50), [])
+        self.assertTrue(wheel.cancel("a"))
+        self.assertFalse(wheel.cancel("a"))
+        self.assertEqual(wheel.advance(200), [])
+
+    def test_idle_ticks_are_skipped_without_losing_later_timers(self):
+        wheel = HierarchicalTimerWheel(start_time=1000.0)
+        self.assertEqual(wheel.advance(1000.0 + 10 ** 6), [])
+        wheel.schedule("a", 70)
+        self.assertEqual(wheel.advance(1000.0 + 10 ** 6 + 69), [])
+        self.assertEqual(wheel.advance(1000.0 + 10 ** 6 + 70), ["a"])
+
+    def test_range_limits(self):
+        wheel = HierarchicalTimerWheel()
+        wheel.schedule("longest", wheel.max_delay_seconds)
+        for delay in (wheel.max_delay_seconds + 1, 10 ** 9, math.inf, math.nan):
+            with self.subTest(delay=delay):
+                with self.assertRaises(ValueError):
+                    wheel.schedule("bad", delay)
+        self.assertEqual(set(wheel.timers), {"longest"})
+
+
+class ReservationTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.system = make_system(clock=self.clock)
+
+    def test_reserved_spot_is_skipped_then_taken_by_its_vehicle(self):
+        self.assertEqual(self.system.reserve_spot("R", ttl_seconds=60), "S1")
+        self.assertEqual(self.system.park_vehicle("OTHER"), "S2")
+        self.assertEqual(self.system.park_vehicle("R"), "S1")
+        self.assertEqual(self.system.reservations, {})
+        self.assertEqual(len(self.system.reservation_wheel), 0)
+
+    def test_hold_expires_after_ttl(self):
+        self.system.reserve_spot("R", ttl_seconds=30)
+        self.clock.now = 29
+        self.assertEqual(self.system.park_vehicle("A"), "S2")
+        self.clock.now = 30
+        self.assertEqual(self.system.park_vehicle("B"), "S1")
+        self.assertNotIn("R", self.system.reservations)
+
+    def test_cancel_gives_the_spot_back(self):
+        self.system.reserve_spot("R", ttl_seconds=60)
+        self.assertTrue(self.system.cancel_reservation("R"))
+        self.assertFalse(self.system.cancel_reservation("R"))
+        self.assertEqual(self.system.park_vehicle("A"), "S1")
+
+    def test_ttl_outside_the_wheel_leaves_no_hold(self):
+        for ttl_seconds in (MAX_RESERVATION_SECONDS + 1, 10 ** 9, math.inf, math.nan):
+            with self.subTest(ttl_seconds=ttl_seconds):
+                with self.assertRaises(ValueError):
+                    self.system.reserve_spot("R", ttl_seconds=ttl_seconds)
+                self.assertEqual(self.system.reservations, {})
+                self.assertFalse(any(spot.is_reserved for spot in self.system.parking_lot.spots.values()))
+                self.assertEqual(len(self.system.parking_lot.available_spots.heap), 5)
+        self.assertEqual(self.system.reserve_spot("R", ttl_seconds=MAX_RESERVATION_SECONDS), "S1")
+
+    def test_indexes_follow_reservations(self):
+        system = self.system
+        index = system.parking_lot.distance_index(0)
+        bitmap = system.parking_lot.occupancy_bitmap(0)
+        system.reserve_spot("R", ttl_seconds=60)
+        self.assertEqual(index.count_free(), 4)
+        self.assertEqual(bitmap.first_free()[0], 2.0)
+        self.clock.now = 60
+        system.expire_reservations()
+        self.assertEqual(index.count_free(), 5)
+        self.assertEqual(bitmap.first_free()[0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
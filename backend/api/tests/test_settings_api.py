@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Runs in a fresh interpreter: settings are fixed once Django is set up, and the
+# other tests here set up the full profile.
+CHILD = """
+import json
+import sys
+
+from backend.asgi_api import application  # Boots Django on backend.settings_api
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+
+client = Client(SERVER_NAME="localhost")
+lots = client.get("/api/parking_lots/", HTTP_ORIGIN="http://localhost:3000")
+redirect = client.get("/api/parking_lots", HTTP_ORIGIN="http://localhost:3000")
+print(json.dumps({
+    "settings": settings.SETTINGS_MODULE,
+    "databases": list(settings.DATABASES),
+    "engine": settings.DATABASES["default"]["ENGINE"],
+    "auth_loaded": "django.contrib.auth.models" in sys.modules,
+    "connections_opened": [alias for alias in connections if connections[alias].connection is not None],
+    "lots_status": lots.status_code,
+    "lots_type": lots["Content-Type"],
+    "lots": [lot["name"] for lot in lots.json()],
+    "lots_cors": lots.get("Access-Control-Allow-Origin"),
+    "redirect_status": redirect.status_code,
+    "redirect_location": redirect.get("Location"),
+    "redirect_cors": redirect.get("Access-Control-Allow-Origin"),
+}))
+"""
+
+
+class ApiProfileSmokeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        env = dict(os.environ)
+        env.pop("DJANGO_SETTINGS_MODULE", None)
+        env.pop("SPOTON_SHARDS", None)
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+        )
+        if completed.returncode:
+            raise AssertionError(f"API profile failed to boot:\n{completed.stderr}")
+        cls.result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def test_boots_without_a_database(self):
+        self.assertEqual(self.result["settings"], "backend.settings_api")
+        self.assertEqual(self.result["databases"], ["default"])  # Filled in by Django
+        self.assertEqual(self.result["engine"], "django.db.backends.dummy")
+        self.assertFalse(self.result["auth_loaded"])
+        self.assertEqual(self.result["connections_opened"], [])
+
+    def test_serves_a_route_as_json(self):
+        self.assertEqual(self.result["lots_status"], 200)
+        self.assertEqual(self.result["lots_type"], "application/json")
+        self.assertIn("SM Aura", self.result["lots"])
+        self.assertEqual(self.result["lots_cors"], "http://localhost:3000")
+
+    def test_slash_redirect_carries_cors_headers(self):
+        self.assertEqual(self.result["redirect_status"], 301)
+        self.assertEqual(self.result["redirect_location"], "/api/parking_lots/")
+        self.assertEqual(self.result["redirect_cors"], "http://localhost:3000")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import multiprocessing
+import sys
+import threading
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core import sharding
+from api.core.sharding import ConsistentHashRing, ShardedParkingLotManager
+
+LOT_NAMES = [f"Lot {i}" for i in range(6)]
+
+
+class ConsistentHashRingTest(unittest.TestCase):
+    def test_lots_spread_evenly(self):
+        ring = ConsistentHashRing(4)
+        counts = Counter(ring.get_shard(f"Lot {i}") for i in range(4000))
+        self.assertEqual(sorted(counts), [0, 1, 2, 3])
+        for shard, count in counts.items():
+            with self.subTest(shard=shard):
+                self.assertLess(abs(count - 1000), 200)
+
+    def test_adding_a_shard_only_moves_lots_onto_it(self):
+        before, after = ConsistentHashRing(4), ConsistentHashRing(5)
+        keys = [f"Lot {i}" for i in range(4000)]
+        moved = [key for key in keys if before.get_shard(key) != after.get_shard(key)]
+        self.assertEqual({after.get_shard(key) for key in moved}, {4})
+        self.assertLess(abs(len(moved) - len(keys) / 5), len(keys) / 20)  # About 1/N of the lots
+
+    def test_mapping_is_stable(self):
+        self.assertEqual(
+            [ConsistentHashRing(3).get_shard(name) for name in LOT_NAMES],
+            [ConsistentHashRing(3).get_shard(name) for name in LOT_NAMES],
+        )
+
+
+class UnpicklableError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.lock = threading.Lock()
+
+
+class FailingManager:
+    def __init__(self, **options):
+        pass
+
+    def explode(self):
+        raise UnpicklableError("held a lock")
+
+
+class ShardMainTest(unittest.TestCase):
+    def test_unpicklable_error_reaches_the_router_as_text(self):
+        router, child = multiprocessing.Pipe()
+        with mock.patch.object(sharding, "ParkingLotManager", FailingManager):
+            worker = threading.Thread(target=sharding._shard_main, args=(child, {}))
+            worker.start()
+            router.send(("manager", None, "explode", (), {}))
+            self.assertTrue(router.poll(5), "the shard sent no reply")
+            ok, error = router.recv()
+            router.send(None)
+            worker.join(5)
+        self.assertFalse(ok)
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(str(error), "UnpicklableError: held a lock")
+        self.assertFalse(worker.is_alive())
+
+
+class ShardedParkingLotManagerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.manager = ShardedParkingLotManager(2)
+        for lot_name in LOT_NAMES:
+            cls.manager.add_parking_lot(lot_name, num_levels=2, is_multi_level=True, address="test")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.manager.close()
+
+    def shard_has(self, shard, lot_name):
+        return shard.call(("manager", None, "has_parking_lot", (lot_name,), {}))
+
+    def test_each_lot_lives_on_its_owner_only(self):
+        owners = {self.manager.ring.get_shard(lot_name) for lot_name in LOT_NAMES}
+        self.assertEqual(owners, {0, 1})  # Both shards hold lots, so the fan-out tests cover both
+        for lot_name in LOT_NAMES:
+            owner = self.manager.ring.get_shard(lot_name)
+            with self.subTest(lot_name=lot_name):
+                self.assertEqual(self.manager.lot_shards[lot_name], owner)
+                self.assertEqual(
+                    [self.shard_has(shard, lot_name) for shard in self.manager.shards],
+                    [shard.index == owner for shard in self.manager.shards],
+                )
+
+    def test_calls_reach_the_owning_shard(self):
+        lot = self.manager.get_parking_lot(LOT_NAMES[0])
+        self.assertIsNotNone(lot.system.park_vehicle("ROUTED", 0))
+        self.assertTrue(lot.system.remove_vehicle("ROUTED"))
+        self.assertIsNone(self.manager.get_parking_lot("Nowhere"))
+        with self.assertRaises(ValueError):
+            self.manager.add_parking_lot(LOT_NAMES[0], num_levels=1, is_multi_level=False, address="test")
+
+    def test_listing_fans_out_in_registration_order(self):
+        summaries = self.manager.get_lot_summaries()
+        self.assertEqual([summary["lot_name"] for summary in summaries], LOT_NAMES)
+        for summary in summaries:
+            with self.subTest(lot_name=summary["lot_name"]):
+                self.assertEqual(summary["total_spots"], self.manager.get_parking_lot(summary["lot_name"]).total_spots)
+
+    def test_metrics_are_merged_across_shards(self):
+        for lot_name in LOT_NAMES:
+            self.manager.get_parking_lot(lot_name).system.park_vehicle(f"M-{lot_name}", 0)
+        families = {family["name"]: family for family in self.manager.collect_metrics()}
+        total_spots = families["spoton_total_spots"]["samples"]
+        self.assertEqual(
+            {lot_name: total_spots[(lot_name,)] for lot_name in LOT_NAMES},
+            {lot_name: self.manager.get_parking_lot(lot_name).total_spots for lot_name in LOT_NAMES},
+        )
+        allocations = families["spoton_allocations_total"]["samples"]
+        for lot_name in LOT_NAMES:
+            with self.subTest(lot_name=lot_name):
+                self.assertGreaterEqual(allocations[(lot_name,)], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
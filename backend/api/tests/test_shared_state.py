@@ -0,0 +1,98 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.shared_state import CHANGE_LOG_ENTRIES, SharedLotState
+from api.core.system import SpotOnSystem
+
+
+def make_system(directory, num_spots=2000):
+    system = SpotOnSystem(clock=lambda: 0.0)
+    system.initialize_parking_lot([(f"S{i}", 0, float(i), (i, 0)) for i in range(1, num_spots + 1)])
+    system.parking_lot.set_entry_point(0, (0, 0))
+    system.parking_lot.recount_occupancy()
+    system.attach_shared_state(SharedLotState.for_lot(directory, "Shared Lot", system.parking_lot.spots.keys()))
+    return system
+
+
+class SharedStateSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.writer = make_system(self.directory.name)
+        self.reader = make_system(self.directory.name)
+        self.reader.parking_lot.distance_index(0)
+
+    def tearDown(self):
+        self.writer.shared_state.close()
+        self.reader.shared_state.close()
+        self.directory.cleanup()
+
+    def assert_same_occupancy(self):
+        writer, reader = self.writer.parking_lot, self.reader.parking_lot
+        self.assertEqual(reader.vehicle_to_spot, writer.vehicle_to_spot)
+        self.assertEqual(reader.occupied_by_level, writer.occupied_by_level)
+        self.assertEqual(sorted(reader.available_spots.heap), sorted(writer.available_spots.heap))
+        index = reader.distance_index(0)
+        reader.distance_indexes.clear()
+        self.assertEqual(index.free, reader.distance_index(0).free)
+
+    def test_few_writes_are_applied_spot_by_spot(self):
+        writer = self.writer
+        for i in range(1, 6):
+            writer.park_vehicle(f"V{i}")
+        writer.remove_vehicle("V1")
+        writer.remove_vehicle("V3")
+        writer.park_vehicle("V3")  # Moves to the spot V1 left
+        with mock.patch.object(self.reader, "_reload_shared_state", side_effect=AssertionError("full reload")):
+            self.reader.sync_shared_state()
+        self.assertEqual(self.reader.get_vehicle_location("V3"), "S1")
+        self.assertNotIn("V1", self.reader.vehicle_to_spot)
+        self.assert_same_occupancy()
+
+    def test_reader_writes_after_catching_up(self):
+        self.writer.park_vehicle("A")
+        self.assertEqual(self.reader.park_vehicle("B"), "S2")
+        self.writer.sync_shared_state()
+        self.assertEqual(self.writer.get_vehicle_location("B"), "S2")
+        self.assert_same_occupancy()
+
+    def test_falling_behind_the_change_log_reloads_every_spot(self):
+        for i in range(CHANGE_LOG_ENTRIES + 1):
+            self.writer.park_vehicle(f"V{i}")
+        with mock.patch.object(self.reader, "_reload_shared_state", wraps=self.reader._reload_shared_state) as reload:
+            self.reader.sync_shared_state()
+        reload.assert_called_once()
+        self.assert_same_occupancy()
+
+    def test_reset_is_not_replayed_from_the_log(self):
+        shared_state = self.writer.shared_state
+        self.assertIsNotNone(shared_state.changed_since(shared_state.version))
+        with shared_state.lock():
+            shared_state.reset(shared_state.generation, self.writer.parking_lot.spots.keys())
+        self.assertIsNone(shared_state.changed_since(shared_state.version - 1))
+
+
+class RemapTest(unittest.TestCase):
+    def test_replaced_map_stays_open_until_close(self):
+        with tempfile.TemporaryDirectory() as directory:
+            small = SharedLotState.for_lot(directory, "Lot", range(10))
+            other = SharedLotState.for_lot(directory, "Lot", range(10))
+            with other.lock():
+                other.reset(1, range(100_000))  # Grows the file
+            old_map = small._map
+            with small.lock():  # Notices the larger file and remaps
+                pass
+            self.assertIsNot(small._map, old_map)
+            self.assertFalse(old_map.closed)
+            self.assertEqual(small.total_spots, 100_000)
+            small.close()
+            other.close()
+            self.assertTrue(old_map.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
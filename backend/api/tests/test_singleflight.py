@@ -0,0 +1,96 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core import singleflight
+from api.core.singleflight import SingleFlight
+
+
+class CountingEvent(threading.Event):
+    # Counts the threads that have started waiting on it.
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self._count_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        with self._count_lock:
+            self.waiting += 1
+        return super().wait(timeout)
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, result):
+        def function():
+            self.calls += 1
+            self.release.wait(5)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return function
+
+    def run_concurrently(self, count, key, function):
+        # Start count callers and let the leader finish only once every follower waits on it.
+        outcomes = [None] * count
+        calls = []
+        make_call = singleflight._Call
+
+        def new_call():
+            call = make_call()
+            call.done = CountingEvent()
+            calls.append(call)
+            return call
+
+        def call(index):
+            try:
+                outcomes[index] = self.flight.do(key, function)
+            except Exception as e:
+                outcomes[index] = e
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+        with mock.patch.object(singleflight, "_Call", new_call):
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while (not calls or calls[0].done.waiting < count - 1) and time.monotonic() < deadline:
+                time.sleep(0.001)
+            self.release.set()
+            for thread in threads:
+                thread.join(5)
+        return outcomes
+
+    def test_concurrent_callers_share_one_result(self):
+        outcomes = self.run_concurrently(8, "grid", self.slow("body"))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(shared for _, shared in outcomes), [False] + [True] * 7)
+        self.assertEqual({result for result, _ in outcomes}, {"body"})
+        self.assertEqual(self.flight._calls, {})
+
+    def test_exception_reaches_every_caller(self):
+        error = RuntimeError("build failed")
+        outcomes = self.run_concurrently(4, "grid", self.slow(error))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(outcome is error for outcome in outcomes))
+        self.assertEqual(self.flight._calls, {})
+
+    def test_nothing_is_cached_and_keys_are_independent(self):
+        self.release.set()
+        self.assertEqual(self.flight.do("a", self.slow(1)), (1, False))
+        self.assertEqual(self.flight.do("a", self.slow(2)), (2, False))
+        self.assertEqual(self.flight.do("b", self.slow(3)), (3, False))
+        self.assertEqual(self.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
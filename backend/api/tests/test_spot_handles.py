@@ -0,0 +1,134 @@
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+
+from api.core.system import SpotOnSystem
+
+
+class ManualClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_system(num_spots=10, clock=None, allocation_backend="heap"):
+    system = SpotOnSystem(clock=clock or (lambda: 0.0), allocation_backend=allocation_backend)
+    system.initialize_parking_lot([(f"S{i}", 0, float(i), (i, 0)) for i in range(1, num_spots + 1)])
+    system.parking_lot.set_entry_point(0, (0, 0))
+    system.parking_lot.recount_occupancy()
+    return system
+
+
+def lot_state(system):
+    # Everything a restore must bring back, in external IDs.
+    parking_lot = system.parking_lot
+    return {
+        "spots": [
+            (parking_lot.external_id(handle), spot.level, spot.distance_from_entrance,
+             spot.is_occupied, spot.vehicle_id, spot.is_reserved, spot.reserved_for)
+            for handle, spot in sorted(parking_lot.spots.items())
+        ],
+        "handles": dict(parking_lot.spot_handles),
+        "vehicles": {vehicle_id: parking_lot.external_id(handle) for vehicle_id, handle in system.vehicle_to_spot.items()},
+        "reservations": {vehicle_id: parking_lot.external_id(handle) for vehicle_id, handle in system.reservations.items()},
+        "heap": sorted(parking_lot.available_spots.heap),
+        "occupied": dict(parking_lot.occupied_by_level),
+        "entry_points": dict(parking_lot.entry_points),
+        "obstacles": {level: set(cells) for level, cells in parking_lot.obstacles.items()},
+    }
+
+
+class SpotHandleTest(unittest.TestCase):
+    def test_handles_are_dense_integers(self):
+        system = make_system(5)
+        parking_lot = system.parking_lot
+        self.assertEqual(sorted(parking_lot.spots), [1, 2, 3, 4, 5])  # Handle 0 is never given out
+        self.assertEqual(parking_lot.spot_ids, [None, "S1", "S2", "S3", "S4", "S5"])
+        for handle, spot in parking_lot.spots.items():
+            self.assertEqual(spot.id, handle)
+        self.assertEqual(parking_lot.levels, {0: [1, 2, 3, 4, 5]})
+        self.assertEqual(parking_lot.spot_at[(0, (3, 0))], 3)
+        self.assertTrue(all(isinstance(spot_id, int) for _, spot_id in parking_lot.available_spots.heap))
+
+    def test_external_ids_round_trip(self):
+        system = make_system(5)
+        parking_lot = system.parking_lot
+        for spot_id in ("S1", "S3", "S5"):
+            self.assertEqual(parking_lot.external_id(parking_lot.handle_of(spot_id)), spot_id)
+        self.assertIsNone(parking_lot.handle_of("S99"))
+        self.assertIsNone(parking_lot.external_id(None))
+        self.assertEqual(system.get_spot_info("S2").id, parking_lot.handle_of("S2"))
+
+        # Calls from outside the core take and return external IDs; the core keeps handles
+        self.assertEqual(system.park_vehicle("CAR", 0), "S1")
+        self.assertEqual(system.vehicle_to_spot["CAR"], 1)
+        self.assertEqual(system.get_vehicle_location("CAR"), "S1")
+        self.assertEqual(system.reserve_spot("HOLD", 0), "S2")
+        self.assertEqual(system.reservations["HOLD"], 2)
+        self.assertIsNone(system.get_vehicle_location("NOBODY"))
+
+    def test_added_spots_continue_the_handles(self):
+        system = make_system(3)
+        parking_lot = system.parking_lot
+        handles = parking_lot.add_parking_spots_bulk(["T1", "T2"], [0, 0], [0.5, 9.0], [(0, 1), (9, 1)])
+        self.assertEqual(handles, [4, 5])
+        self.assertEqual(parking_lot.handle_of("T2"), 5)
+        self.assertEqual(system.park_vehicle("CAR", 0), "T1")  # Distance 0.5 beats S1
+
+
+class SnapshotRestoreTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.system = make_system(8, clock=self.clock)
+        self.system.parking_lot.add_obstacle(0, (5, 1))
+        for vehicle_id in ("A", "B", "C"):
+            self.system.park_vehicle(vehicle_id, 0)
+        self.system.remove_vehicle("B")
+        self.system.reserve_spot("HOLD", 0, ttl_seconds=60)
+        self.system.reserve_spot("SHORT", 0, ttl_seconds=5)
+
+    def test_restore_brings_back_the_snapshot_state(self):
+        before = lot_state(self.system)
+        snapshot = self.system.snapshot()
+        self.system.park_vehicle("D", 0)
+        self.system.remove_vehicle("A")
+        self.system.cancel_reservation("HOLD")
+        self.system.parking_lot.add_obstacle(0, (6, 1))
+        self.system.restore(snapshot)
+        self.assertEqual(lot_state(self.system), before)
+        self.assertEqual(self.system.park_vehicle("E", 0), "S5")  # S2 is free again; S1, S3 parked; S2, S4 held
+
+    def test_restore_in_a_new_system_after_pickling(self):
+        before = lot_state(self.system)
+        snapshot = pickle.loads(pickle.dumps(self.system.snapshot()))
+        for allocation_backend in ("heap", "bitmap"):
+            with self.subTest(allocation_backend=allocation_backend):
+                system = SpotOnSystem(clock=self.clock, allocation_backend=allocation_backend)
+                system.restore(snapshot)
+                restored = lot_state(system)
+                if allocation_backend == "bitmap":
+                    self.assertEqual(restored.pop("heap"), [])  # The bitmap backend keeps no heap
+                    restored["heap"] = before["heap"]
+                self.assertEqual(restored, before)
+                self.assertEqual(system.get_vehicle_location("C"), "S3")
+                self.assertTrue(system.remove_vehicle("A"))
+                self.assertEqual(system.park_vehicle("E", 0), "S1")
+
+    def test_holds_that_expired_meanwhile_are_dropped(self):
+        snapshot = self.system.snapshot()
+        self.clock.now = 10
+        self.system.restore(snapshot)
+        self.assertEqual(list(self.system.reservations), ["HOLD"])
+        self.assertFalse(self.system.get_spot_info("S4").is_reserved)
+        self.clock.now = 61
+        self.system.expire_reservations()
+        self.assertEqual(self.system.reservations, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
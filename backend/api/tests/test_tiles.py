@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # backend/ for `api` imports
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from rest_framework.test import APIClient
+
+from api.core.tiles import TilePyramid
+from api.views import parking_lot_manager
+
+
+def brute_force_tiles(cells, origin, tile_size):
+    # {(tile_x, tile_y): (spots, occupied)} counted cell by cell.
+    tiles = {}
+    for x, y, is_occupied in cells:
+        key = ((x - origin[0]) // tile_size, (y - origin[1]) // tile_size)
+        spots, occupied = tiles.get(key, (0, 0))
+        tiles[key] = (spots + 1, occupied + is_occupied)
+    return tiles
+
+
+def as_dict(tiles):
+    return {(tile_x, tile_y): (spots, occupied) for tile_x, tile_y, spots, occupied in tiles}
+
+
+class TilePyramidTest(unittest.TestCase):
+    def setUp(self):
+        # 10 x 5 spots from (3, 5); the first three columns are occupied
+        self.cells = {(x, y): x < 6 for x in range(3, 13) for y in range(5, 10)}
+        self.pyramid = TilePyramid.build((x, y, taken) for (x, y), taken in self.cells.items())
+
+    def assert_matches_cells(self):
+        cells = [(x, y, taken) for (x, y), taken in self.cells.items()]
+        for zoom in range(self.pyramid.max_zoom + 1):
+            with self.subTest(zoom=zoom):
+                self.assertEqual(
+                    as_dict(self.pyramid.tiles(zoom)),
+                    brute_force_tiles(cells, self.pyramid.origin, self.pyramid.tile_size(zoom)),
+                )
+
+    def test_build(self):
+        self.assertEqual(self.pyramid.origin, (3, 5))
+        self.assertEqual(self.pyramid.max_zoom, 2)  # Extent 10 rounds up to 16 cells, 4 at the finest zoom
+        self.assertEqual([self.pyramid.tile_size(zoom) for zoom in range(3)], [16, 8, 4])
+        self.assertEqual(as_dict(self.pyramid.tiles(0)), {(0, 0): (50, 15)})
+        self.assertEqual(as_dict(self.pyramid.tiles(1)), {(0, 0): (40, 15), (1, 0): (10, 0)})
+        self.assert_matches_cells()
+
+    def test_update_after_park_and_release(self):
+        for (x, y), delta in (((12, 9), 1), ((3, 5), -1), ((8, 7), 1), ((12, 9), -1), ((7, 9), 1)):
+            self.cells[(x, y)] = delta > 0
+            self.pyramid.update(x, y, delta)
+        self.assertEqual(as_dict(self.pyramid.tiles(0)), {(0, 0): (50, 16)})
+        self.assert_matches_cells()
+
+    def test_update_outside_the_pyramid_is_ignored(self):
+        self.pyramid.update(100, 100, 1)
+        self.assert_matches_cells()
+
+    def test_viewport_and_zoom_bounds(self):
+        self.assertEqual(sorted(as_dict(self.pyramid.tiles(2, (1, 0, 2, 0)))), [(1, 0), (2, 0)])
+        self.assertEqual(self.pyramid.tiles(2, (5, 5, 6, 6)), [])
+        for zoom in (-1, 3):
+            with self.subTest(zoom=zoom), self.assertRaises(ValueError):
+                self.pyramid.tiles(zoom)
+
+    def test_empty_level(self):
+        pyramid = TilePyramid.build([])
+        self.assertEqual(pyramid.max_zoom, 0)
+        self.assertEqual(pyramid.tiles(0), [])
+
+
+class TilesViewTest(unittest.TestCase):
+    lot_name = "Tiles Test Lot"
+
+    @classmethod
+    def setUpClass(cls):
+        # One level of 8 x 8 spots: zoom 0 is one tile of 64, zoom 1 four tiles of 16
+        cls.layout_dir = tempfile.TemporaryDirectory()
+        layout_path = Path(cls.layout_dir.name) / "lot.csv"
+        rows = ["spot_id,level,x,y,type", "E,1,0,8,entry"]
+        rows += [f"S{x}-{y},1,{x},{y},spot" for x in range(8) for y in range(8)]
+        layout_path.write_text("\n".join(rows) + "\n")
+        parking_lot_manager.add_parking_lot(cls.lot_name, 0, False, "test", layout_path=str(layout_path))
+        cls.system = parking_lot_manager.get_parking_lot(cls.lot_name).system
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.layout_dir.cleanup()
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        for vehicle_id in list(self.system.vehicle_to_spot):
+            self.system.remove_vehicle(vehicle_id)
+
+    def get_tiles(self, **query):
+        response = self.client.get(f"/api/tiles/{self.lot_name}/", {"level": 1, **query})
+        self.assertEqual(response.status_code, 200, response.data)
+        return {(tile["x"], tile["y"]): (tile["spots"], tile["occupied"]) for tile in response.data["tiles"]}
+
+    def test_counts_follow_park_and_release(self):
+        self.assertEqual(self.get_tiles(zoom=0), {(0, 0): (64, 0)})
+        spots = {}
+        for i in range(5):
+            spots[f"V{i}"] = self.system.park_vehicle(f"V{i}", 0)
+        self.system.remove_vehicle("V1")
+        expected = {(tile_x, tile_y): [16, 0] for tile_x in range(2) for tile_y in range(2)}
+        for vehicle_id, spot_id in spots.items():
+            if vehicle_id != "V1":
+                x, y = (int(value) for value in spot_id[1:].split("-"))
+                expected[(x // 4, y // 4)][1] += 1
+        self.assertEqual(self.get_tiles(zoom=0), {(0, 0): (64, 4)})
+        self.assertEqual(self.get_tiles(zoom=1), {key: tuple(counts) for key, counts in expected.items()})
+        self.assertEqual(
+            self.get_tiles(zoom=1, x0=1, y0=0, x1=1, y1=1),
+            {key: tuple(counts) for key, counts in expected.items() if key[0] == 1},
+        )
+
+    def test_invalid_query_is_rejected(self):
+        for query in (
+            {"zoom": 2},
+            {"zoom": "a"},
+            {"level": 2},
+            {"x0": 0},
+            {"x0": 0, "y0": 0, "x1": 1},
+            {"x0": 0, "y0": 0, "x1": 1, "y1": "b"},
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/tiles/{self.lot_name}/", {"level": 1, **query})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.data)
+
+    def test_unknown_lot(self):
+        self.assertEqual(self.client.get("/api/tiles/Nowhere/").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
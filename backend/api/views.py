@@ -1,15 +1,40 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from datetime import datetime
 from .core.lotmanager import ParkingLotManager
+from .core.sharding import ShardedParkingLotManager
+from .core import metrics
+from .core.singleflight import SingleFlight
+from .core.ingestion import QueueFull
+from .core.system import MAX_RESERVATION_SECONDS
+from .middleware import profile_store, profile_token_matches
+from .renderers import json_dumps
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 import random
+import math
 import logging
 
 logger = logging.getLogger(__name__)
 
-parking_lot_manager = ParkingLotManager()
+manager_options = {
+    "shared_state_dir": settings.SPOTON_SHARED_STATE_DIR,
+    "allocation_backend": settings.SPOTON_ALLOCATION_BACKEND,
+    # Idle lots are paged out to disk once built lots are estimated to exceed this
+    "memory_limit_bytes": (
+        int(float(settings.SPOTON_LOT_MEMORY_LIMIT_MB) * 2**20) if settings.SPOTON_LOT_MEMORY_LIMIT_MB else None
+    ),
+    "idle_seconds": settings.SPOTON_LOT_IDLE_SECONDS,
+    "spill_dir": settings.SPOTON_LOT_SPILL_DIR,
+    "gate_queue_depth": settings.SPOTON_GATE_QUEUE_DEPTH,
+    "gate_batch_size": settings.SPOTON_GATE_BATCH_SIZE,
+}
+if settings.SPOTON_SHARDS:
+    # Partition lots across local worker processes by consistent hash of the lot name
+    parking_lot_manager = ShardedParkingLotManager(settings.SPOTON_SHARDS, **manager_options)
+else:
+    parking_lot_manager = ParkingLotManager(**manager_options)
 
 for lot in [
     {"lot_name": "Central Square", "num_levels": 5, "is_multi_level": True, "address": "Central Square 5th Avenue cor. 30th Street Bonifacio Global City, Taguig"},
@@ -28,6 +53,25 @@ for lot in [
     except ValueError as ve:
         logger.warning(str(ve))
 
+# Identical concurrent reads share one computation and one rendered body
+read_flight = SingleFlight()
+
+
+def wants_stream(request):
+    # ?stream=1 sends the body in chunks instead of building it in memory (for very large lots)
+    return request.GET.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def coalesced_json_response(view_name, key, build):
+    """
+    Run build() -> (JSON bytes, status) once for all concurrent requests with the same key
+    and give each of them the same pre-rendered bytes.
+    """
+    (body, status_code), shared = read_flight.do(key, build)
+    if shared:
+        metrics.COALESCED_REQUESTS.inc(view_name)
+    return HttpResponse(body, status=status_code, content_type="application/json")
+
 
 @api_view(['GET'])
 def initialize_parking_lot(request, lot_name):
@@ -54,6 +98,7 @@ def initialize_parking_lot(request, lot_name):
 def get_parking_grid(request, lot_name):
     """
     Retrieve the parking grid for a specific parking lot and level.
+    Pass stream=1 to receive the body in chunks instead of building it in memory.
     """
     try:
         logger.debug(f"Fetching parking grid for lot: {lot_name}")
@@ -87,17 +132,37 @@ def get_parking_grid(request, lot_name):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Delegate to the ParkingSimulation's get_parking_grid method
-        grid_data = simulation.get_parking_grid(lot_name, level)
-        if grid_data is None:
-            logger.error(f"No grid data available for level {level + 1}.")
-            return Response(
-                {"error": f"No grid data available for level {level + 1}."},
-                status=status.HTTP_404_NOT_FOUND
+        area = [request.GET.get(name) for name in ("x0", "y0", "x1", "y1")]
+        if any(area):
+            # Only the spots inside the client's viewport, looked up cell by cell
+            try:
+                if not all(area):
+                    raise ValueError("x0, y0, x1 and y1 are all required for an area.")
+                grid_data = simulation.get_parking_grid_area(lot_name, level, *(int(value) for value in area))
+            except ValueError as ve:
+                logger.error(f"Invalid area for parking grid of lot '{lot_name}': {ve}")
+                return Response(
+                    {"error": str(ve)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(grid_data, status=status.HTTP_200_OK)
+
+        if wants_stream(request):
+            return StreamingHttpResponse(
+                simulation.iter_parking_grid_json(lot_name, level),
+                content_type="application/json"
             )
 
-        logger.info(f"Successfully retrieved parking grid for lot '{lot_name}', level {level + 1}.")
-        return Response(grid_data, status=status.HTTP_200_OK)
+        def build_grid():
+            # Delegate to the ParkingSimulation; unchanged levels come straight from its byte cache
+            body = simulation.render_parking_grid(lot_name, level)
+            if body is None:
+                logger.error(f"No grid data available for level {level + 1}.")
+                return json_dumps({"error": f"No grid data available for level {level + 1}."}), status.HTTP_404_NOT_FOUND
+            logger.info(f"Successfully retrieved parking grid for lot '{lot_name}', level {level + 1}.")
+            return body, status.HTTP_200_OK
+
+        return coalesced_json_response("get_parking_grid", ("grid", lot_name, level), build_grid)
 
     except Exception as e:
         logger.exception(f"Error in get_parking_grid: {str(e)}")
@@ -107,22 +172,60 @@ def get_parking_grid(request, lot_name):
         )
 
 
+@api_view(['POST'])
+def set_entry_point(request, lot_name):
+    """
+    Move the entry point of one level and recompute spot distances.
+    A random perimeter point is used when no entry_point is given.
+    """
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        level = int(request.data.get('level', 1)) - 1  # Backend levels are zero-based
+        if level < 0 or level >= simulation.num_levels:
+            raise ValueError(f"Level {level + 1} does not exist in parking lot '{lot_name}'.")
+        entry_point = request.data.get('entry_point')
+        if entry_point is not None:
+            if not isinstance(entry_point, (list, tuple)) or len(entry_point) != 2:
+                raise ValueError("entry_point must be a list of two integers.")
+            entry_point = (int(entry_point[0]), int(entry_point[1]))
+    except (TypeError, ValueError) as ve:
+        logger.error(f"Parameter validation error: {str(ve)}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    entry_point = simulation.rotate_entry_point(level, entry_point)
+    logger.info(f"Entry point for lot '{lot_name}', level {level + 1} moved to {entry_point}.")
+    return Response(
+        {"level": level + 1, "entry_point": entry_point},
+        status=status.HTTP_200_OK
+    )
+
+
 @api_view(['GET'])
 def get_parking_lots(request):
     """
     Retrieve a list of all parking lots with their details.
     """
     parking_lots = []
-    for lot_name, simulation in parking_lot_manager.parking_lots.items():
-        available_spots = simulation.total_spots - simulation.system.get_total_occupied_spots()
+    for summary in parking_lot_manager.get_lot_summaries():
+        lot_name = summary["lot_name"]
         parking_lots.append({
             "id": lot_name,
             "name": lot_name,
             "distance": f"{random.randint(1, 10)} mins away",
-            "spots": f"{available_spots} spots",
-            "is_multi_level": simulation.is_multi_level,
-            "num_levels": simulation.num_levels,
-            "address": simulation.address
+            "spots": f"{summary['available_spots']} spots",
+            "is_multi_level": summary["is_multi_level"],
+            "num_levels": summary["num_levels"],
+            "address": summary["address"]
         })
         logger.debug(f"Added parking lot to list: {lot_name}")
 
@@ -207,10 +310,342 @@ def remove_vehicle(request):
         )
 
 
+@api_view(['POST'])
+def reserve_spot(request):
+    """
+    Hold the nearest available spot for a vehicle that is on its way.
+    The hold is released automatically after ttl_seconds (default 300).
+    """
+    vehicle_id = request.data.get('vehicle_id')
+    preferred_level = request.data.get('preferred_level', 0)
+    lot_name = request.data.get('lot_name')
+    ttl_seconds = request.data.get('ttl_seconds', 300)
+
+    if not lot_name or not vehicle_id:
+        logger.error("lot_name and vehicle_id are required.")
+        return Response(
+            {"error": "lot_name and vehicle_id are required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        ttl_seconds = float(ttl_seconds)
+        if not 0 < ttl_seconds <= MAX_RESERVATION_SECONDS:  # Also false for NaN
+            raise ValueError(f"ttl_seconds must be a positive number of at most {MAX_RESERVATION_SECONDS:.0f}.")
+    except (TypeError, ValueError) as ve:
+        logger.error(f"Parameter validation error: {str(ve)}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        spot_id = simulation.system.reserve_spot(vehicle_id, preferred_level, ttl_seconds)
+    except ValueError as ve:
+        logger.error(f"Reservation error: {str(ve)}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if spot_id:
+        logger.info(f"Spot '{spot_id}' reserved for vehicle '{vehicle_id}' in lot '{lot_name}'.")
+        return Response(
+            {"spot_id": spot_id, "ttl_seconds": ttl_seconds},
+            status=status.HTTP_200_OK
+        )
+    else:
+        logger.warning(f"No spot to reserve for vehicle '{vehicle_id}' in lot '{lot_name}'.")
+        return Response(
+            {"error": "No available spot."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@api_view(['POST'])
+def cancel_reservation(request):
+    """
+    Release a vehicle's reserved spot before the hold expires.
+    """
+    vehicle_id = request.data.get('vehicle_id')
+    lot_name = request.data.get('lot_name')
+
+    if not lot_name:
+        logger.error("lot_name is required.")
+        return Response(
+            {"error": "lot_name is required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if simulation.system.cancel_reservation(vehicle_id):
+        logger.info(f"Reservation for vehicle '{vehicle_id}' cancelled in lot '{lot_name}'.")
+        return Response(
+            {"message": "Reservation cancelled."},
+            status=status.HTTP_200_OK
+        )
+    else:
+        logger.warning(f"No reservation for vehicle '{vehicle_id}' in lot '{lot_name}'.")
+        return Response(
+            {"error": "Reservation not found."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+# Longest a gate results request may block waiting for its commands to be applied
+MAX_GATE_WAIT_SECONDS = 30.0
+
+
+@api_view(['POST'])
+def submit_gate_commands(request, lot_name):
+    """
+    Queue arrivals and departures from a lot's gate controllers and acknowledge them at once.
+    Body: {"commands": [{"type": "arrival" | "departure", "vehicle_id": ..., "preferred_level": 0}]}.
+    Returns 202 with one ticket per command for /api/gate/<lot_name>/results/, or 429 when
+    the lot's queue is full.
+    """
+    if not parking_lot_manager.has_parking_lot(lot_name):
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    commands = request.data.get("commands")
+    if not isinstance(commands, list) or not commands:
+        logger.error("commands must be a non-empty list.")
+        return Response(
+            {"error": "commands must be a non-empty list."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        entries = []
+        for command in commands:
+            if not isinstance(command, dict):
+                raise ValueError("Each command must be an object.")
+            entries.append((command.get("type"), command.get("vehicle_id"), command.get("preferred_level", 0)))
+        tickets, depth = parking_lot_manager.submit_gate_commands(lot_name, entries)
+    except QueueFull as qf:
+        logger.warning(str(qf))
+        response = Response(
+            {"error": str(qf)},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        response["Retry-After"] = "1"
+        return response
+    except ValueError as ve:
+        logger.error(f"Gate command error for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(
+        {"lot_name": lot_name, "tickets": tickets, "queue_depth": depth},
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(['GET'])
+def get_gate_results(request, lot_name):
+    """
+    Results of queued gate commands. Query parameters: ticket (repeatable, or comma separated)
+    and wait, seconds to wait for pending commands (default 0, at most 30).
+    Each result has a status: parked, no_spot, departed, not_found, error, pending or
+    unknown (never issued, or too old to be kept).
+    """
+    if not parking_lot_manager.has_parking_lot(lot_name):
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        try:
+            tickets = [
+                int(ticket)
+                for value in request.GET.getlist("ticket")
+                for ticket in value.split(",") if ticket
+            ]
+        except ValueError:
+            raise ValueError("Tickets must be integers.")
+        if not tickets:
+            raise ValueError("At least one ticket is required.")
+        wait = float(request.GET.get("wait", 0))
+        if not 0 <= wait <= MAX_GATE_WAIT_SECONDS:
+            raise ValueError(f"wait must be between 0 and {MAX_GATE_WAIT_SECONDS:g} seconds.")
+        results = parking_lot_manager.get_gate_results(lot_name, tickets, wait)
+    except ValueError as ve:
+        logger.error(f"Gate results error for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({"lot_name": lot_name, "results": results}, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 def get_status(request, lot_name):
     """
     Retrieve the current status of a specific parking lot.
+    Pass stream=1 to receive the body in chunks instead of building it in memory.
+    """
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if wants_stream(request):
+        return StreamingHttpResponse(simulation.iter_status_json(), content_type="application/json")
+
+    def build_status():
+        body = simulation.render_status()
+        logger.info(f"Retrieved status for parking lot '{lot_name}'.")
+        return body, status.HTTP_200_OK
+
+    return coalesced_json_response("get_status", ("status", lot_name), build_status)
+
+
+@api_view(['GET'])
+def get_tiles(request, lot_name):
+    """
+    Retrieve spot and occupied counts per tile of a level at a zoom (0 is one tile for the level).
+    Query parameters: level (1-based), zoom, and optionally x0, y0, x1, y1 in tile coordinates.
+    """
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        level = int(request.GET.get("level", "1")) - 1  # Backend levels are zero-based
+        zoom = int(request.GET.get("zoom", "0"))
+        viewport = [request.GET.get(name) for name in ("x0", "y0", "x1", "y1")]
+        if any(viewport) and not all(viewport):
+            raise ValueError("x0, y0, x1 and y1 are all required for a viewport.")
+        viewport = tuple(int(value) for value in viewport) if all(viewport) else None
+        if level < 0 or level >= simulation.num_levels:
+            raise ValueError(f"Level {level + 1} does not exist in parking lot '{lot_name}'.")
+        tiles = simulation.get_tiles(level, zoom, viewport)
+    except ValueError as ve:
+        logger.error(f"Invalid tile query for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    tiles["lot_name"] = lot_name
+    return Response(tiles, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_free_spots_by_distance(request, lot_name):
+    """
+    Count free spots on a level within a distance range of its entry point and return the nearest one.
+    Query parameters: level (1-based) and optionally min_distance and max_distance.
+    """
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        level = int(request.GET.get("level", "1")) - 1  # Backend levels are zero-based
+        min_distance = request.GET.get("min_distance")
+        max_distance = request.GET.get("max_distance")
+        min_distance = float(min_distance) if min_distance else None
+        max_distance = float(max_distance) if max_distance else None
+        if not all(math.isfinite(value) for value in (min_distance, max_distance) if value is not None):
+            raise ValueError("Distances must be finite numbers.")
+        if level < 0 or level >= simulation.num_levels:
+            raise ValueError(f"Level {level + 1} does not exist in parking lot '{lot_name}'.")
+        if min_distance is not None and max_distance is not None and min_distance > max_distance:
+            raise ValueError("min_distance must not be greater than max_distance.")
+        result = simulation.get_free_spots_by_distance(level, min_distance, max_distance)
+    except ValueError as ve:
+        logger.error(f"Invalid free spot query for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    result["lot_name"] = lot_name
+    return Response(result, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_occupancy_history(request, lot_name):
+    """
+    Retrieve occupied spots per level over a time window.
+    Query parameters: start and end (epoch seconds, default the last hour) and an optional
+    resolution (1, 60 or 3600 seconds); without one the finest tier covering start is used.
+    """
+    simulation = parking_lot_manager.get_parking_lot(lot_name)
+    if not simulation:
+        logger.error(f"Parking lot '{lot_name}' not found.")
+        return Response(
+            {"error": f"Parking lot '{lot_name}' not found."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        start = request.GET.get("start")
+        end = request.GET.get("end")
+        resolution = request.GET.get("resolution")
+        history = simulation.get_occupancy_history(
+            float(start) if start is not None else None,
+            float(end) if end is not None else None,
+            int(resolution) if resolution is not None else None,
+        )
+    except ValueError as ve:
+        logger.error(f"Invalid history query for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    history["lot_name"] = lot_name
+    return Response(history, status=status.HTTP_200_OK)
+
+
+# Longest latency budget a forecast request may ask for
+MAX_FORECAST_BUDGET_MS = 2000
+
+
+@api_view(['GET'])
+def get_forecast(request, lot_name):
+    """
+    Forecast when a lot will be full by running its simulation forward from the live state.
+    Query parameters: horizon (seconds, default 3600), replications (default 200), seed,
+    budget_ms (default 250), and arrival_rate, departure_rate and update_interval, which
+    default to those of the running simulation.
     """
     simulation = parking_lot_manager.get_parking_lot(lot_name)
     if not simulation:
@@ -220,11 +655,30 @@ def get_status(request, lot_name):
             status=status.HTTP_404_NOT_FOUND
         )
 
-    status_data = simulation.get_current_status()
-    status_data['timestamp'] = datetime.now().isoformat()
+    try:
+        budget_ms = float(request.GET.get("budget_ms", 250))
+        if not 0 < budget_ms <= MAX_FORECAST_BUDGET_MS:
+            raise ValueError(f"budget_ms must be between 0 and {MAX_FORECAST_BUDGET_MS}.")
+        rates = {}
+        for name in ("arrival_rate", "departure_rate", "update_interval"):
+            value = request.GET.get(name)
+            if value is not None:
+                rates[name] = float(value)
+        forecast = simulation.forecast(
+            horizon_seconds=float(request.GET.get("horizon", 3600)),
+            replications=int(request.GET.get("replications", 200)),
+            seed=int(request.GET.get("seed", 0)),
+            budget_seconds=budget_ms / 1000,
+            **rates,
+        )
+    except ValueError as ve:
+        logger.error(f"Invalid forecast query for lot '{lot_name}': {ve}")
+        return Response(
+            {"error": str(ve)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    logger.info(f"Retrieved status for parking lot '{lot_name}'.")
-    return Response(status_data, status=status.HTTP_200_OK)
+    return Response(forecast, status=status.HTTP_200_OK)
 
 
 @csrf_exempt
@@ -351,3 +805,49 @@ def is_simulation_running_view(request, lot_name):
     is_running = parking_lot_manager.is_simulation_running(lot_name)
     logger.debug(f"Simulation running status for lot '{lot_name}': {is_running}")
     return Response({"is_running": is_running}, status=status.HTTP_200_OK)
+
+
+def metrics_view(request):
+    """
+    Expose counters, gauges and latency histograms in the Prometheus text format.
+    """
+    return HttpResponse(
+        metrics.render(parking_lot_manager.collect_metrics()),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def get_memory_report(request):
+    """
+    Bytes per data structure for every built lot, cached payloads included, and per-process
+    tracemalloc totals. Query parameters: lot (repeatable) to filter, top for the N largest
+    allocation sites when the server runs with tracemalloc (PYTHONTRACEMALLOC=1).
+    """
+    if not profile_token_matches(request):
+        return HttpResponse("Profiling token required.", status=403, content_type="text/plain")
+    try:
+        top = int(request.GET.get("top", "0"))
+    except ValueError:
+        return HttpResponse("top must be an integer.", status=400, content_type="text/plain")
+    report = parking_lot_manager.memory_report(request.GET.getlist("lot") or None, top)
+    return HttpResponse(json_dumps(report), content_type="application/json")
+
+
+def get_profile(request, profile_id):
+    """
+    Return a stored request profile: a text summary, or the raw pstats dump with ?format=pstats.
+    """
+    if not profile_token_matches(request):
+        return HttpResponse("Profiling token required.", status=403, content_type="text/plain")
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        return HttpResponse(f"Profile '{profile_id}' not found.", status=404, content_type="text/plain")
+    if request.GET.get("format") == "pstats":
+        response = HttpResponse(profile["pstats"], content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="{profile_id}.prof"'
+        return response
+    header = f"{profile['method']} {profile['path']} took {profile['seconds'] * 1000:.2f} ms"
+    if profile["streamed"]:
+        header += " (view only; the streamed body was not profiled)"
+    header += "\n\n"
+    return HttpResponse(header + profile["summary"], content_type="text/plain; charset=utf-8")
@@ -0,0 +1,14 @@
+"""
+ASGI config for the API-only profile (backend.settings_api).
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+# Set rather than defaulted: this entry point only makes sense with the API-only settings
+os.environ['DJANGO_SETTINGS_MODULE'] = 'backend.settings_api'
+
+application = get_asgi_application()
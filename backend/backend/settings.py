@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.LotPinMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -129,3 +133,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
+
+# SpotOn
+# Directory for memory-mapped lot occupancy shared by all server worker processes.
+# Leave unset to keep each process's lots in its own memory (single worker only).
+SPOTON_SHARED_STATE_DIR = os.environ.get('SPOTON_SHARED_STATE_DIR')
+
+# Number of local shard processes to partition lots across (0 keeps every lot in this process).
+SPOTON_SHARDS = int(os.environ.get('SPOTON_SHARDS', '0'))
+
+# How single-level lots find the nearest free spot: 'heap' (availability priority queue) or
+# 'bitmap' (per-level occupancy bitmap, faster when lots are nearly full).
+SPOTON_ALLOCATION_BACKEND = os.environ.get('SPOTON_ALLOCATION_BACKEND', 'heap')
+
+# Estimated memory, in MiB, that built lots may hold before idle ones are paged out to disk,
+# least recently used first; they are paged back in on their next access. Unset keeps every lot in memory.
+SPOTON_LOT_MEMORY_LIMIT_MB = os.environ.get('SPOTON_LOT_MEMORY_LIMIT_MB')
+
+# Seconds a lot must go unused before it may be paged out.
+SPOTON_LOT_IDLE_SECONDS = float(os.environ.get('SPOTON_LOT_IDLE_SECONDS', '300'))
+
+# Directory for paged-out lots; a fresh temporary directory when unset.
+SPOTON_LOT_SPILL_DIR = os.environ.get('SPOTON_LOT_SPILL_DIR')
+
+# Gate commands (POST /api/gate/<lot>/) a lot may have waiting before new ones are refused with 429.
+SPOTON_GATE_QUEUE_DEPTH = int(os.environ.get('SPOTON_GATE_QUEUE_DEPTH', '10000'))
+
+# Most gate commands applied to a lot in one write transaction.
+SPOTON_GATE_BATCH_SIZE = int(os.environ.get('SPOTON_GATE_BATCH_SIZE', '256'))
+
+# Shared secret that enables per-request profiling (X-SpotOn-Profile header or ?profile= query flag).
+# Profiling is off when unset.
+SPOTON_PROFILE_TOKEN = os.environ.get('SPOTON_PROFILE_TOKEN')
+
+# Number of recent profiles kept in memory for /api/debug/profile/<id>/.
+SPOTON_PROFILE_STORE_SIZE = int(os.environ.get('SPOTON_PROFILE_STORE_SIZE', '50'))
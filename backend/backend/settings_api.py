@@ -0,0 +1,43 @@
+"""
+API-only settings: the same URLs and SPOTON_* options as backend.settings, without the
+admin, auth, sessions, messages, templates or a database. Every API view works on the
+in-memory lots, so none of them is used to answer a request.
+
+Serve with the matching ASGI entry point:
+
+    uvicorn backend.asgi_api:application
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'rest_framework',
+    'corsheaders',
+    'api',
+]
+
+# CommonMiddleware stays for APPEND_SLASH, so URLs missing their trailing slash redirect as before.
+# CorsMiddleware goes above it so those redirects carry CORS headers too.
+MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.LotPinMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+TEMPLATES = []
+
+# No connection is ever opened; Django falls back to its dummy backend
+DATABASES = {}
+
+# Without django.contrib.auth there are no users to authenticate, and without templates
+# there is no browsable API, so responses are always JSON
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'UNAUTHENTICATED_USER': None,
+}
+
+ASGI_APPLICATION = 'backend.asgi_api.application'
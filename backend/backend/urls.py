@@ -15,20 +15,37 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path
 from api import views 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('metrics', views.metrics_view, name='metrics'),
     path('api/initialize/<str:lot_name>/', views.initialize_parking_lot, name='initialize_parking_lot'),
     path('api/park/', views.park_vehicle, name='park_vehicle'),  # lot_name in POST data
     path('api/remove/', views.remove_vehicle, name='remove_vehicle'),  # lot_name in POST data
+    path('api/reserve/', views.reserve_spot, name='reserve_spot'),  # lot_name in POST data
+    path('api/reservation/cancel/', views.cancel_reservation, name='cancel_reservation'),  # lot_name in POST data
+    path('api/gate/<str:lot_name>/', views.submit_gate_commands, name='submit_gate_commands'),
+    path('api/gate/<str:lot_name>/results/', views.get_gate_results, name='get_gate_results'),
     path('api/status/<str:lot_name>/', views.get_status, name='get_status'),
     path("api/parking_grid/<str:lot_name>/", views.get_parking_grid, name="get_parking_grid"),
+    path('api/history/<str:lot_name>/', views.get_occupancy_history, name='get_occupancy_history'),
+    path('api/forecast/<str:lot_name>/', views.get_forecast, name='get_forecast'),
+    path('api/tiles/<str:lot_name>/', views.get_tiles, name='get_tiles'),
+    path('api/free_spots/<str:lot_name>/', views.get_free_spots_by_distance, name='get_free_spots_by_distance'),
     path('api/parking_lots/', views.get_parking_lots, name='get_parking_lots'),
+    path('api/entry_point/<str:lot_name>/', views.set_entry_point, name='set_entry_point'),
     path('api/simulation/start/<str:lot_name>/', views.start_simulation, name='start_simulation'),
     path('api/simulation/status/<str:lot_name>/', views.is_simulation_running_view, name='is_simulation_running'),
     path('api/simulation/stop/<str:lot_name>/', views.stop_simulation, name='stop_simulation'),
+    path('api/debug/memory/', views.get_memory_report, name='get_memory_report'),
+    path('api/debug/profile/<str:profile_id>/', views.get_profile, name='get_profile'),
     
 ]
+
+# The API-only profile (backend.settings_api) does not install the admin
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))